@@ -52,6 +52,122 @@ def _initialize_logging(app):
         logger.warning(f"Could not initialize enhanced logging: {e!s}")
 
 
+def _initialize_json_provider(app):
+    """Serialize JSON responses with orjson, keeping Flask's default output"""
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson"""
+
+        # Dates go through DefaultJSONProvider.default (HTTP date format), as
+        # with the stock provider; numpy arrays are encoded natively
+        option = (
+            orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+        def dumps(self, obj, **kwargs):
+            option = self.option
+            if kwargs.get("sort_keys", self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get("indent"):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
+
+def _initialize_nplusone(app):
+    """Enable N+1 query detection for development and test runs"""
+    if not app.config.get("NPLUSONE_ENABLED", False):
+        return
+
+    try:
+        from nplusone.ext.flask_sqlalchemy import NPlusOne
+
+        NPlusOne(app)
+        logger.info(
+            f"N+1 query detection enabled (raise={app.config.get('NPLUSONE_RAISE', False)})"
+        )
+    except ImportError:
+        logger.info("nplusone not installed, N+1 query detection disabled")
+
+
+def _initialize_feature_flag_stats(app):
+    """Flush buffered feature flag stats periodically and at shutdown"""
+    import atexit
+    import threading
+    import time
+
+    from models.feature_flag_unified import STAT_FLUSH_INTERVAL_MS, flush_feature_flag_stats
+
+    def flush():
+        with app.app_context():
+            flush_feature_flag_stats()
+
+    atexit.register(flush)
+
+    if app.config.get("TESTING"):
+        return
+
+    def flush_stats_periodic():
+        """Write the stats buffer every STAT_FLUSH_INTERVAL_MS"""
+        while True:
+            time.sleep(STAT_FLUSH_INTERVAL_MS / 1000)
+            try:
+                flush()
+            except Exception as e:
+                app.logger.error(f"Error flushing feature flag stats: {e}")
+
+    threading.Thread(target=flush_stats_periodic, daemon=True).start()
+
+
+def _initialize_log_writer(app):
+    """Write queued log rows from a background thread and drain them at shutdown"""
+    import atexit
+    import threading
+
+    from models.logs import flush_log_queue
+
+    def drain():
+        with app.app_context():
+            while flush_log_queue(timeout=0):
+                pass
+
+    atexit.register(drain)
+
+    if app.config.get("TESTING"):
+        return
+
+    def write_logs():
+        """Write each batch as soon as a row is queued, for the life of the process"""
+        while True:
+            try:
+                with app.app_context():
+                    flush_log_queue(timeout=None)
+            except Exception as e:
+                app.logger.error(f"Error writing queued logs: {e}")
+
+    threading.Thread(target=write_logs, daemon=True).start()
+
+
+def _initialize_request_batches(app):
+    """Write audit rows queued during a request in one batch when it ends"""
+    from models.batching import flush_request_batches
+
+    @app.teardown_request
+    def flush_batched_inserts(exc):
+        try:
+            flush_request_batches()
+        except Exception as e:
+            app.logger.error(f"Error writing batched audit rows: {e}")
+
+
 def _initialize_database_and_roles(app, skip_role_init=False):
     """Initialize database models and role definitions"""
     # Import DB from extensions to ensure it's initialized
@@ -108,6 +224,7 @@ def create_app(
 
     # Create Flask app instance
     app = Flask(__name__)
+    _initialize_json_provider(app)
 
     # If config_name not provided, determine from environment
     if config_name is None:
@@ -207,6 +324,8 @@ def create_app(
         "pool_recycle": 300,
         "pool_pre_ping": True,
         "connect_args": {"connect_timeout": 10},
+        # Rows per multi-VALUES statement for bulk INSERT ... RETURNING
+        "insertmanyvalues_page_size": 1000,
     }
 
     # Initialize extensions
@@ -215,6 +334,9 @@ def create_app(
     csrf.init_app(app)
     jwt.init_app(app)
 
+    # Guard eager-loaded relationships against N+1 regressions (dev/test only)
+    _initialize_nplusone(app)
+
     # Initialize Flask-Migrate for database migrations
     migrations_dir = os.path.join(os.path.dirname(__file__), "migrations")
     migrate.init_app(app, db, directory=migrations_dir)
@@ -240,6 +362,15 @@ def create_app(
     # Initialize database models and roles
     _initialize_database_and_roles(app, skip_role_init)
 
+    # Batch feature flag stat inserts
+    _initialize_feature_flag_stats(app)
+
+    # Move log inserts off the request path
+    _initialize_log_writer(app)
+
+    # Batch per-request audit inserts
+    _initialize_request_batches(app)
+
     # Import request utilities
     from utils.request_utils import is_api_request, is_htmx_request
 
@@ -946,6 +1077,12 @@ def register_blueprints(app):
                     "production" if app.config.get("ENV") == "production" else "development"
                 ),
             }
+            try:
+                from models.logs import pool_stats
+
+                response["db_pools"] = pool_stats()
+            except Exception as e:
+                app.logger.warning(f"Could not read database pool stats: {e!s}")
             return jsonify(response)
         except Exception as e:
             app.logger.error(f"Error in API health check: {e!s}")
@@ -159,6 +159,7 @@ class Config:
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_recycle": 300,
         "pool_pre_ping": True,
+        "insertmanyvalues_page_size": 1000,
     }
 
     # HTTPS and secure cookie configuration
@@ -302,6 +303,10 @@ class DevelopmentConfig(Config):
     VALIDATE_SCHEMA_ON_STARTUP = True
     STRICT_SCHEMA_VALIDATION = False  # Warning only, don't block startup
 
+    # N+1 query detection (warn by default, set NPLUSONE_RAISE=true to fail fast)
+    NPLUSONE_ENABLED = True
+    NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE", "false").lower() == "true"
+
 
 # Testing-specific configuration
 class TestingConfig(Config):
@@ -309,6 +314,10 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL") or "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
 
+    # Any lazy load that triggers an N+1 pattern fails the test
+    NPLUSONE_ENABLED = True
+    NPLUSONE_RAISE = True
+
 
 # Production-specific configuration
 class ProductionConfig(Config):
@@ -17,12 +17,13 @@ from .feature_flag_unified import UnifiedFeatureFlagOverride as FeatureFlagOverr
 from .feature_flag_unified import UnifiedFeatureFlagStat as FeatureFlagStat
 from .invitation import Invitation
 from .job import Company, Department, Job
-from .match import JobCandidateMatch, MatchHistory
+from .match import MatchHistory
 from .matching import CandidateJobMatch
 from .rating import (
     CandidateRating,
     FlaggedPrompt,
     PromptAudit,
+    PromptAuditBody,
     PromptTemplate,
     RatingCriterion,
     RatingScale,
@@ -33,11 +34,18 @@ from .session import Session
 
 # Import models that were moved to dedicated modules
 from .shared import CandidateSkill, JobSkill, Skill
-from .sharing import CandidateSharing, JobSharing
+from .sharing import (
+    CandidateSharing,
+    CandidateSharingPermission,
+    JobSharing,
+    JobSharingPermission,
+    RecruiterSharing,
+    RecruiterSharingPermission,
+)
 from .status import CandidateStatus
 
 # Import our core model objects
-from .user import RecruiterSharing, User
+from .user import User
 
 # For external use, we'll initialize an adapter module
 RecruiterAdapter = None  # Will be populated later
@@ -45,6 +53,9 @@ RecruiterAdapter = None  # Will be populated later
 RevokedToken = None
 JobToken = None
 
+# Merged into CandidateJobMatch; the old name is kept for existing callers
+JobCandidateMatch = CandidateJobMatch
+
 # For migration support
 __all__ = [
     # Bias detection models
@@ -56,6 +67,7 @@ __all__ = [
     "CandidateProcessingHistory",
     "CandidateRating",
     "CandidateSharing",
+    "CandidateSharingPermission",
     # Models moved to dedicated modules
     "CandidateSkill",
     "CandidateStatus",
@@ -74,16 +86,19 @@ __all__ = [
     "JobCandidateMatch",
     # Sharing models
     "JobSharing",
+    "JobSharingPermission",
     "JobSkill",
     "JobToken",
     "MatchHistory",
     "PromptAudit",
+    "PromptAuditBody",
     "PromptTemplate",
     "RatingCriterion",
     "RatingScale",
     # Legacy model names for compatibility
     "Recruiter",
     "RecruiterSharing",
+    "RecruiterSharingPermission",
     "RevokedToken",
     "Role",
     "Session",
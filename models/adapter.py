@@ -6,11 +6,10 @@ different model structures in the system.
 """
 
 import logging
-from datetime import datetime
 
 from werkzeug.security import generate_password_hash
 
-from .base import db
+from .base import db, naive_utcnow
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -56,23 +55,19 @@ class RecruiterAdapter:
                 else:
                     recruiter.password_hash = generate_password_hash(password)
 
-                recruiter.role = role
-                if hasattr(recruiter, "role_id"):
-                    recruiter.role_id = role
+                recruiter.role_id = role
 
                 db.session.commit()
-                return True, {"id": recruiter.id, "email": recruiter.email, "role": recruiter.role}
+                return True, {
+                    "id": recruiter.id,
+                    "email": recruiter.email,
+                    "role": recruiter.role_id,
+                }
             else:
                 # Create new recruiter
                 logger.info(f"Creating new recruiter: {name} <{email}>")
 
-                try:
-                    # Try with role_id
-                    new_recruiter = Recruiter(name=name, email=email, role=role, role_id=role)
-                except Exception as e:
-                    logger.warning(f"Failed to create recruiter with role_id, trying without: {e}")
-                    # Try without role_id
-                    new_recruiter = Recruiter(name=name, email=email, role=role)
+                new_recruiter = Recruiter(name=name, email=email, role_id=role)
 
                 # Handle password
                 if hasattr(new_recruiter, "set_password"):
@@ -86,7 +81,7 @@ class RecruiterAdapter:
                 return True, {
                     "id": new_recruiter.id,
                     "email": new_recruiter.email,
-                    "role": new_recruiter.role,
+                    "role": new_recruiter.role_id,
                 }
 
         except Exception as e:
@@ -114,7 +109,7 @@ class RecruiterAdapter:
                 return True, {
                     "id": recruiter.id,
                     "email": recruiter.email,
-                    "role": recruiter.role,
+                    "role": recruiter.role_id,
                     "name": recruiter.name if hasattr(recruiter, "name") else "Unknown",
                 }
             else:
@@ -150,5 +145,5 @@ class RecruiterAdapter:
             "email": user.email,
             "name": name,
             "role": "admin" if getattr(user, "is_admin", False) else "recruiter",
-            "created_at": getattr(user, "created_at", datetime.utcnow()),
+            "created_at": getattr(user, "created_at", naive_utcnow()),
         }
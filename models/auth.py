@@ -10,7 +10,7 @@ This module defines all authentication-related models:
 
 import logging
 import secrets
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from sqlalchemy import (
     Boolean,
@@ -18,10 +18,13 @@ from sqlalchemy import (
     DateTime,
     Integer,
     String,
+    delete,
 )
 
 from extensions import db
 
+from .base import naive_utcnow
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -41,7 +44,7 @@ class TokenBlocklist(db.Model):
     jti = Column(String(36), nullable=False, index=True)
     type = Column(String(16), nullable=False)
     user_id = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=naive_utcnow)
 
     def __repr__(self):
         return f"<TokenBlocklist {self.jti}>"
@@ -62,8 +65,8 @@ class PasswordReset(db.Model):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False, index=True)
     token = Column(String(64), nullable=False, index=True, unique=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, default=lambda: datetime.utcnow() + timedelta(hours=24))
+    created_at = Column(DateTime, default=naive_utcnow)
+    expires_at = Column(DateTime, default=lambda: naive_utcnow() + timedelta(hours=24))
     used = Column(Boolean, default=False)
     used_at = Column(DateTime, nullable=True)
 
@@ -77,13 +80,13 @@ class PasswordReset(db.Model):
         Returns:
             bool: True if valid, False otherwise
         """
-        now = datetime.utcnow()
+        now = naive_utcnow()
         return not self.used and now < self.expires_at
 
     def mark_used(self):
         """Mark token as used"""
         self.used = True
-        self.used_at = datetime.utcnow()
+        self.used_at = naive_utcnow()
 
     @classmethod
     def generate_token(cls, user_id):
@@ -103,27 +106,54 @@ class PasswordReset(db.Model):
         reset = cls(
             user_id=user_id,
             token=token,
-            created_at=datetime.utcnow(),
-            expires_at=datetime.utcnow() + timedelta(hours=24),
+            created_at=naive_utcnow(),
+            expires_at=naive_utcnow() + timedelta(hours=24),
         )
 
         return reset
 
     @classmethod
-    def cleanup_expired_tokens(cls, days=7):
+    def cleanup_expired_tokens(cls, days=7, batch_size=1000):
         """
         Clean up expired tokens older than the specified days
 
+        Expired IDs are streamed with a server-side cursor and deleted in
+        batches, so memory stays bounded regardless of the backlog size.
+
         Args:
             days: Number of days after which tokens are cleaned up
+            batch_size: Number of tokens deleted per DELETE statement
+
+        Returns:
+            int: Number of tokens removed
         """
-        cleanup_date = datetime.utcnow() - timedelta(days=days)
-        expired_tokens = cls.query.filter(
-            (cls.expires_at < datetime.utcnow()) | (cls.created_at < cleanup_date)
-        ).all()
-
-        if expired_tokens:
-            for token in expired_tokens:
-                db.session.delete(token)
+        now = naive_utcnow()
+        cleanup_date = now - timedelta(days=days)
+        expired_ids = (
+            cls.query.with_entities(cls.id)
+            .filter((cls.expires_at < now) | (cls.created_at < cleanup_date))
+            .yield_per(batch_size)
+        )
+
+        removed = 0
+        batch = []
+        for (token_id,) in expired_ids:
+            batch.append(token_id)
+            if len(batch) >= batch_size:
+                removed += cls._delete_batch(batch)
+                batch = []
+
+        if batch:
+            removed += cls._delete_batch(batch)
+
+        if removed:
             db.session.commit()
-            logger.info(f"Cleaned up {len(expired_tokens)} expired password reset tokens")
+            logger.info(f"Cleaned up {removed} expired password reset tokens")
+
+        return removed
+
+    @classmethod
+    def _delete_batch(cls, token_ids):
+        """Delete a batch of tokens by ID and return the number removed"""
+        result = db.session.execute(delete(cls).where(cls.id.in_(token_ids)))
+        return result.rowcount
@@ -5,9 +5,136 @@ This module defines the base model classes and database instance used throughout
 the application.
 """
 
+from datetime import datetime, timezone
+
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy import event, inspect
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
 from extensions import db
 
+# Dimensionality of the stored OpenAI embeddings (pgvector column width)
+EMBEDDING_DIMENSIONS = 1536
+
+
+def as_halfvec(value):
+    """
+    Cast an embedding column or value to half precision
+
+    The HNSW embedding indexes are built on embedding::halfvec, so distance
+    expressions must go through this cast for the planner to use them.
+    """
+    return db.cast(value, HALFVEC(EMBEDDING_DIMENSIONS))
+
+
+def utc_now():
+    """
+    Current UTC time computed by Postgres, for naive DateTime columns
+
+    Use as server_default/onupdate so inserts don't have to send timestamps.
+    """
+    return db.func.timezone("utc", db.func.now())
+
+
+def naive_utcnow():
+    """
+    Current UTC time as a naive datetime, for Python-side defaults
+
+    Same value as the deprecated datetime.utcnow(). Pass the function itself
+    as default/onupdate so each insert makes a single call.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def detached_copy(instance):
+    """
+    Copy an instance's column values into a new detached instance
+
+    For process-wide caches: the copy belongs to no session, so commits and
+    rollbacks elsewhere never expire it, and caching it never detaches the
+    caller's own instance. Relationships are not copied.
+
+    Args:
+        instance: Persistent ORM instance
+
+    Returns:
+        Detached instance of the same class
+    """
+    mapper = inspect(instance).mapper
+    copy = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(copy, attr.key, getattr(instance, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
+
+def attach_cached(copy):
+    """
+    Get a session-bound instance for a detached_copy without a query
+
+    Args:
+        copy: Instance returned by detached_copy
+
+    Returns:
+        The current session's instance for that identity if it has one,
+        otherwise a clean instance merged from the copy
+    """
+    existing = db.session.identity_map.get(inspect(copy).key)
+    if existing is not None:
+        return existing
+    return db.session.merge(copy, load=False)
+
+
+def call_after_commit(session, callback):
+    """
+    Run a callback once the session's current transaction commits
+
+    For process-local cache eviction: mapper events fire during flush, before
+    the data is visible to other connections, and a rollback would leave the
+    eviction pointing at rows that never changed. Callbacks for a rolled-back
+    transaction are discarded.
+
+    Args:
+        session: Session doing the write
+        callback: Function called with no arguments after commit
+    """
+    session.info.setdefault("_after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop("_after_commit", ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_commit(session):
+    session.info.pop("_after_commit", None)
+
+
+def halfvec_cosine_index(name, column):
+    """Half-precision HNSW cosine index over a Vector(EMBEDDING_DIMENSIONS) column"""
+    return db.Index(
+        name,
+        db.text(f"({column}::halfvec({EMBEDDING_DIMENSIONS})) halfvec_cosine_ops"),
+        postgresql_using="hnsw",
+    )
+
+
 # Re-export db and PostgreSQL types for easier imports and LSP compliance
-__all__ = ["ARRAY", "JSONB", "db"]
+__all__ = [
+    "ARRAY",
+    "EMBEDDING_DIMENSIONS",
+    "JSONB",
+    "Vector",
+    "as_halfvec",
+    "attach_cached",
+    "call_after_commit",
+    "db",
+    "detached_copy",
+    "halfvec_cosine_index",
+    "naive_utcnow",
+    "utc_now",
+]
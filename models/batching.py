@@ -0,0 +1,74 @@
+"""
+Request-Scoped Insert Batching for AI Recruiter Pro
+
+This module lets audit models collect the rows produced during a request
+and write them in one executemany INSERT when the request ends, instead of
+one session.add/commit round trip per event.
+"""
+
+
+from flask import g, has_request_context
+from sqlalchemy import insert
+
+from .base import db, naive_utcnow
+
+
+class BatchedInsertMixin:
+    """Adds bulk_log and request-scoped queue to an append-only model"""
+
+    @classmethod
+    def bulk_log(cls, rows):
+        """
+        Insert many rows with batched executemany INSERTs
+
+        Runs in its own transaction, so the rows are written even if the
+        caller's session is later rolled back.
+
+        Args:
+            rows (list): Dicts keyed by column name
+
+        Returns:
+            int: Number of rows inserted
+        """
+        if not rows:
+            return 0
+        # executemany needs the same keys in every row of a statement
+        by_keys = {}
+        for row in rows:
+            by_keys.setdefault(frozenset(row), []).append(row)
+        with db.engine.begin() as connection:
+            for group in by_keys.values():
+                connection.execute(insert(cls), group)
+        return len(rows)
+
+    @classmethod
+    def queue(cls, **fields):
+        """
+        Queue a row to be written when the current request ends
+
+        The timestamp is taken now rather than at write time. Outside a
+        request the row is written immediately.
+
+        Args:
+            **fields: Column values for the row
+        """
+        fields.setdefault("timestamp", naive_utcnow())
+        if not has_request_context():
+            cls.bulk_log([fields])
+            return
+        if "_batched_inserts" not in g:
+            g._batched_inserts = {}
+        g._batched_inserts.setdefault(cls, []).append(fields)
+
+
+def flush_request_batches():
+    """
+    Write every row queued during the current request, one batch per model
+
+    Returns:
+        int: Number of rows written
+    """
+    batches = g.pop("_batched_inserts", None)
+    if not batches:
+        return 0
+    return sum(model.bulk_log(rows) for model, rows in batches.items())
@@ -5,13 +5,19 @@ This module defines models for tracking bias detection, auditing, and fairness m
 in the AI recruitment system.
 """
 
-import json
-from datetime import datetime
+from collections import defaultdict
 
+import orjson
 from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 
-from .base import db
+from .base import db, naive_utcnow
+
+# Finding field that holds the summarised value for each bias finding type
+_SUMMARY_FIELD_BY_TYPE = {
+    "protected_attribute": "attribute",
+    "biased_language": "term",
+}
 
 
 class BiasAudit(db.Model):
@@ -33,7 +39,7 @@ class BiasAudit(db.Model):
 
     id = Column(Integer, primary_key=True)
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = Column(DateTime, default=naive_utcnow, nullable=False)
     findings = Column(Text)  # JSON string of bias findings
     prompt_bias = Column(Text)  # JSON string of prompt bias analysis
     prompt_used = Column(Text)  # The actual prompt used
@@ -47,8 +53,8 @@ class BiasAudit(db.Model):
     def has_bias(self):
         """Check if any bias was detected"""
         try:
-            findings = json.loads(self.findings) if self.findings else []
-            prompt_bias = json.loads(self.prompt_bias) if self.prompt_bias else []
+            findings = orjson.loads(self.findings) if self.findings else []
+            prompt_bias = orjson.loads(self.prompt_bias) if self.prompt_bias else []
             return len(findings) > 0 or len(prompt_bias) > 0
         except:
             return False
@@ -57,20 +63,18 @@ class BiasAudit(db.Model):
     def bias_summary(self):
         """Get a summary of bias findings"""
         try:
-            findings = json.loads(self.findings) if self.findings else []
-            categories = {}
+            findings = orjson.loads(self.findings) if self.findings else []
+            categories = defaultdict(list)
 
             for finding in findings:
                 finding_type = finding.get("type", "unknown")
-                if finding_type not in categories:
-                    categories[finding_type] = []
-
-                if finding_type == "protected_attribute":
-                    categories[finding_type].append(finding.get("attribute", "unknown"))
-                elif finding_type == "biased_language":
-                    categories[finding_type].append(finding.get("term", "unknown"))
+                # Unknown types are still listed as categories, just without values
+                values = categories[finding_type]
+                field = _SUMMARY_FIELD_BY_TYPE.get(finding_type)
+                if field is not None:
+                    values.append(finding.get(field, "unknown"))
 
-            return categories
+            return dict(categories)
         except:
             return {"error": "Could not parse findings"}
 
@@ -98,7 +102,7 @@ class JobBiasAudit(db.Model):
 
     id = Column(Integer, primary_key=True)
     job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = Column(DateTime, default=naive_utcnow, nullable=False)
     bias_terms = Column(Text)  # JSON string of bias terms found
     biased_requirements = Column(Text)  # JSON string of biased requirements
     bias_score = Column(Float, default=0.0)  # 0.0 (no bias) to 1.0 (high bias)
@@ -142,7 +146,7 @@ class FairnessMetric(db.Model):
     __tablename__ = "fairness_metrics"
 
     id = Column(Integer, primary_key=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = Column(DateTime, default=naive_utcnow, nullable=False)
     metric_type = Column(String(50), nullable=False)  # 'system', 'candidate', 'job', etc.
     metric_data = Column(Text)  # JSON string of metrics
 
@@ -179,7 +183,7 @@ class BiasPromptTemplate(db.Model):
     bias_score = Column(Float, default=0.0)
     bias_findings = Column(Text)  # JSON string of bias findings
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=naive_utcnow)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
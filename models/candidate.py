@@ -5,11 +5,99 @@ This module defines candidate-related models for storing resume data,
 processing history, and status tracking.
 """
 
+import csv
+import io
+import os
 import uuid
-from datetime import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cached_property
+
+import orjson
+from sqlalchemy import event, insert
+from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy.orm import deferred, selectinload, validates
 
 # Import ARRAY and JSONB directly from the base module to avoid LSP import issues
-from .base import JSONB, db
+from .base import (
+    EMBEDDING_DIMENSIONS,
+    JSONB,
+    Vector,
+    as_halfvec,
+    db,
+    halfvec_cosine_index,
+    naive_utcnow,
+)
+from .status import CandidateStatus, candidate_status_type
+
+# Valid (from_status, to_status) processing transitions, shared with candidate_status
+VALID_STATUS_TRANSITIONS = frozenset(
+    {
+        ("pending", "processing"),
+        ("processing", "complete"),
+        ("processing", "failed"),
+        ("complete", "pending"),  # Allow reprocessing of complete candidates
+        ("failed", "pending"),  # Allow retrying failed candidates
+    }
+)
+
+# Columns written by Candidate.bulk_copy, with defaults for omitted values
+_COPY_COLUMNS = (
+    "uploaded_by",
+    "name",
+    "email",
+    "phone",
+    "source",
+    "processing_status",
+    "parsed_data",
+    "embedding",
+    "created_at",
+    "updated_at",
+)
+# JSON-encoded on COPY; a JSON float array is also valid pgvector text input
+_COPY_JSON_COLUMNS = frozenset({"parsed_data", "embedding"})
+_COPY_DEFAULTS = {"source": "manual", "processing_status": "pending"}
+
+# Processing history rows buffered by an active batched_status_history() block
+_pending_history = ContextVar("pending_processing_history", default=None)
+
+
+@contextmanager
+def batched_status_history():
+    """
+    Buffer processing history rows and write them with a single bulk INSERT
+
+    Wrap batch resume processing in this block so each status transition does
+    not emit its own INSERT. Nested blocks share the outermost buffer, and the
+    buffer is discarded if the block raises.
+    """
+    if _pending_history.get() is not None:
+        yield
+        return
+
+    rows = []
+    token = _pending_history.set(rows)
+    try:
+        yield
+    finally:
+        _pending_history.reset(token)
+
+    if rows:
+        CandidateProcessingHistory.bulk_add(rows)
+
+
+def _buffer_history_row(row):
+    """
+    Append a history row to the active batch buffer
+
+    Returns:
+        bool: True if the row was buffered, False if no batch is active
+    """
+    pending = _pending_history.get()
+    if pending is None:
+        return False
+    pending.append(row)
+    return True
 
 
 class Candidate(db.Model):
@@ -42,6 +130,33 @@ class Candidate(db.Model):
 
     __tablename__ = "candidates"
 
+    # Index parsed_data so skill/experience filters run in Postgres, not Python
+    __table_args__ = (
+        db.Index(
+            "ix_candidates_parsed_data_gin",
+            "parsed_data",
+            postgresql_using="gin",
+            postgresql_ops={"parsed_data": "jsonb_path_ops"},
+        ),
+        db.Index(
+            "ix_candidates_experience_level",
+            db.text("(parsed_data ->> 'experience_level')"),
+        ),
+        # Approximate nearest-neighbour index for cosine-distance search
+        halfvec_cosine_index("ix_candidates_embedding_hnsw", "embedding"),
+        # Partial indexes so worker polling scans only pending/in-flight rows
+        db.Index(
+            "ix_candidates_pending",
+            "id",
+            postgresql_where=db.text("processing_status = 'pending'"),
+        ),
+        db.Index(
+            "ix_candidates_processing",
+            "id",
+            postgresql_where=db.text("processing_status = 'processing'"),
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     uploaded_by = db.Column(
         db.Integer, db.ForeignKey("recruiters.id", ondelete="CASCADE"), nullable=True
@@ -51,13 +166,25 @@ class Candidate(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120))
 
+    @cached_property
+    def _name_parts(self):
+        """Split name into (first, rest) once per name value"""
+        if not self.name:
+            return self.name, ""
+        first, _, rest = self.name.partition(" ")
+        return first, rest
+
+    @validates("name")
+    def _invalidate_name_parts(self, key, value):
+        """Drop the cached name split whenever name changes"""
+        self.__dict__.pop("_name_parts", None)
+        return value
+
     # Properties for backwards compatibility
     @property
     def first_name(self):
         """Get first name from name field"""
-        if self.name and " " in self.name:
-            return self.name.split(" ")[0]
-        return self.name
+        return self._name_parts[0]
 
     @first_name.setter
     def first_name(self, value):
@@ -69,9 +196,7 @@ class Candidate(db.Model):
     @property
     def last_name(self):
         """Get last name from name field"""
-        if self.name and " " in self.name:
-            return " ".join(self.name.split(" ")[1:])
-        return ""
+        return self._name_parts[1]
 
     @last_name.setter
     def last_name(self, value):
@@ -109,16 +234,30 @@ class Candidate(db.Model):
         pass
 
     # Professional information
-    parsed_data = db.Column(db.JSON)
+    # MutableDict so in-place key updates are picked up by change tracking
+    parsed_data = db.Column(MutableDict.as_mutable(JSONB))
     persona = db.Column(db.JSON)
-    status = db.Column(db.String(20))
+    status = db.Column(
+        candidate_status_type,
+        nullable=False,
+        default=CandidateStatus.NEW,
+        server_default=CandidateStatus.NEW.value,  # rows written by bulk_copy
+    )
     status_notes = db.Column(db.Text)
     status_updated_at = db.Column(db.DateTime)
     status_updated_by = db.Column(
         db.Integer, db.ForeignKey("recruiters.id", ondelete="SET NULL"), nullable=True
     )
     match_score = db.Column(db.Float)
-    resume_text = db.Column(db.Text)
+    # Large payload, loaded only on access (use undefer() where it is needed)
+    resume_text = deferred(db.Column(db.Text))
+
+    def _set_parsed(self, key, value):
+        """Store a non-empty value under key in parsed_data"""
+        if not self.parsed_data:
+            self.parsed_data = {}
+        if value:
+            self.parsed_data[key] = value
 
     # Compatibility properties for missing fields
     @property
@@ -131,10 +270,7 @@ class Candidate(db.Model):
     @title.setter
     def title(self, value):
         """Set title in parsed_data"""
-        if not self.parsed_data:
-            self.parsed_data = {}
-        if value:
-            self.parsed_data["title"] = value
+        self._set_parsed("title", value)
 
     @property
     def resume_url(self):
@@ -156,10 +292,7 @@ class Candidate(db.Model):
     @skills.setter
     def skills(self, value):
         """Set skills in parsed_data"""
-        if not self.parsed_data:
-            self.parsed_data = {}
-        if value:
-            self.parsed_data["skills"] = value
+        self._set_parsed("skills", value)
 
     @property
     def skills_array(self):
@@ -171,10 +304,7 @@ class Candidate(db.Model):
     @skills_array.setter
     def skills_array(self, value):
         """Set skills_array in parsed_data"""
-        if not self.parsed_data:
-            self.parsed_data = {}
-        if value:
-            self.parsed_data["skills_array"] = value
+        self._set_parsed("skills_array", value)
 
     @property
     def experience_level(self):
@@ -186,10 +316,7 @@ class Candidate(db.Model):
     @experience_level.setter
     def experience_level(self, value):
         """Set experience_level in parsed_data"""
-        if not self.parsed_data:
-            self.parsed_data = {}
-        if value:
-            self.parsed_data["experience_level"] = value
+        self._set_parsed("experience_level", value)
 
     @property
     def summary(self):
@@ -201,51 +328,183 @@ class Candidate(db.Model):
     @summary.setter
     def summary(self, value):
         """Set summary in parsed_data"""
-        if not self.parsed_data:
-            self.parsed_data = {}
-        if value:
-            self.parsed_data["summary"] = value
+        self._set_parsed("summary", value)
 
     # Metadata and processing information
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
+    updated_at = db.Column(db.DateTime, default=naive_utcnow, onupdate=naive_utcnow)
     source = db.Column(db.String(20), default="manual")
     processing_status = db.Column(db.String(20), default="pending")
     error_message = db.Column(db.Text)
 
-    # Virtual property for reference_number (not in DB schema)
-    _reference_number = None
+    @classmethod
+    def query_by_skill(cls, skill):
+        """
+        Query candidates whose parsed skills_array contains a skill
 
-    @property
+        Uses JSONB containment (@>) so the GIN index on parsed_data is used.
+
+        Args:
+            skill: Skill name as stored in skills_array
+
+        Returns:
+            Query: Candidates having the skill
+        """
+        return cls.query.filter(cls.parsed_data.contains({"skills_array": [skill]}))
+
+    @classmethod
+    def nearest_to(cls, embedding, limit=20):
+        """
+        Query the candidates closest to an embedding by cosine distance
+
+        The ordering runs inside Postgres using the half-precision HNSW index.
+
+        Args:
+            embedding: Query vector
+            limit: Maximum number of candidates to return
+
+        Returns:
+            Query: Candidates ordered from most to least similar
+        """
+        distance = as_halfvec(cls.embedding).cosine_distance(as_halfvec(embedding))
+        return cls.query.order_by(distance).limit(limit)
+
+    @classmethod
+    def bulk_copy(cls, rows, batch_size=5000):
+        """
+        Stream many candidate rows into Postgres with COPY ... FROM STDIN
+
+        Much faster than ORM inserts for bulk uploads: rows are written as CSV
+        (JSON columns serialized with orjson) and bypass per-row statement
+        binding. Runs on the session's connection, so it shares its transaction.
+
+        Args:
+            rows: Iterable of dicts keyed by column name (see _COPY_COLUMNS)
+            batch_size: Number of rows sent per COPY statement
+
+        Returns:
+            int: Number of rows copied
+        """
+        columns = ", ".join(_COPY_COLUMNS)
+        sql = f"COPY {cls.__tablename__} ({columns}) FROM STDIN WITH (FORMAT CSV)"
+        cursor = db.session.connection().connection.cursor()
+        now = naive_utcnow()
+
+        copied = 0
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            pending = 0
+            for row in rows:
+                values = []
+                for column in _COPY_COLUMNS:
+                    value = row.get(column, _COPY_DEFAULTS.get(column))
+                    if value is None and column in ("created_at", "updated_at"):
+                        value = now
+                    elif value is not None and column in _COPY_JSON_COLUMNS:
+                        value = orjson.dumps(value).decode()
+                    values.append(value)
+                writer.writerow(values)
+                pending += 1
+
+                if pending >= batch_size:
+                    buffer.seek(0)
+                    cursor.copy_expert(sql, buffer)
+                    copied += pending
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    pending = 0
+
+            if pending:
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                copied += pending
+        finally:
+            cursor.close()
+
+        return copied
+
+    @classmethod
+    def claim_pending(cls, limit=10):
+        """
+        Lock a batch of pending candidates for processing
+
+        Rows locked by another worker are skipped, so several workers can poll
+        concurrently without blocking each other. The locks are held until the
+        caller's transaction ends.
+
+        Args:
+            limit: Maximum number of candidates to claim
+
+        Returns:
+            list: Pending Candidate objects, oldest first
+        """
+        return (
+            cls.query.filter_by(processing_status="pending")
+            .order_by(cls.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    # Virtual attribute for reference_number (not in DB schema). Generated on
+    # first read only; assigning a value stores it in memory on the instance.
+    @cached_property
     def reference_number(self):
-        """Get reference number (generated on demand)"""
-        if not self._reference_number:
-            self._reference_number = str(uuid.uuid4())
-        return self._reference_number
+        """
+        Get reference number (generated on demand)
 
-    @reference_number.setter
-    def reference_number(self, value):
-        """Store reference number in memory only"""
-        self._reference_number = value
+        A random version 4 UUID as 32 hex digits. Earlier releases used
+        str(uuid4()), the 36-character dashed form, so stored or compared
+        values may be in either format.
+        """
+        return uuid.uuid4().hex
 
-    # Vector embedding for semantic search
-    embedding = db.Column(JSONB)
+    @classmethod
+    def assign_reference_numbers(cls, candidates):
+        """
+        Generate reference numbers for many candidates at once
+
+        Reads the random bytes for every candidate with one os.urandom call
+        instead of one per uuid4(), then formats each 16-byte slice as a
+        version 4 UUID in the same format as reference_number.
+
+        Args:
+            candidates: Iterable of Candidate instances; existing values are kept
+        """
+        pending = [c for c in candidates if "reference_number" not in c.__dict__]
+        randomness = os.urandom(16 * len(pending))
+        for offset, candidate in enumerate(pending):
+            start = offset * 16
+            candidate.reference_number = uuid.UUID(
+                bytes=randomness[start : start + 16], version=4
+            ).hex
+
+    # Vector embedding for semantic search (pgvector), deferred so list queries skip it
+    embedding = deferred(db.Column(Vector(EMBEDDING_DIMENSIONS)))
 
     # Relationships
+    # passive_deletes leaves unloaded history rows to the FKs' ON DELETE
+    # CASCADE, so deleting a candidate does not load them from Python
     processing_history = db.relationship(
         "CandidateProcessingHistory",
         backref="candidate",
-        lazy="dynamic",
+        lazy="select",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     status_history = db.relationship(
-        "CandidateStatusHistory", backref="candidate", lazy="dynamic", cascade="all, delete-orphan"
+        "CandidateStatusHistory",
+        backref="candidate",
+        lazy="select",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     # User will be added back in later once both models are created
     # user = db.relationship('User', backref=db.backref('candidates', lazy='dynamic'))
 
-    # Valid status transitions
+    # Valid status transitions (kept for reference; validation uses VALID_STATUS_TRANSITIONS)
     _status_transitions = {
         "pending": ["processing"],
         "processing": ["complete", "failed"],
@@ -263,11 +522,7 @@ class Candidate(db.Model):
         Returns:
             bool: True if valid, False otherwise
         """
-        current = self.processing_status
-        if current not in self._status_transitions:
-            return False
-
-        return new_status in self._status_transitions[current]
+        return (self.processing_status, new_status) in VALID_STATUS_TRANSITIONS
 
     def transition_to(self, new_status, error_message=None):
         """
@@ -304,26 +559,51 @@ class Candidate(db.Model):
             from_status: Previous status
             to_status: New status
             error_message: Optional error message
+
+        Returns:
+            int: ID of the new history row, or None if buffered in a batch
         """
         # Calculate duration (placeholder)
         duration = 0.0
 
-        history = CandidateProcessingHistory(
-            candidate_id=self.id,
-            from_status=from_status,
-            to_status=to_status,
-            error_message=error_message,
-            duration=duration,
+        if self.id is None:
+            # The history row references the candidate's primary key
+            db.session.flush()
+
+        row = {
+            "candidate_id": self.id,
+            "from_status": from_status,
+            "to_status": to_status,
+            "error_message": error_message,
+            "duration": duration,
+        }
+        if _buffer_history_row(row):
+            return None
+
+        # Single round-trip INSERT ... RETURNING id instead of add + flush + refresh
+        stmt = (
+            insert(CandidateProcessingHistory)
+            .values(**row)
+            .returning(CandidateProcessingHistory.id)
         )
-        db.session.add(history)
+        return db.session.execute(stmt).scalar_one()
 
-    def __init__(self, **kwargs):
-        """Initialize a new candidate"""
-        super().__init__(**kwargs)
+    def recent_processing_history(self, limit=10):
+        """
+        Get the latest processing history entries without loading the full list
 
-        # Generate reference number if not provided
-        if not self.reference_number:
-            self.reference_number = str(uuid.uuid4())
+        Args:
+            limit: Maximum number of entries to return
+
+        Returns:
+            list: CandidateProcessingHistory entries, newest first
+        """
+        return (
+            CandidateProcessingHistory.query.filter_by(candidate_id=self.id)
+            .order_by(CandidateProcessingHistory.timestamp.desc())
+            .limit(limit)
+            .all()
+        )
 
     def get_full_name(self):
         """
@@ -332,13 +612,9 @@ class Candidate(db.Model):
         Returns:
             str: Full name or 'Unknown Candidate' if not available
         """
-        if self.first_name and self.last_name:
-            return f"{self.first_name} {self.last_name}"
-        elif self.first_name:
-            return self.first_name
-        elif self.last_name:
-            return self.last_name
-        return "Unknown Candidate"
+        # first_name/last_name are derived from name, so it already holds both
+        name = self.name.strip() if self.name else ""
+        return name or "Unknown Candidate"
 
     def to_dict(self):
         """
@@ -347,18 +623,20 @@ class Candidate(db.Model):
         Returns:
             dict: Dictionary representation of candidate
         """
+        first_name, last_name = self._name_parts
+        parsed_data = self.parsed_data or {}
         return {
             "id": self.id,
-            "first_name": self.first_name,
-            "last_name": self.last_name,
+            "first_name": first_name,
+            "last_name": last_name,
             "email": self.email,
             "phone": self.phone,
             "location": self.location,
-            "title": self.title,
-            "skills": self.skills,
-            "skills_array": self.skills_array,
-            "experience_level": self.experience_level,
-            "summary": self.summary,
+            "title": parsed_data.get("title"),
+            "skills": parsed_data.get("skills"),
+            "skills_array": parsed_data.get("skills_array", []),
+            "experience_level": parsed_data.get("experience_level"),
+            "summary": parsed_data.get("summary"),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "source": self.source,
@@ -368,7 +646,16 @@ class Candidate(db.Model):
         }
 
     def __repr__(self):
-        return f"<Candidate {self.get_full_name()} {self.id}>"
+        return f"<Candidate {self.name!r} {self.id}>"
+
+
+@event.listens_for(Candidate, "refresh")
+@event.listens_for(Candidate, "expire")
+def _invalidate_name_parts_on_reload(target, *args):
+    """Drop the cached name split when name is expired or reloaded"""
+    attrs = args[-1]
+    if attrs is None or "name" in attrs:
+        target.__dict__.pop("_name_parts", None)
 
 
 class CandidateStatusHistory(db.Model):
@@ -393,18 +680,42 @@ class CandidateStatusHistory(db.Model):
     )
     from_status = db.Column(db.String(20), nullable=False)
     to_status = db.Column(db.String(20), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=naive_utcnow)
     notes = db.Column(db.Text, nullable=True)
     updated_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"), nullable=True)
 
-    # Define indexes for better query performance
+    # Serves "latest history for candidate X" with an index-only scan
     __table_args__ = (
-        db.Index("idx_candidate_status_history_candidate_id", "candidate_id"),
-        db.Index("idx_candidate_status_history_timestamp", "timestamp"),
+        db.Index(
+            "idx_candidate_status_history_candidate_ts", "candidate_id", db.text("timestamp DESC")
+        ),
     )
 
-    # Define relationships
-    updater = db.relationship("Recruiter", foreign_keys=[updated_by], backref="status_changes")
+    # Define relationships. updater raises on lazy access so list views must
+    # batch-load it (see for_candidate) instead of issuing one query per row.
+    updater = db.relationship(
+        "Recruiter",
+        foreign_keys=[updated_by],
+        backref="status_changes",
+        lazy="raise",
+    )
+
+    @classmethod
+    def for_candidate(cls, candidate_id):
+        """
+        Query a candidate's status history, newest first, with updaters preloaded
+
+        Args:
+            candidate_id: ID of the candidate
+
+        Returns:
+            Query: History entries with the updater relationship selectin-loaded
+        """
+        return (
+            cls.query.options(selectinload(cls.updater))
+            .filter_by(candidate_id=candidate_id)
+            .order_by(cls.timestamp.desc())
+        )
 
     # For backward compatibility with code using the new column names
     @property
@@ -467,18 +778,30 @@ class CandidateProcessingHistory(db.Model):
     )
     from_status = db.Column(db.String(20), nullable=False)
     to_status = db.Column(db.String(20), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=naive_utcnow)
     error_message = db.Column(db.Text)
     duration = db.Column(db.Float, default=0.0)
 
-    # Define indexes for better query performance and set extend_existing=True
-    # to handle duplicate model definitions across modules
+    # Serves "latest history for candidate X" with an index-only scan
     __table_args__ = (
-        db.Index("idx_candidate_processing_history_candidate_id", "candidate_id"),
-        db.Index("idx_candidate_processing_history_timestamp", "timestamp"),
-        {"extend_existing": True},
+        db.Index(
+            "idx_candidate_processing_history_candidate_ts",
+            "candidate_id",
+            db.text("timestamp DESC"),
+        ),
     )
 
+    @classmethod
+    def bulk_add(cls, rows, session=None):
+        """
+        Insert many history rows in one executemany round-trip
+
+        Args:
+            rows: List of column-value dicts
+            session: Session to use (defaults to db.session)
+        """
+        (session or db.session).bulk_insert_mappings(cls, rows)
+
     # Backward compatibility property
     @property
     def old_status(self):
@@ -3,42 +3,18 @@
 Candidate status transition module.
 
 This module defines the candidate processing status states and transitions.
+The CandidateProcessingHistory model itself lives in models.candidate.
 """
 
-from datetime import datetime
+from sqlalchemy import insert
 
 # Use db directly which already provides SQLAlchemy functionality to avoid LSP errors
 from .base import db
-
-
-class CandidateProcessingHistory(db.Model):
-    """
-    Model for tracking candidate processing status history.
-
-    This model records transitions between processing states, including timestamps
-    and error messages if applicable.
-    """
-
-    __tablename__ = "candidate_processing_history"
-
-    id = db.Column(db.Integer, primary_key=True)
-    candidate_id = db.Column(
-        db.Integer, db.ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False
-    )
-    from_status = db.Column(db.String(20), nullable=False)
-    to_status = db.Column(db.String(20), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    error_message = db.Column(db.Text)
-    duration = db.Column(db.Float, default=0.0)  # Processing duration in seconds
-
-    # Set extend_existing=True to handle duplicate model definitions across modules
-    __table_args__ = {"extend_existing": True}
-
-    # Note: The backref approach is used in Candidate model, so we don't define the reverse relationship here
-
-    def __repr__(self):
-        """String representation of a processing history entry"""
-        return f"<Processing History: {self.from_status} -> {self.to_status} at {self.timestamp}>"
+from .candidate import (
+    VALID_STATUS_TRANSITIONS,
+    CandidateProcessingHistory,
+    _buffer_history_row,
+)
 
 
 # Status transition function to be added to the Candidate model
@@ -54,7 +30,7 @@ def add_status_transition_methods(cls):
     Returns:
         The modified class
     """
-    # Define valid status transitions
+    # Valid status transitions, used to list the allowed targets in error messages
     status_transitions = {
         "pending": ["processing"],
         "processing": ["complete", "failed"],
@@ -72,11 +48,7 @@ def add_status_transition_methods(cls):
         Returns:
             bool: True if valid, False otherwise
         """
-        if self.processing_status not in status_transitions:
-            return False
-
-        valid_transitions = status_transitions.get(self.processing_status, [])
-        return new_status in valid_transitions
+        return (self.processing_status, new_status) in VALID_STATUS_TRANSITIONS
 
     def transition_to(self, new_status, error_message=None, updated_by_id=None):
         """
@@ -120,20 +92,36 @@ def add_status_transition_methods(cls):
             to_status: New status
             error_message: Optional error message
             duration: Processing duration in seconds
+
+        Returns:
+            CandidateProcessingHistory: The new entry, or None if buffered in a batch
         """
-        history_entry = CandidateProcessingHistory(
-            candidate_id=self.id,
-            from_status=from_status,
-            to_status=to_status,
-            error_message=error_message,
-            duration=duration,
-        )
-        db.session.add(history_entry)
-
-        # Add to relationship for easy access
-        if hasattr(self, "processing_history"):
+        if self.id is None:
+            # The history row references the candidate's primary key
+            db.session.flush()
+
+        row = {
+            "candidate_id": self.id,
+            "from_status": from_status,
+            "to_status": to_status,
+            "error_message": error_message,
+            "duration": duration,
+        }
+        # Inside batched_status_history() the row is written by one bulk INSERT
+        if _buffer_history_row(row):
+            return None
+
+        # INSERT ... RETURNING hydrates the entry in one round-trip, with its id set
+        history_entry = db.session.scalars(
+            insert(CandidateProcessingHistory).returning(CandidateProcessingHistory), [row]
+        ).one()
+
+        # Keep an already-loaded collection in sync without triggering a lazy load
+        if "processing_history" in self.__dict__:
             self.processing_history.append(history_entry)
 
+        return history_entry
+
     # Add methods to the class
     cls.is_valid_transition = is_valid_transition
     cls.transition_to = transition_to
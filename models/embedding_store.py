@@ -0,0 +1,230 @@
+"""
+Candidate Embedding Store for AI Recruiter Pro
+
+This module materializes candidate embeddings into a memory-mapped float32
+matrix so batch scoring can slice rows out of shared OS pages instead of
+loading and decoding the pgvector column for every candidate.
+
+Files (under EMBEDDING_STORE_PATH), one pair per build:
+    <version>.f32: Row-major (N, EMBEDDING_DIMENSIONS) float32, unit-normalized
+    <version>.ids.npy: Sorted int64 candidate IDs, one per matrix row
+    CURRENT: Name of the version readers should open
+"""
+
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from .base import EMBEDDING_DIMENSIONS, db
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the store; empty disables it
+EMBEDDING_STORE_PATH = os.environ.get("EMBEDDING_STORE_PATH", "")
+
+# Candidates fetched per query while building
+_BUILD_BATCH = 1000
+
+_CURRENT_FILE = "CURRENT"
+
+# Builds kept on disk, current one included. Keeping the previous build lets
+# a reader that read CURRENT just before a swap still open its files.
+_KEEP_VERSIONS = 2
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class EmbeddingStore:
+    """
+    Read-only view over a built store
+
+    Opened with mmap, so every worker process maps the same page cache.
+
+    Attributes:
+        ids (numpy.ndarray): Sorted candidate IDs
+        matrix (numpy.memmap): Unit-normalized embeddings, one row per ID
+        version (str): Build this view was opened from
+    """
+
+    def __init__(self, path, version):
+        self.version = version
+        self.ids = np.load(os.path.join(path, f"{version}.ids.npy"), mmap_mode="r")
+        if not len(self.ids):
+            self.matrix = np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+            return
+        self.matrix = np.memmap(
+            os.path.join(path, f"{version}.f32"),
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self.ids), EMBEDDING_DIMENSIONS),
+        )
+
+    def rows(self, candidate_ids):
+        """
+        Look up the embedding rows for some candidates
+
+        Args:
+            candidate_ids: Iterable of candidate IDs
+
+        Returns:
+            tuple: (found_ids, matrix) where matrix[i] is the unit embedding
+                of found_ids[i]; IDs not in the store are left out
+        """
+        wanted = np.asarray(sorted(set(candidate_ids)), dtype=np.int64)
+        if not len(self.ids) or not len(wanted):
+            return [], np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        positions = np.searchsorted(self.ids, wanted)
+        positions[positions == len(self.ids)] = 0
+        hit = self.ids[positions] == wanted
+        return wanted[hit].tolist(), self.matrix[positions[hit]]
+
+
+def match_topk(job_matrix, candidate_matrix, k, block=256):
+    """
+    Top-k candidate rows for every job row by dot product
+
+    Jobs are scored a block at a time, so memory stays at block x N scores
+    while each block is still one SGEMM; argpartition then picks the top k
+    without a full sort.
+
+    Args:
+        job_matrix (numpy.ndarray): (J, D) float32 unit job embeddings
+        candidate_matrix (numpy.ndarray): (N, D) float32 unit candidate embeddings
+        k (int): Candidates to keep per job
+        block (int): Jobs scored per matrix product
+
+    Returns:
+        tuple: (indices, scores), each (J, min(k, N)), best first per row
+    """
+    k = min(k, len(candidate_matrix))
+    indices = np.empty((len(job_matrix), k), dtype=np.int64)
+    scores = np.empty((len(job_matrix), k), dtype=np.float32)
+    if not k:
+        return indices, scores
+    # A transposed view, not a copy: BLAS reads the row-major (memory-mapped)
+    # matrix as-is, so it is never pulled into RAM in full
+    candidates_t = candidate_matrix.T
+    for start in range(0, len(job_matrix), block):
+        block_scores = job_matrix[start : start + block] @ candidates_t
+        top = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block_scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        indices[start : start + block] = np.take_along_axis(top, order, axis=1)
+        scores[start : start + block] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+
+def build_embedding_store(path=None):
+    """
+    Write every candidate embedding into a new store version, then swap it in
+
+    CURRENT is only repointed once both files are complete, so readers never
+    see a half-written store. The previous build is kept and older ones are
+    removed (processes that still map them keep their pages). Requires an
+    application context.
+
+    Args:
+        path (str, optional): Store directory (defaults to EMBEDDING_STORE_PATH)
+
+    Returns:
+        int: Number of embeddings written
+
+    Raises:
+        ValueError: If no path is given and EMBEDDING_STORE_PATH is not set
+    """
+    from .candidate import Candidate
+
+    path = path or EMBEDDING_STORE_PATH
+    if not path:
+        raise ValueError("No embedding store path: pass path or set EMBEDDING_STORE_PATH")
+    path = os.path.abspath(path)
+    os.makedirs(path, exist_ok=True)
+
+    ids = np.fromiter(
+        db.session.execute(
+            db.select(Candidate.id)
+            .where(Candidate.embedding.is_not(None))
+            .order_by(Candidate.id)
+        ).scalars(),
+        dtype=np.int64,
+    )
+
+    version = f"embeddings-{time.time_ns()}"
+    # Candidates deleted mid-build keep a zero row, which scores 0
+    matrix = np.memmap(
+        os.path.join(path, f"{version}.f32"),
+        dtype=np.float32,
+        mode="w+",
+        shape=(max(len(ids), 1), EMBEDDING_DIMENSIONS),  # mmap can't be empty
+    )
+    for start in range(0, len(ids), _BUILD_BATCH):
+        chunk = ids[start : start + _BUILD_BATCH]
+        rows = db.session.execute(
+            db.select(Candidate.id, Candidate.embedding).where(Candidate.id.in_(chunk.tolist()))
+        )
+        for candidate_id, embedding in rows:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm:
+                matrix[np.searchsorted(ids, candidate_id)] = vector / norm
+    matrix.flush()
+    del matrix
+
+    np.save(os.path.join(path, f"{version}.ids.npy"), ids)
+    current_tmp = os.path.join(path, f"{_CURRENT_FILE}.tmp")
+    with open(current_tmp, "w") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(path, _CURRENT_FILE))
+
+    _remove_old_versions(path)
+    logger.info(f"Built embedding store with {len(ids)} candidates in {path}")
+    return len(ids)
+
+
+def _remove_old_versions(path):
+    """Delete the files of all but the newest _KEEP_VERSIONS builds"""
+    files = {}
+    for name in os.listdir(path):
+        if name.startswith("embeddings-"):
+            files.setdefault(name.split(".", 1)[0], []).append(name)
+    # Version names end in their build time in nanoseconds
+    versions = sorted(files, key=lambda version: int(version.rsplit("-", 1)[1]))
+    for version in versions[:-_KEEP_VERSIONS]:
+        for name in files[version]:
+            try:
+                os.remove(os.path.join(path, name))
+            except FileNotFoundError:
+                pass
+
+
+def get_embedding_store():
+    """
+    Get the shared store, reopening it if it has been rebuilt
+
+    Returns:
+        EmbeddingStore: The open store, or None if disabled or not built yet
+    """
+    global _store
+    if not EMBEDDING_STORE_PATH:
+        return None
+    try:
+        with open(os.path.join(EMBEDDING_STORE_PATH, _CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    store = _store
+    if store is None or store.version != version:
+        with _store_lock:
+            if _store is None or _store.version != version:
+                try:
+                    _store = EmbeddingStore(EMBEDDING_STORE_PATH, version)
+                except FileNotFoundError:
+                    # Superseded and removed since CURRENT was read; keep
+                    # serving the open store until the next call
+                    logger.warning(f"Embedding store version {version} is gone")
+            store = _store
+    return store
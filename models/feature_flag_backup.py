@@ -5,10 +5,142 @@ This module defines models for managing feature flags throughout the application
 Feature flags allow for controlled rollout of new features and A/B testing.
 """
 
-from datetime import datetime
+import hashlib
+import os
+import random
+import threading
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
+from typing import NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import validates
+from xxhash import xxh64_intdigest
 
 # Use db directly which already provides SQLAlchemy functionality
-from .base import db
+from .base import db, naive_utcnow
+
+# Hash used for percentage rollout bucketing: "md5" (default) or "xxh64".
+# Switching algorithms re-buckets users, so xxh64 is opt-in.
+FEATURE_FLAG_HASH = os.environ.get("FEATURE_FLAG_HASH", "md5").lower()
+
+# Maximum number of cached (flag, configuration, user, role) evaluations
+EVALUATION_CACHE_SIZE = 8192
+
+# Per-thread PRNG for anonymous percentage sampling
+_thread_local = threading.local()
+
+
+def _thread_random():
+    """Get this thread's random.Random instance, creating it on first use"""
+    rng = getattr(_thread_local, "rng", None)
+    if rng is None:
+        rng = _thread_local.rng = random.Random()
+    return rng
+
+
+def _parse_iso(value):
+    """Parse an ISO-8601 string into a naive UTC datetime (None if empty)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class _FlagConfig(NamedTuple):
+    """
+    Flag configuration compiled into a flat, slotted and hashable struct
+
+    Built once per configuration value so evaluations read attributes instead
+    of probing the JSON dict, and so it can serve as an LRU cache key.
+    """
+
+    users: frozenset
+    roles: frozenset
+    percentage: float | None
+    start_date: datetime | None
+    end_date: datetime | None
+
+    @classmethod
+    def from_configuration(cls, configuration):
+        """Compile a configuration dict"""
+        configuration = configuration or {}
+        percentage = configuration.get("percentage")
+        return cls(
+            users=frozenset(configuration.get("users", [])),
+            roles=frozenset(configuration.get("roles", [])),
+            percentage=float(percentage or 0) if "percentage" in configuration else None,
+            start_date=_parse_iso(configuration.get("start_date")),
+            end_date=_parse_iso(configuration.get("end_date")),
+        )
+
+    @property
+    def has_window(self):
+        """Whether the flag is time-bounded"""
+        return self.start_date is not None or self.end_date is not None
+
+
+def _evaluate_rules(flag_key_prefix, config, user_id, role):
+    """
+    Evaluate targeting rules for an enabled flag with a non-empty configuration
+
+    Args:
+        flag_key_prefix: Encoded "<flag_key>:" prefix used for bucketing
+        config: Compiled _FlagConfig
+        user_id: The user ID to check
+        role: The user's role to check
+
+    Returns:
+        bool: True if the flag is enabled for this user
+    """
+    # Check user and role targeting
+    if user_id is not None and user_id in config.users:
+        return True
+    if role is not None and role in config.roles:
+        return True
+
+    # Check percentage rollout
+    percentage = config.percentage
+    if percentage is not None:
+        # Deterministic user-based hashing for consistent percentage rollout
+        # Only apply if we have a user_id
+        if user_id is not None:
+            bucket_key = flag_key_prefix + str(user_id).encode()
+            if FEATURE_FLAG_HASH == "xxh64":
+                user_hash = xxh64_intdigest(bucket_key)
+            else:
+                user_hash = int(hashlib.md5(bucket_key).hexdigest(), 16)
+            user_mod = (user_hash % 100) + 1  # 1-100
+            return user_mod <= percentage
+
+        # For system checks without a user, just use the raw percentage
+        return _thread_random().random() * 100 <= percentage
+
+    # Check time-bounded activation
+    if config.has_window:
+        now = naive_utcnow()
+
+        if config.start_date and config.start_date > now:
+            return False
+
+        if config.end_date and config.end_date < now:
+            return False
+
+    # Default to enabled if none of the targeting criteria matched
+    return True
+
+
+@lru_cache(maxsize=EVALUATION_CACHE_SIZE)
+def _evaluate_rules_cached(flag_key_prefix, config, user_id, role):
+    """
+    Cached _evaluate_rules for flags without a time window
+
+    The compiled config is part of the key, so any change to a flag's
+    configuration produces a new cache entry.
+    """
+    return _evaluate_rules(flag_key_prefix, config, user_id, role)
 
 
 class FeatureFlag(db.Model):
@@ -27,9 +159,9 @@ class FeatureFlag(db.Model):
     enabled = db.Column(db.Boolean, default=False, nullable=False)
     description = db.Column(db.Text)
     configuration = db.Column(db.JSON, default={}, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=naive_utcnow, nullable=False)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        db.DateTime, default=naive_utcnow, onupdate=naive_utcnow, nullable=False
     )
     created_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"))
     updated_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"))
@@ -48,6 +180,28 @@ class FeatureFlag(db.Model):
     def __repr__(self):
         return f"<FeatureFlag {self.flag_key} enabled={self.enabled}>"
 
+    @cached_property
+    def _flag_key_prefix(self):
+        """Encoded "<flag_key>:" prefix used for percentage bucketing"""
+        return f"{self.flag_key}:".encode()
+
+    @validates("flag_key")
+    def _invalidate_flag_key_prefix(self, key, value):
+        """Drop the cached bucketing prefix whenever flag_key changes"""
+        self.__dict__.pop("_flag_key_prefix", None)
+        return value
+
+    @cached_property
+    def _config(self):
+        """Configuration compiled once per value into a _FlagConfig"""
+        return _FlagConfig.from_configuration(self.configuration)
+
+    @validates("configuration")
+    def _invalidate_config(self, key, value):
+        """Drop the compiled configuration whenever it is reassigned"""
+        self.__dict__.pop("_config", None)
+        return value
+
     @property
     def is_simple_boolean(self):
         """
@@ -56,7 +210,7 @@ class FeatureFlag(db.Model):
         Returns:
             bool: True if this is a simple on/off flag
         """
-        return not self.configuration or self.configuration == {}
+        return not self.configuration
 
     def is_enabled_for_user(self, user_id=None, role=None):
         """
@@ -72,52 +226,18 @@ class FeatureFlag(db.Model):
         if not self.enabled:
             return False
 
-        # If no configuration, simple boolean check
-        if self.is_simple_boolean:
-            return self.enabled
-
-        # Check user targeting
-        if user_id is not None and "users" in self.configuration:
-            if user_id in self.configuration.get("users", []):
-                return True
+        # Most flags are simple booleans: an empty configuration means enabled
+        if not self.configuration:
+            return True
 
-        # Check role targeting
-        if role is not None and "roles" in self.configuration:
-            if role in self.configuration.get("roles", []):
-                return True
+        config = self._config
 
-        # Check percentage rollout
-        if "percentage" in self.configuration:
-            percentage = float(self.configuration.get("percentage", 0))
+        # Clock-dependent windows and random sampling for anonymous checks
+        # cannot be cached; everything else is a pure function of the inputs
+        if user_id is None or config.has_window:
+            return _evaluate_rules(self._flag_key_prefix, config, user_id, role)
 
-            # Deterministic user-based hashing for consistent percentage rollout
-            # Only apply if we have a user_id
-            if user_id is not None:
-                import hashlib
-
-                user_hash = int(hashlib.md5(f"{self.flag_key}:{user_id}".encode()).hexdigest(), 16)
-                user_mod = (user_hash % 100) + 1  # 1-100
-                return user_mod <= percentage
-
-            # For system checks without a user, just use the raw percentage
-            import random
-
-            return random.random() * 100 <= percentage
-
-        # Check time-bounded activation
-        if "start_date" in self.configuration or "end_date" in self.configuration:
-            now = datetime.utcnow()
-
-            start_date = self.configuration.get("start_date")
-            if start_date and datetime.fromisoformat(start_date.replace("Z", "+00:00")) > now:
-                return False
-
-            end_date = self.configuration.get("end_date")
-            if end_date and datetime.fromisoformat(end_date.replace("Z", "+00:00")) < now:
-                return False
-
-        # Default to the enabled status if none of the targeting criteria matched
-        return self.enabled
+        return _evaluate_rules_cached(self._flag_key_prefix, config, user_id, role)
 
     def to_dict(self):
         """
@@ -140,6 +260,20 @@ class FeatureFlag(db.Model):
         }
 
 
+# Cached values derived from each column, dropped when the column reloads
+_DERIVED_ATTRIBUTES = {"configuration": "_config", "flag_key": "_flag_key_prefix"}
+
+
+@event.listens_for(FeatureFlag, "refresh")
+@event.listens_for(FeatureFlag, "expire")
+def _invalidate_derived_on_reload(target, *args):
+    """Drop cached _config/_flag_key_prefix when their column is expired or reloaded"""
+    attrs = args[-1]
+    for column, cached in _DERIVED_ATTRIBUTES.items():
+        if attrs is None or column in attrs:
+            target.__dict__.pop(cached, None)
+
+
 class FeatureFlagStats(db.Model):
     """
     Feature Flag Statistics Model
@@ -156,7 +290,7 @@ class FeatureFlagStats(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     flag_key = db.Column(db.String(100), db.ForeignKey("feature_flags.flag_key"), nullable=False)
-    date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    date = db.Column(db.DateTime, default=naive_utcnow, nullable=False)
     evaluations = db.Column(db.Integer, default=0, nullable=False)
     successful_evaluations = db.Column(db.Integer, default=0, nullable=False)
 
@@ -5,9 +5,88 @@ This module combines and harmonizes all feature flag-related models into a singl
 It replaces both feature_flag.py and feature_flags.py to avoid duplicate model definitions.
 """
 
-from datetime import datetime
+import hashlib
+import logging
+import os
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
 
-from .base import db
+import mmh3
+from cachetools import TTLCache
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import contains_eager, object_session, reconstructor, selectinload, validates
+
+from .base import ARRAY, JSONB, call_after_commit, db, naive_utcnow
+
+logger = logging.getLogger(__name__)
+
+# Hash used for percentage rollout bucketing: "md5" (default) or "murmur3".
+# Switching algorithms re-buckets users, so only opt into murmur3 for
+# deployments without live percentage rollouts.
+FEATURE_FLAG_HASH = os.environ.get("FEATURE_FLAG_HASH", "md5").lower()
+
+# Short-lived cache of per-user evaluation results
+EVAL_CACHE_ENABLED = os.environ.get("EVAL_CACHE_ENABLED", "true").lower() == "true"
+EVAL_CACHE_TTL_MS = int(os.environ.get("EVAL_CACHE_TTL_MS", "3000"))
+EVAL_CACHE_MAX_ITEMS = int(os.environ.get("EVAL_CACHE_MAX_ITEMS", "50000"))
+
+_eval_cache = TTLCache(maxsize=EVAL_CACHE_MAX_ITEMS, ttl=EVAL_CACHE_TTL_MS / 1000)
+_eval_cache_lock = threading.Lock()
+
+# flag_key -> answer for flags that do not depend on the user (disabled, or
+# enabled without configuration), see UnifiedFeatureFlag.check. Writes in this
+# process evict their key on commit; the TTL bounds how long other workers
+# keep serving a value changed elsewhere.
+BOOL_CACHE_TTL_MS = int(os.environ.get("FEATURE_FLAG_BOOL_CACHE_TTL_MS", "3000"))
+
+_bool_cache = TTLCache(maxsize=4096, ttl=BOOL_CACHE_TTL_MS / 1000)
+_bool_cache_lock = threading.Lock()
+
+# Evaluation stats are buffered and written in batches, see
+# UnifiedFeatureFlagStat.record and flush_feature_flag_stats
+STAT_BATCH_SIZE = int(os.environ.get("FEATURE_FLAG_STAT_BATCH_SIZE", "1024"))
+STAT_FLUSH_INTERVAL_MS = int(os.environ.get("FEATURE_FLAG_STAT_INTERVAL_MS", "1000"))
+
+_stat_buffer = deque()
+_stat_buffer_lock = threading.Lock()
+
+
+def _rollout_bucket(flag_key, user_id):
+    """
+    Map a user to a stable 1-100 rollout bucket for a flag
+
+    Args:
+        flag_key: The flag being evaluated
+        user_id: The user ID to bucket
+
+    Returns:
+        int: Bucket number between 1 and 100
+    """
+    bucket_key = f"{flag_key}:{user_id}"
+    if FEATURE_FLAG_HASH == "murmur3":
+        user_hash = mmh3.hash(bucket_key, signed=False)
+    else:
+        user_hash = int(hashlib.md5(bucket_key.encode()).hexdigest(), 16)
+    return (user_hash % 100) + 1
+
+
+# Bits of UnifiedFeatureFlag._cfg_flags marking which targeting rules are set
+_CFG_USERS = 1
+_CFG_ROLES = 2
+_CFG_PERCENTAGE = 4
+_CFG_WINDOW = 8
+
+
+def _parse_iso(value):
+    """Parse an ISO-8601 string into a naive UTC datetime (None if empty)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
 
 # Primary Feature Flag model
@@ -26,19 +105,27 @@ class UnifiedFeatureFlag(db.Model):
         configuration (dict): JSON configuration for targeting, percentage rollout, etc.
         created_at (datetime): When the flag was created
         updated_at (datetime): When the flag was last updated
+
+    overrides and stats load lazily. When walking many flags, use
+    query_with_overrides() or query_with_stats() rather than touching the
+    relationships in a loop.
     """
 
     __tablename__ = "feature_flags"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # Containment lookups on group_ids (group_ids @> ARRAY[:gid])
+        db.Index("ix_feature_flags_group_ids_gin", "group_ids", postgresql_using="gin"),
+        {"extend_existing": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     flag_key = db.Column(db.String(100), unique=True, nullable=False, index=True)
     enabled = db.Column(db.Boolean, default=False, nullable=False)
     description = db.Column(db.Text)
     configuration = db.Column(db.JSON, default={}, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=naive_utcnow, nullable=False)
     updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        db.DateTime, default=naive_utcnow, onupdate=naive_utcnow, nullable=False
     )
     created_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"))
     updated_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"))
@@ -46,8 +133,8 @@ class UnifiedFeatureFlag(db.Model):
     # Backwards compatibility fields from the other model
     key = db.Column(db.String(100))  # Maps to flag_key
     flag_type = db.Column(db.String(20), default="boolean")
-    value = db.Column(db.Text)  # Stores JSON string version of configuration
-    group_ids = db.Column(db.Text)  # For user_group type flags
+    value = db.Column(JSONB)  # Legacy copy of configuration, prefer configuration
+    group_ids = db.Column(ARRAY(db.Integer))  # For user_group type flags
 
     # Relationships
     creator = db.relationship("Recruiter", foreign_keys=[created_by], lazy=True)
@@ -55,7 +142,7 @@ class UnifiedFeatureFlag(db.Model):
     overrides = db.relationship(
         "UnifiedFeatureFlagOverride",
         backref=db.backref("feature_flag", lazy=True),
-        lazy=True,
+        lazy="select",
         cascade="all, delete-orphan",
     )
     stats = db.relationship(
@@ -63,13 +150,141 @@ class UnifiedFeatureFlag(db.Model):
         foreign_keys="UnifiedFeatureFlagStat.flag_id",
         primaryjoin="UnifiedFeatureFlag.id==UnifiedFeatureFlagStat.flag_id",
         backref="flag",
-        lazy=True,
+        lazy="select",
         cascade="all, delete-orphan",
     )
 
+    # Targeting rules parsed out of configuration, see _compile_configuration
+    _cfg_flags = 0
+    _users = frozenset()
+    _roles = frozenset()
+    _pct = 0.0
+    _start_dt = None
+    _end_dt = None
+
     def __repr__(self):
         return f"<FeatureFlag {self.flag_key} enabled={self.enabled}>"
 
+    @classmethod
+    def query_with_overrides(cls):
+        """
+        Query flags with their overrides loaded in one extra SELECT
+
+        Returns:
+            Query: Flags with overrides eagerly loaded
+        """
+        return db.session.query(cls).options(selectinload(cls.overrides))
+
+    @classmethod
+    def query_with_stats(cls, cutoff):
+        """
+        Query flags with their stats since a cutoff loaded in the same query
+
+        Flags with no stats after the cutoff are not returned, and each
+        flag's stats collection contains only the filtered rows.
+
+        Args:
+            cutoff (datetime): Only include stats created after this time
+
+        Returns:
+            Query: Flags joined to and populated with their recent stats
+        """
+        return (
+            db.session.query(cls)
+            .join(cls.stats)
+            .filter(UnifiedFeatureFlagStat.created_at > cutoff)
+            .options(contains_eager(cls.stats))
+        )
+
+    @classmethod
+    def query_for_group(cls, group_id):
+        """
+        Query user_group flags that include a group
+
+        Args:
+            group_id (int): The user group ID
+
+        Returns:
+            Query: Flags whose group_ids contain the group (uses the GIN index)
+        """
+        return cls.query.filter(cls.group_ids.contains([group_id]))
+
+    @classmethod
+    def check(cls, flag_key, user_id=None, role=None):
+        """
+        Check a flag by key, skipping the database for simple booleans
+
+        Answers for disabled and unconfigured flags are cached for
+        BOOL_CACHE_TTL_MS; everything else is evaluated from the row.
+
+        Args:
+            flag_key: The flag to check
+            user_id: The user ID to check
+            role: The user's role to check
+
+        Returns:
+            bool: True if the flag is enabled for this user
+        """
+        with _bool_cache_lock:
+            enabled = _bool_cache.get(flag_key)
+        if enabled is not None:
+            return enabled
+
+        flag = cls.query.filter_by(flag_key=flag_key).first()
+        if flag is None:
+            return False
+        if not flag.enabled or not flag.configuration:
+            with _bool_cache_lock:
+                _bool_cache[flag_key] = bool(flag.enabled)
+        return flag.is_enabled_for_user(user_id, role)
+
+    @reconstructor
+    def _init_on_load(self):
+        """Compile the loaded configuration once per instance"""
+        self._compile_configuration(self.configuration)
+
+    @validates("configuration")
+    def _validate_configuration(self, key, value):
+        """Recompile targeting rules whenever configuration is reassigned"""
+        self._compile_configuration(value)
+        return value
+
+    def _compile_configuration(self, configuration):
+        """
+        Pre-parse targeting rules so evaluation does no string parsing
+
+        Args:
+            configuration: The flag's configuration dict
+        """
+        configuration = configuration or {}
+        self._users = frozenset(configuration.get("users", []))
+        self._roles = frozenset(configuration.get("roles", []))
+        self._pct = float(configuration.get("percentage") or 0)
+        self._start_dt = _parse_iso(configuration.get("start_date"))
+        self._end_dt = _parse_iso(configuration.get("end_date"))
+
+        cfg_flags = 0
+        if self._users:
+            cfg_flags |= _CFG_USERS
+        if self._roles:
+            cfg_flags |= _CFG_ROLES
+        if "percentage" in configuration:
+            cfg_flags |= _CFG_PERCENTAGE
+        if self._start_dt is not None or self._end_dt is not None:
+            cfg_flags |= _CFG_WINDOW
+        self._cfg_flags = cfg_flags
+
+    def _compiled_flags(self):
+        """
+        The _CFG_* bitmask of targeting rules, recompiling if stale
+
+        _cfg_flags is None once configuration has been expired; reading
+        configuration reloads the row and the rules are compiled again.
+        """
+        if self._cfg_flags is None:
+            self._compile_configuration(self.configuration)
+        return self._cfg_flags
+
     @property
     def is_simple_boolean(self):
         """
@@ -80,66 +295,80 @@ class UnifiedFeatureFlag(db.Model):
         """
         return not self.configuration or self.configuration == {}
 
-    def is_enabled_for_user(self, user_id=None, role=None):
+    def is_enabled_for_user(self, user_id=None, role=None, now=None):
         """
         Check if flag is enabled for a specific user/role
 
         Args:
             user_id: The user ID to check
             role: The user's role to check
+            now: Naive UTC time for time-bounded flags, defaults to naive_utcnow()
 
         Returns:
             bool: True if the flag is enabled for this user
         """
+        # Anonymous percentage checks are sampled randomly, unsaved flags have
+        # no version to key on, and time-window results depend on the clock,
+        # so none of them go through the cache
+        if (
+            not EVAL_CACHE_ENABLED
+            or user_id is None
+            or now is not None
+            or self.updated_at is None
+            or self._compiled_flags() & _CFG_WINDOW
+        ):
+            return self._evaluate(user_id, role, now)
+
+        # updated_at changes on every write, so edits invalidate old entries
+        cache_key = (self.flag_key, self.updated_at, self.enabled, user_id, role)
+        with _eval_cache_lock:
+            result = _eval_cache.get(cache_key)
+        if result is None:
+            result = self._evaluate(user_id, role, now)
+            with _eval_cache_lock:
+                _eval_cache[cache_key] = result
+        return result
+
+    def _evaluate(self, user_id, role, now=None):
+        """Evaluate the flag's targeting rules without caching"""
         if not self.enabled:
             return False
 
-        # If no configuration, simple boolean check
-        if self.is_simple_boolean:
-            return self.enabled
+        # No targeting rules: simple boolean check
+        cfg_flags = self._compiled_flags()
+        if not cfg_flags:
+            return True
 
         # Check user targeting
-        if user_id is not None and "users" in self.configuration:
-            if user_id in self.configuration.get("users", []):
-                return True
+        if cfg_flags & _CFG_USERS and user_id is not None and user_id in self._users:
+            return True
 
         # Check role targeting
-        if role is not None and "roles" in self.configuration:
-            if role in self.configuration.get("roles", []):
-                return True
+        if cfg_flags & _CFG_ROLES and role is not None and role in self._roles:
+            return True
 
         # Check percentage rollout
-        if "percentage" in self.configuration:
-            percentage = float(self.configuration.get("percentage", 0))
-
+        if cfg_flags & _CFG_PERCENTAGE:
             # Deterministic user-based hashing for consistent percentage rollout
             # Only apply if we have a user_id
             if user_id is not None:
-                import hashlib
-
-                user_hash = int(hashlib.md5(f"{self.flag_key}:{user_id}".encode()).hexdigest(), 16)
-                user_mod = (user_hash % 100) + 1  # 1-100
-                return user_mod <= percentage
+                return _rollout_bucket(self.flag_key, user_id) <= self._pct
 
             # For system checks without a user, just use the raw percentage
-            import random
-
-            return random.random() * 100 <= percentage
+            return random.random() * 100 <= self._pct
 
         # Check time-bounded activation
-        if "start_date" in self.configuration or "end_date" in self.configuration:
-            now = datetime.utcnow()
+        if cfg_flags & _CFG_WINDOW:
+            now = now or naive_utcnow()
 
-            start_date = self.configuration.get("start_date")
-            if start_date and datetime.fromisoformat(start_date.replace("Z", "+00:00")) > now:
+            if self._start_dt is not None and self._start_dt > now:
                 return False
 
-            end_date = self.configuration.get("end_date")
-            if end_date and datetime.fromisoformat(end_date.replace("Z", "+00:00")) < now:
+            if self._end_dt is not None and self._end_dt < now:
                 return False
 
-        # Default to the enabled status if none of the targeting criteria matched
-        return self.enabled
+        # Default to enabled if none of the targeting criteria matched
+        return True
 
     def to_dict(self):
         """
@@ -162,6 +391,35 @@ class UnifiedFeatureFlag(db.Model):
         }
 
 
+@event.listens_for(UnifiedFeatureFlag, "refresh")
+def _recompile_on_refresh(target, context, attrs):
+    """Recompile targeting rules when session.refresh or an expired load reloads configuration"""
+    if attrs is None or "configuration" in attrs:
+        target._compile_configuration(target.configuration)
+
+
+@event.listens_for(UnifiedFeatureFlag, "expire")
+def _invalidate_on_expire(target, attrs):
+    """Mark compiled rules stale until the expired configuration is reloaded"""
+    if attrs is None or "configuration" in attrs:
+        target._cfg_flags = None
+
+
+@event.listens_for(UnifiedFeatureFlag, "after_insert")
+@event.listens_for(UnifiedFeatureFlag, "after_update")
+@event.listens_for(UnifiedFeatureFlag, "after_delete")
+def _evict_bool_cache(mapper, connection, target):
+    """Drop a written flag's keys from _bool_cache once the write commits"""
+    keys = {target.flag_key, *inspect(target).attrs.flag_key.history.deleted}
+
+    def evict():
+        with _bool_cache_lock:
+            for key in keys:
+                _bool_cache.pop(key, None)
+
+    call_after_commit(object_session(target), evict)
+
+
 class UnifiedFeatureFlagOverride(db.Model):
     """
     Feature Flag Override Model (Unified)
@@ -183,8 +441,8 @@ class UnifiedFeatureFlagOverride(db.Model):
         db.Integer, db.ForeignKey("recruiters.id", ondelete="CASCADE"), nullable=False
     )
     enabled = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
+    updated_at = db.Column(db.DateTime, default=naive_utcnow, onupdate=naive_utcnow)
 
     # Relationship to User (Recruiter)
     user = db.relationship("Recruiter", backref=db.backref("feature_flag_overrides", lazy=True))
@@ -203,7 +461,8 @@ class UnifiedFeatureFlagStat(db.Model):
 
     __tablename__ = "feature_flag_stats"
     __table_args__ = (
-        db.Index("idx_feature_flag_stat_flag_id", "flag_id"),
+        # Per-flag time-range queries; also serves flag_id-only lookups
+        db.Index("idx_ffstat_flag_created", "flag_id", "created_at"),
         db.Index("idx_feature_flag_stat_user_id", "user_id"),
         db.Index("idx_feature_flag_stat_created_at", "created_at"),
         {"extend_existing": True},
@@ -215,7 +474,7 @@ class UnifiedFeatureFlagStat(db.Model):
     )
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     value = db.Column(db.Boolean, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
 
     # Relationship to User model
     user = db.relationship("User", backref=db.backref("feature_flag_stats", lazy=True))
@@ -225,6 +484,31 @@ class UnifiedFeatureFlagStat(db.Model):
             f"<FeatureFlagStat {self.flag_id} for user {self.user_id or 'anonymous'}: {self.value}>"
         )
 
+    @classmethod
+    def record(cls, flag_id, value, user_id=None):
+        """
+        Buffer a flag evaluation for the next batched insert
+
+        The buffer is flushed once it reaches STAT_BATCH_SIZE rows, and
+        periodically by the flusher started in the app factory.
+
+        Args:
+            flag_id: ID of the evaluated flag
+            value: Result of the evaluation
+            user_id: The user the flag was evaluated for, if any
+        """
+        row = {
+            "flag_id": flag_id,
+            "user_id": user_id,
+            "value": bool(value),
+            "created_at": naive_utcnow(),
+        }
+        with _stat_buffer_lock:
+            _stat_buffer.append(row)
+            full = len(_stat_buffer) >= STAT_BATCH_SIZE
+        if full:
+            flush_feature_flag_stats()
+
     def to_dict(self):
         """
         Convert stats to dictionary for API responses
@@ -250,6 +534,32 @@ class UnifiedFeatureFlagStat(db.Model):
         }
 
 
+def flush_feature_flag_stats():
+    """
+    Write all buffered flag evaluation stats in a single executemany INSERT
+
+    Runs on its own connection and transaction so it never commits the
+    caller's session. Stats are best-effort: a failed batch is logged and
+    dropped. Requires an application context.
+
+    Returns:
+        int: Number of rows written
+    """
+    with _stat_buffer_lock:
+        batch = list(_stat_buffer)
+        _stat_buffer.clear()
+    if not batch:
+        return 0
+
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(insert(UnifiedFeatureFlagStat.__table__), batch)
+    except Exception as e:
+        logger.error(f"Dropped {len(batch)} feature flag stats: {e}")
+        return 0
+    return len(batch)
+
+
 # Create compatibility aliases for backwards compatibility
 FeatureFlag = UnifiedFeatureFlag
 FeatureFlagOverride = UnifiedFeatureFlagOverride
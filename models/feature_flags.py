@@ -5,10 +5,18 @@ IMPORTANT: This module is DEPRECATED. Import from feature_flag_unified.py instea
 This module now simply imports from the unified model to avoid duplicate definitions.
 """
 
+import warnings
+
 # Re-export the unified models with their original names for backwards compatibility
 from .feature_flag_unified import UnifiedFeatureFlag as FeatureFlag
 from .feature_flag_unified import UnifiedFeatureFlagOverride as FeatureFlagOverride
 from .feature_flag_unified import UnifiedFeatureFlagStat as FeatureFlagStat
 
+warnings.warn(
+    "models.feature_flags is deprecated, import from models.feature_flag_unified instead",
+    DeprecationWarning,
+    stacklevel=2,
+)
+
 # Preserve top-level imports to avoid breaking code that imports from here
 __all__ = ["FeatureFlag", "FeatureFlagOverride", "FeatureFlagStat"]
@@ -5,13 +5,16 @@ This module contains the database model for recruiter invitations.
 """
 
 import logging
-from datetime import datetime
+import secrets
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, LargeBinary, String, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 from extensions import db
 
+from .base import naive_utcnow
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
@@ -34,12 +37,12 @@ class Invitation(db.Model):
 
     # Invitation details
     email = Column(String(120), nullable=False, index=True)
-    token = Column(String(64), nullable=False, unique=True, index=True)
+    token = Column(LargeBinary(32), nullable=False, unique=True, index=True)  # raw random bytes
     role = Column(String(50), nullable=False, default="recruiter")
     role_id = Column(Integer, ForeignKey("roles.id", ondelete="SET NULL"), nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=naive_utcnow)
     expires_at = Column(DateTime, nullable=False)
     used = Column(Boolean, default=False)
     used_at = Column(DateTime, nullable=True)
@@ -59,16 +62,53 @@ class Invitation(db.Model):
         """String representation of invitation"""
         return f"<Invitation {self.id} for {self.email} (role: {self.role})>"
 
-    def is_expired(self):
-        """Check if invitation has expired"""
-        return datetime.utcnow() > self.expires_at
+    @staticmethod
+    def generate_token():
+        """Generate a new 32-byte invitation token"""
+        return secrets.token_bytes(32)
+
+    @hybrid_property
+    def token_hex(self):
+        """Hex form of the token, as used in join URLs"""
+        return self.token.hex() if self.token is not None else None
+
+    @token_hex.setter
+    def token_hex(self, value):
+        self.token = bytes.fromhex(value)
+
+    @token_hex.expression
+    def token_hex(cls):
+        return func.encode(cls.token, "hex")
+
+    @classmethod
+    def find_by_token(cls, token_hex):
+        """
+        Look up an invitation by the hex token from a join URL
+
+        Decodes to bytes first so the lookup uses the unique token index.
+
+        Args:
+            token_hex (str): Hex-encoded token
+
+        Returns:
+            Invitation: The matching invitation, or None
+        """
+        try:
+            token = bytes.fromhex(token_hex)
+        except (TypeError, ValueError):
+            return None
+        return cls.query.filter_by(token=token).first()
+
+    def is_expired(self, now=None):
+        """Check if invitation has expired (optionally as of a given naive UTC time)"""
+        return (now or naive_utcnow()) > self.expires_at
 
     def to_dict(self):
         """Convert invitation to dictionary for API responses"""
         return {
             "id": self.id,
             "email": self.email,
-            "token": self.token,
+            "token": self.token_hex,
             "role": self.role,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "expires_at": self.expires_at.isoformat() if self.expires_at else None,
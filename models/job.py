@@ -5,11 +5,45 @@ This module defines job-related models for storing job postings,
 company information, and departments.
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
+from functools import cached_property
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import object_session, validates
+
+from .base import (
+    EMBEDDING_DIMENSIONS,
+    Vector,
+    as_halfvec,
+    call_after_commit,
+    db,
+    halfvec_cosine_index,
+    naive_utcnow,
+)
+from .match import _invalidate_similarity_cache
+
+
+def _parse_salary_cents(salary_range, index):
+    """
+    Parse one bound of a "$50,000 - $70,000" style range into cents
 
-from sqlalchemy.dialects.postgresql import JSONB
+    Args:
+        salary_range: The salary range string
+        index: 0 for the lower bound, 1 for the upper bound
 
-from .base import db
+    Returns:
+        int: The bound in cents, or None if missing or unparseable
+    """
+    if not salary_range:
+        return None
+    parts = salary_range.split("-")
+    if len(parts) <= index:
+        return None
+    try:
+        return int(parts[index].strip().replace("$", "").replace(",", "")) * 100
+    except ValueError:
+        return None
 
 
 class Department(db.Model):
@@ -30,10 +64,22 @@ class Department(db.Model):
 
     # Relationships
     jobs = db.relationship("Job", backref="department", lazy="dynamic")
+    # Loadable collection of the same jobs (works with selectinload); read-only,
+    # so add and remove jobs through jobs
+    job_list = db.relationship("Job", lazy="select", viewonly=True)
 
     def __repr__(self):
         return f"<Department {self.name}>"
 
+    def active_jobs_query(self):
+        """
+        Query this department's active jobs without loading the collection
+
+        Returns:
+            Query: Filterable/pageable query of active jobs
+        """
+        return Job.query.with_parent(self, Department.jobs).filter(Job.status == "active")
+
 
 class Company(db.Model):
     """
@@ -59,10 +105,22 @@ class Company(db.Model):
 
     # Relationships
     jobs = db.relationship("Job", backref="company_obj", lazy="dynamic")
+    # Loadable collection of the same jobs (works with selectinload); read-only,
+    # so add and remove jobs through jobs
+    job_list = db.relationship("Job", lazy="select", viewonly=True)
 
     def __repr__(self):
         return f"<Company {self.name}>"
 
+    def active_jobs_query(self):
+        """
+        Query this company's active jobs without loading the collection
+
+        Returns:
+            Query: Filterable/pageable query of active jobs
+        """
+        return Job.query.with_parent(self, Company.jobs).filter(Job.status == "active")
+
 
 class Job(db.Model):
     """
@@ -70,12 +128,13 @@ class Job(db.Model):
 
     Attributes:
         id (int): Primary key
-        user_id (int): Foreign key to user who created the job
+        recruiter_id (int): Foreign key to the recruiter who created the job
+        user_id (int): Legacy alias of recruiter_id
         title (str): Job title
         description (str): Job description
         requirements (str): Job requirements
         desired_skills (str): Desired skills for the job
-        skills_array (list): Array of skills for easier searching
+        skills_array (tuple): Array of skills for easier searching
         location (str): Job location
         salary_min (int): Minimum salary
         salary_max (int): Maximum salary
@@ -93,31 +152,35 @@ class Job(db.Model):
     """
 
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Approximate nearest-neighbour index for cosine-distance search
+        halfvec_cosine_index("ix_jobs_embedding_hnsw", "embedding"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(
-        db.Integer, db.ForeignKey("recruiters.id", ondelete="SET NULL"), nullable=True
-    )  # Legacy field
     recruiter_id = db.Column(
         db.Integer, db.ForeignKey("recruiters.id", ondelete="SET NULL"), nullable=True
-    )  # Current field
+    )
 
-    # Add compatibility property to handle legacy code
-    @property
-    def user(self):
-        """Legacy property to maintain compatibility with older code."""
-        from models import Recruiter
+    # Legacy name for recruiter_id, usable in both Python and SQL expressions
+    @hybrid_property
+    def user_id(self):
+        return self.recruiter_id
 
-        return Recruiter.query.get(self.recruiter_id) if self.recruiter_id else None
+    @user_id.setter
+    def user_id(self, value):
+        self.recruiter_id = value
 
-    # Make sure both user_id and recruiter_id stay in sync
-    @staticmethod
-    def before_save(mapper, connection, target):
-        """Sync user_id and recruiter_id before saving to database"""
-        if target.user_id is not None and target.recruiter_id is None:
-            target.recruiter_id = target.user_id
-        elif target.recruiter_id is not None and target.user_id is None:
-            target.user_id = target.recruiter_id
+    @user_id.expression
+    def user_id(cls):
+        return cls.recruiter_id
+
+    # Legacy alias of the Recruiter.jobs "recruiter" backref; read-only so the
+    # two relationships never fight over recruiter_id. Load it in bulk with
+    # options(selectinload(Job.user)) when iterating many jobs.
+    user = db.relationship(
+        "Recruiter", foreign_keys=[recruiter_id], lazy="select", viewonly=True
+    )
 
     # Job details
     title = db.Column(db.String(120), nullable=False)
@@ -127,22 +190,30 @@ class Job(db.Model):
     education = db.Column(db.String(120))
     job_type = db.Column(db.String(20), default="full-time")
     salary_range = db.Column(db.String(120))  # stored as a range string
+    salary_min_cents = db.Column(db.Integer, index=True)  # parsed from salary_range
+    salary_max_cents = db.Column(db.Integer, index=True)  # parsed from salary_range
     company = db.Column(db.String(120))
     required_skills = db.Column(db.Text)  # instead of requirements
     preferred_skills = db.Column(db.Text)  # instead of desired_skills
-    embedding = db.Column(JSONB)
+    embedding = db.Column(Vector(EMBEDDING_DIMENSIONS))
 
     # Computed property for backwards compatibility with skills_array
-    @property
+    @cached_property
     def skills_array(self):
         """Legacy property to maintain compatibility with older code."""
         if self.required_skills:
-            return [skill.strip() for skill in self.required_skills.split(",")]
-        return []
+            return tuple(skill.strip() for skill in self.required_skills.split(","))
+        return ()
+
+    @validates("required_skills")
+    def _invalidate_skills_array(self, key, value):
+        """Drop the cached skills_array whenever required_skills changes"""
+        self.__dict__.pop("skills_array", None)
+        return value
 
     # Metadata
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(days=60))
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
+    expires_at = db.Column(db.DateTime, default=lambda: naive_utcnow() + timedelta(days=60))
     status = db.Column(db.String(20), default="active")  # active, closed, draft, expired
     notification_sent = db.Column(
         db.Boolean, default=False
@@ -163,29 +234,28 @@ class Job(db.Model):
     def is_remote(self):
         return "remote" in self.location.lower() if self.location else False
 
+    @validates("salary_range")
+    def _parse_salary_range(self, key, value):
+        """Keep the salary bound columns in sync with salary_range"""
+        self.salary_min_cents = _parse_salary_cents(value, 0)
+        self.salary_max_cents = _parse_salary_cents(value, 1)
+        return value
+
     @property
     def salary_min(self):
-        if not self.salary_range:
-            return None
-        parts = self.salary_range.split("-")
-        if len(parts) >= 1:
-            try:
-                return int(parts[0].strip().replace("$", "").replace(",", ""))
-            except:
-                return None
-        return None
+        cents = self.salary_min_cents
+        if cents is None and self.salary_range:
+            # Rows written before the cents columns existed
+            cents = _parse_salary_cents(self.salary_range, 0)
+        return cents // 100 if cents is not None else None
 
     @property
     def salary_max(self):
-        if not self.salary_range:
-            return None
-        parts = self.salary_range.split("-")
-        if len(parts) >= 2:
-            try:
-                return int(parts[1].strip().replace("$", "").replace(",", ""))
-            except:
-                return None
-        return None
+        cents = self.salary_max_cents
+        if cents is None and self.salary_range:
+            # Rows written before the cents columns existed
+            cents = _parse_salary_cents(self.salary_range, 1)
+        return cents // 100 if cents is not None else None
 
     @property
     def experience_level(self):
@@ -215,33 +285,75 @@ class Job(db.Model):
     # Vector embedding for semantic search is already defined above at line 121
     # Removing duplicate definition
 
-    def is_expired(self):
+    def is_expired(self, now=None):
         """
         Check if the job is expired
 
+        Args:
+            now (datetime, optional): Naive UTC time to compare against,
+                defaults to naive_utcnow()
+
         Returns:
             bool: True if expired, False otherwise
         """
         if not self.expires_at:
             return False
-        return datetime.utcnow() > self.expires_at
+        return (now or naive_utcnow()) > self.expires_at
 
-    def days_until_expiry(self):
+    def days_until_expiry(self, now=None):
         """
         Calculate days until expiry
 
+        Args:
+            now (datetime, optional): Naive UTC time to compare against,
+                defaults to naive_utcnow()
+
         Returns:
             int: Days until expiry, or 0 if already expired
         """
         if not self.expires_at:
             return 0
 
-        if self.is_expired():
+        now = now or naive_utcnow()
+        if self.is_expired(now):
             return 0
 
-        delta = self.expires_at - datetime.utcnow()
+        delta = self.expires_at - now
         return max(0, delta.days)
 
+    @classmethod
+    def nearest_to(cls, embedding, limit=20):
+        """
+        Query the jobs closest to an embedding by cosine distance
+
+        The ordering runs inside Postgres using the half-precision HNSW index.
+
+        Args:
+            embedding: Query vector
+            limit: Maximum number of jobs to return
+
+        Returns:
+            Query: Jobs ordered from most to least similar
+        """
+        distance = as_halfvec(cls.embedding).cosine_distance(as_halfvec(embedding))
+        return cls.query.order_by(distance).limit(limit)
+
+    @classmethod
+    def bulk_add(cls, rows, session=None):
+        """
+        Insert many job rows in one executemany round-trip
+
+        Rows may use the legacy user_id key; it is mapped onto recruiter_id,
+        and the salary cents columns are derived from salary_range, in a
+        single pass since bulk mappings bypass the hybrid property and
+        validators.
+
+        Args:
+            rows: List of column-value dicts
+            session: Session to use (defaults to db.session)
+        """
+        (session or db.session).bulk_insert_mappings(cls, _normalize_rows(rows))
+
     def renew(self, days=60):
         """
         Renew the job for a specified number of days
@@ -249,8 +361,9 @@ class Job(db.Model):
         Args:
             days (int): Number of days to extend the expiry by
         """
-        if not self.expires_at or self.is_expired():
-            self.expires_at = datetime.utcnow() + timedelta(days=days)
+        now = naive_utcnow()
+        if not self.expires_at or self.is_expired(now):
+            self.expires_at = now + timedelta(days=days)
         else:
             self.expires_at = self.expires_at + timedelta(days=days)
 
@@ -261,6 +374,40 @@ class Job(db.Model):
         Returns:
             dict: Dictionary representation of job
         """
+        return self._serialize(naive_utcnow())
+
+    @classmethod
+    def to_dict_many(cls, jobs):
+        """
+        Convert a list of jobs to dictionaries in one pass
+
+        Uses a single timestamp for every job's expiry fields instead of
+        reading the clock per job.
+
+        Args:
+            jobs: Iterable of Job instances
+
+        Returns:
+            list: Dictionary representations of the jobs
+        """
+        now = naive_utcnow()
+        return [job._serialize(now) for job in jobs]
+
+    def _serialize(self, now):
+        """
+        Build the API dictionary, reading the clock-dependent fields at now
+
+        Args:
+            now (datetime): Naive UTC time used for the expiry fields
+
+        Returns:
+            dict: Dictionary representation of job
+        """
+        created_at = self.created_at
+        updated_at = self.updated_at
+        expires_at = self.expires_at
+        notification_date = self.expiration_notification_date
+        last_renewed_at = self.last_renewed_at
         return {
             "id": self.id,
             "title": self.title,
@@ -276,28 +423,21 @@ class Job(db.Model):
             "experience_level": self.experience_level,
             "experience": self.experience,
             "education": self.education,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": (
-                self.updated_at.isoformat()
-                if hasattr(self, "updated_at") and self.updated_at
-                else None
-            ),
-            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "created_at": created_at.isoformat() if created_at else None,
+            "updated_at": updated_at.isoformat() if updated_at else None,
+            "expires_at": expires_at.isoformat() if expires_at else None,
             "is_active": self.is_active,
             "is_remote": self.is_remote,
             "status": self.status,
             "notification_sent": self.notification_sent,
             "expiration_notification_date": (
-                self.expiration_notification_date.isoformat()
-                if hasattr(self, "expiration_notification_date")
-                and self.expiration_notification_date
-                else None
+                notification_date.isoformat() if notification_date else None
             ),
             "company": self.company,
-            "days_until_expiry": self.days_until_expiry(),
-            "is_expired": self.is_expired(),
+            "days_until_expiry": self.days_until_expiry(now),
+            "is_expired": self.is_expired(now),
             "recruiter_id": self.recruiter_id,
-            "last_renewed_at": self.last_renewed_at.isoformat() if self.last_renewed_at else None,
+            "last_renewed_at": last_renewed_at.isoformat() if last_renewed_at else None,
             "token_id": self.token_id,
         }
 
@@ -305,8 +445,46 @@ class Job(db.Model):
         return f"<Job {self.title} ({self.id})>"
 
 
-# Register the pre-save event listener to sync user_id and recruiter_id fields
-from sqlalchemy import event
+@event.listens_for(Job, "refresh")
+@event.listens_for(Job, "expire")
+def _invalidate_skills_array_on_reload(target, *args):
+    """Drop the cached skills_array when required_skills is expired or reloaded"""
+    attrs = args[-1]
+    if attrs is None or "required_skills" in attrs:
+        target.__dict__.pop("skills_array", None)
 
-event.listen(Job, "before_insert", Job.before_save)
-event.listen(Job, "before_update", Job.before_save)
+
+@event.listens_for(Job, "after_update")
+def _invalidate_similarities(mapper, connection, target):
+    """Drop cached match similarities once a job embedding change commits"""
+    if inspect(target).attrs.embedding.history.has_changes():
+        call_after_commit(object_session(target), _invalidate_similarity_cache)
+
+
+def _normalize_rows(rows):
+    """
+    Copy job row mappings into the form bulk_insert_mappings expects
+
+    Legacy user_id keys are moved onto recruiter_id, and the salary cents
+    columns are filled from salary_range, since bulk mappings bypass both
+    the hybrid property and the salary_range validator. The caller's
+    dicts are not modified.
+
+    Args:
+        rows: Iterable of column-value dicts
+
+    Returns:
+        list: New dicts, one per row
+    """
+    normalized = []
+    for row in rows:
+        row = dict(row)
+        if "user_id" in row:
+            user_id = row.pop("user_id")
+            if row.get("recruiter_id") is None:
+                row["recruiter_id"] = user_id
+        if "salary_range" in row:
+            row.setdefault("salary_min_cents", _parse_salary_cents(row["salary_range"], 0))
+            row.setdefault("salary_max_cents", _parse_salary_cents(row["salary_range"], 1))
+        normalized.append(row)
+    return normalized
@@ -5,10 +5,11 @@ This module defines job token-related models for detecting
 similar job postings and preventing duplicates.
 """
 
-from datetime import datetime
 
 from app import db
 
+from .base import EMBEDDING_DIMENSIONS, Vector, halfvec_cosine_index, naive_utcnow
+
 
 class JobToken(db.Model):
     """
@@ -25,6 +26,9 @@ class JobToken(db.Model):
     """
 
     __tablename__ = "job_tokens"
+    __table_args__ = (
+        halfvec_cosine_index("ix_job_tokens_token_hnsw", "token"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(
@@ -34,9 +38,9 @@ class JobToken(db.Model):
         index=True,
         unique=True,
     )
-    token = db.Column(db.JSON)  # Store vector as JSON array
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    token = db.Column(Vector(EMBEDDING_DIMENSIONS))
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
+    updated_at = db.Column(db.DateTime, default=naive_utcnow, onupdate=naive_utcnow)
 
     # Relationship to Job model
     job = db.relationship(
@@ -72,8 +76,8 @@ class JobSimilarity(db.Model):
         db.Integer, db.ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True
     )
     similarity_score = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=naive_utcnow)
+    updated_at = db.Column(db.DateTime, default=naive_utcnow, onupdate=naive_utcnow)
 
     # Define unique constraint
     __table_args__ = (db.UniqueConstraint("job_id", "similar_job_id", name="uix_job_similarity"),)
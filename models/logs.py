@@ -6,15 +6,291 @@ including error logs, candidate processing history, API request logs,
 and other important events for auditing and monitoring.
 """
 
-import json
+import logging
+import os
+import queue
+import threading
+from collections import defaultdict
 from datetime import datetime
+from itertools import islice
 
-from sqlalchemy import inspect
+import orjson
+from sqlalchemy import DDL, create_engine, event, insert, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
 
 from extensions import db
 
+from .base import naive_utcnow, utc_now
 
-class ErrorLog(db.Model):
+logger = logging.getLogger(__name__)
+
+# Rows sent per executemany round trip by bulk_log
+_BATCH = 1000
+
+# Bounded queue feeding the background log writer, see enqueue_log
+LOG_QUEUE_MAX = 10000
+LOG_QUEUE_PUT_TIMEOUT = 0.05  # seconds a full queue may block the caller
+_log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+
+# Small dedicated pool for log inserts, so read bursts on the main pool
+# can't starve log writers (and log writes can't starve reads)
+LOG_WRITE_POOL_SIZE = int(os.environ.get("LOG_WRITE_POOL_SIZE", "3"))
+_write_engines = {}
+_write_engines_lock = threading.Lock()
+
+# JSON payloads bigger than this are replaced with a truncated preview,
+# keeping log rows small instead of TOASTing multi-KB blobs
+LOG_PAYLOAD_MAX_BYTES = int(os.environ.get("LOG_PAYLOAD_MAX_BYTES", "32768"))
+_PAYLOAD_PREVIEW_BYTES = 1024
+
+# Log tables are range-partitioned by month on occurred_at
+_PARTITION_BY = {"postgresql_partition_by": "RANGE (occurred_at)"}
+
+
+def _write_engine():
+    """
+    Get the log write engine for the current app's database
+
+    Created on first use with the same URL as db.engine but its own
+    fixed-size pool of LOG_WRITE_POOL_SIZE connections.
+
+    Returns:
+        Engine: Engine reserved for log inserts
+    """
+    url = db.engine.url
+    engine = _write_engines.get(url)
+    if engine is None:
+        with _write_engines_lock:
+            engine = _write_engines.get(url)
+            if engine is None:
+                engine = create_engine(
+                    url,
+                    pool_size=LOG_WRITE_POOL_SIZE,
+                    max_overflow=0,
+                    pool_recycle=300,
+                    pool_pre_ping=True,
+                )
+                _write_engines[url] = engine
+    return engine
+
+
+def pool_stats():
+    """
+    Report checkout counts for the main pool and the log write pool
+
+    Returns:
+        dict: Per-pool size, checked_in, checked_out and overflow
+    """
+
+    def stats(engine):
+        pool = engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    return {"read": stats(db.engine), "log_write": stats(_write_engine())}
+
+
+def _recent_first_index(table, column):
+    """B-tree index on (column, occurred_at DESC) for per-key recent-log scans"""
+    return db.Index(f"ix_{table}_{column}_occurred", column, db.text("occurred_at DESC"))
+
+
+def _occurred_brin_index(table):
+    """BRIN index on occurred_at; tiny and a good fit for append-only rows"""
+    return db.Index(f"ix_{table}_occurred_brin", "occurred_at", postgresql_using="brin")
+
+
+def _clip_payload(value):
+    """Replace a JSON payload larger than LOG_PAYLOAD_MAX_BYTES with a preview"""
+    encoded = orjson.dumps(value, default=str)
+    if len(encoded) <= LOG_PAYLOAD_MAX_BYTES:
+        return value
+    return {
+        "truncated": True,
+        "size_bytes": len(encoded),
+        "preview": encoded[:_PAYLOAD_PREVIEW_BYTES].decode("utf-8", "ignore"),
+    }
+
+
+def _next_month(month_start):
+    """First day of the month after month_start"""
+    if month_start.month == 12:
+        return month_start.replace(year=month_start.year + 1, month=1)
+    return month_start.replace(month=month_start.month + 1)
+
+
+class _LogMixin:
+    """Batched inserts and serialization shared by the log models"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**self._clip(kwargs))
+
+    @classmethod
+    def bulk_log(cls, rows):
+        """
+        Insert many log rows using batched executemany INSERTs
+
+        Runs in its own transaction on the dedicated log write pool, so logs
+        are written even if the caller's session is later rolled back and
+        never wait behind reads for a connection.
+
+        Args:
+            rows: Iterable of dicts keyed by column name
+
+        Returns:
+            int: Number of rows inserted
+        """
+        rows = iter(rows)
+        count = 0
+        with _write_engine().begin() as connection:
+            while chunk := list(islice(rows, _BATCH)):
+                # executemany needs the same keys in every row of a statement
+                by_keys = {}
+                for row in chunk:
+                    by_keys.setdefault(frozenset(row), []).append(cls._clip(row))
+                for group in by_keys.values():
+                    connection.execute(insert(cls), group)
+                count += len(chunk)
+        return count
+
+    @classmethod
+    def create_month_partition(cls, when):
+        """
+        Create the monthly partition covering a point in time, if missing
+
+        Run ahead of the month (e.g. from a scheduled job): Postgres refuses
+        to add a partition whose range already has rows in the default one.
+
+        Args:
+            when (datetime): Any time within the month
+
+        Returns:
+            str: Name of the partition table
+        """
+        start = datetime(when.year, when.month, 1)
+        end = _next_month(start)
+        table = cls.__tablename__
+        name = f"{table}_{start:%Y_%m}"
+        with db.engine.begin() as connection:
+            connection.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+                )
+            )
+        return name
+
+    @classmethod
+    def drop_partitions_before(cls, cutoff):
+        """
+        Detach and drop monthly partitions that end on or before a cutoff
+
+        Retention becomes a metadata operation instead of a DELETE scan.
+
+        Args:
+            cutoff (datetime): Drop partitions whose whole month precedes this
+
+        Returns:
+            list: Names of the dropped partitions
+        """
+        table = cls.__tablename__
+        dropped = []
+        with db.engine.begin() as connection:
+            children = connection.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :table"
+                ),
+                {"table": table},
+            ).scalars()
+            for name in children:
+                try:
+                    start = datetime.strptime(name[len(table) + 1 :], "%Y_%m")
+                except ValueError:
+                    continue  # default partition
+                if _next_month(start) <= cutoff:
+                    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    connection.execute(text(f"DROP TABLE {name}"))
+                    dropped.append(name)
+        return dropped
+
+    @classmethod
+    def _column_info(cls):
+        """(name, is_datetime) per column, read from the mapper once per class"""
+        info = cls.__dict__.get("_column_info_cache")
+        if info is None:
+            info = tuple(
+                (column.name, isinstance(column.type, db.DateTime))
+                for column in inspect(cls).columns
+            )
+            cls._column_info_cache = info
+        return info
+
+    @classmethod
+    def _column_limits(cls):
+        """(length per bounded string column, JSONB column names), read once per class"""
+        limits = cls.__dict__.get("_column_limits_cache")
+        if limits is None:
+            columns = inspect(cls).columns
+            limits = (
+                {
+                    column.name: column.type.length
+                    for column in columns
+                    if isinstance(column.type, db.String) and column.type.length
+                },
+                tuple(column.name for column in columns if isinstance(column.type, JSONB)),
+            )
+            cls._column_limits_cache = limits
+        return limits
+
+    @classmethod
+    def _clip(cls, row):
+        """
+        Truncate oversized values in a row before it is written
+
+        Strings are cut to their column's declared length and large JSON
+        payloads are replaced by _clip_payload, so long exception messages
+        or URLs never fail the insert or get TOASTed.
+
+        Args:
+            row (dict): Column values; never modified
+
+        Returns:
+            dict: The row itself if nothing needed clipping, otherwise a
+                clipped copy
+        """
+        lengths, json_columns = cls._column_limits()
+        clipped = {}
+        for name, length in lengths.items():
+            value = row.get(name)
+            if isinstance(value, str) and len(value) > length:
+                clipped[name] = value[:length]
+        for name in json_columns:
+            value = row.get(name)
+            if value is not None:
+                payload = _clip_payload(value)
+                if payload is not value:
+                    clipped[name] = payload
+        return {**row, **clipped} if clipped else row
+
+    def to_dict(self):
+        """Convert the model to a dictionary."""
+        result = {}
+        for name, is_datetime in self._column_info():
+            value = getattr(self, name)
+            if is_datetime and value is not None:
+                value = value.isoformat()
+            result[name] = value
+        return result
+
+
+class ErrorLog(_LogMixin, db.Model):
     """
     Model for storing application errors.
 
@@ -23,17 +299,29 @@ class ErrorLog(db.Model):
     """
 
     __tablename__ = "error_logs"
+    __table_args__ = (
+        db.Index(
+            "ix_error_logs_details_gin",
+            "details",
+            postgresql_using="gin",
+            postgresql_ops={"details": "jsonb_path_ops"},
+        ),
+        _recent_first_index("error_logs", "user_id"),
+        _occurred_brin_index("error_logs"),
+        _PARTITION_BY,
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     error_type = db.Column(db.String(255), nullable=False, index=True)
     message = db.Column(db.String(1000), nullable=False)
-    details = db.Column(db.Text, nullable=True)  # JSON string with full error details
+    details = db.Column(JSONB, nullable=True)  # Full error details
     url = db.Column(db.String(2000), nullable=True, index=True)
     method = db.Column(db.String(10), nullable=True)
-    user_id = db.Column(
-        db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # Partition key, so it must be part of the primary key
+    occurred_at = db.Column(
+        db.DateTime, server_default=utc_now(), primary_key=True, nullable=False
     )
-    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     resolved = db.Column(db.Boolean, default=False, nullable=False, index=True)
     resolution_notes = db.Column(db.Text, nullable=True)
     resolution_date = db.Column(db.DateTime, nullable=True)
@@ -44,26 +332,8 @@ class ErrorLog(db.Model):
     def __repr__(self):
         return f"<ErrorLog {self.id} - {self.error_type}: {self.message[:50]}>"
 
-    def to_dict(self):
-        """Convert the model to a dictionary."""
-        result = {}
-        for column in inspect(self.__class__).columns:
-            value = getattr(self, column.name)
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            result[column.name] = value
-
-        # Parse JSON details if present
-        if self.details:
-            try:
-                result["details"] = json.loads(self.details)
-            except json.JSONDecodeError:
-                result["details"] = self.details
 
-        return result
-
-
-class ApiLog(db.Model):
+class ApiLog(_LogMixin, db.Model):
     """
     Model for logging API requests.
 
@@ -72,21 +342,26 @@ class ApiLog(db.Model):
     """
 
     __tablename__ = "api_logs"
+    __table_args__ = (
+        _recent_first_index("api_logs", "service"),
+        _recent_first_index("api_logs", "user_id"),
+        _occurred_brin_index("api_logs"),
+        _PARTITION_BY,
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     endpoint = db.Column(db.String(1000), nullable=False, index=True)
     method = db.Column(db.String(10), nullable=False)
     status_code = db.Column(db.Integer, nullable=True, index=True)
-    request_data = db.Column(db.Text, nullable=True)  # JSON string of request params/data
-    response_data = db.Column(db.Text, nullable=True)  # Redacted/sanitized response
-    user_id = db.Column(
-        db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
-    )
+    request_data = db.Column(JSONB, nullable=True)  # Request params/data
+    response_data = db.Column(JSONB, nullable=True)  # Redacted/sanitized response
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     duration_ms = db.Column(db.Integer, nullable=True)  # Request duration in milliseconds
-    service = db.Column(
-        db.String(255), nullable=False, index=True
-    )  # e.g., "openai", "google", "twilio"
-    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    service = db.Column(db.String(255), nullable=False)  # e.g., "openai", "google", "twilio"
+    # Partition key, so it must be part of the primary key
+    occurred_at = db.Column(
+        db.DateTime, server_default=utc_now(), primary_key=True, nullable=False
+    )
     correlation_id = db.Column(
         db.String(255), nullable=True, index=True
     )  # Request correlation ID for tracing
@@ -112,31 +387,12 @@ class ApiLog(db.Model):
     def __repr__(self):
         return f"<ApiLog {self.id} - {self.service}: {self.endpoint} ({self.status_code})>"
 
-    def to_dict(self):
-        """Convert the model to a dictionary."""
-        result = {}
-        for column in inspect(self.__class__).columns:
-            value = getattr(self, column.name)
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            result[column.name] = value
-
-        # Parse JSON data if present
-        for field in ["request_data", "response_data"]:
-            if getattr(self, field):
-                try:
-                    result[field] = json.loads(getattr(self, field))
-                except json.JSONDecodeError:
-                    result[field] = getattr(self, field)
-
-        return result
-
 
 # Import the CandidateProcessingHistory model from models.candidate
 # This is needed for backwards compatibility with existing imports
 
 
-class AuditLog(db.Model):
+class AuditLog(_LogMixin, db.Model):
     """
     Model for tracking user actions for auditing purposes.
 
@@ -145,11 +401,20 @@ class AuditLog(db.Model):
     """
 
     __tablename__ = "audit_logs"
-
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(
-        db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+    __table_args__ = (
+        db.Index(
+            "ix_audit_logs_details_gin",
+            "details",
+            postgresql_using="gin",
+            postgresql_ops={"details": "jsonb_path_ops"},
+        ),
+        _recent_first_index("audit_logs", "user_id"),
+        _occurred_brin_index("audit_logs"),
+        _PARTITION_BY,
     )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     action = db.Column(
         db.String(255), nullable=False, index=True
     )  # e.g., "login", "update_job", "delete_candidate"
@@ -157,10 +422,13 @@ class AuditLog(db.Model):
         db.String(255), nullable=True, index=True
     )  # e.g., "job", "candidate", "user"
     resource_id = db.Column(db.Integer, nullable=True)
-    details = db.Column(db.Text, nullable=True)  # JSON string with additional details
+    details = db.Column(JSONB, nullable=True)  # Additional details
     ip_address = db.Column(db.String(45), nullable=True)  # Supports IPv6
     user_agent = db.Column(db.String(1000), nullable=True)
-    occurred_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Partition key, so it must be part of the primary key
+    occurred_at = db.Column(
+        db.DateTime, server_default=utc_now(), primary_key=True, nullable=False
+    )
 
     # Relationships
     user = db.relationship("User", backref=db.backref("audit_logs", lazy=True))
@@ -168,20 +436,76 @@ class AuditLog(db.Model):
     def __repr__(self):
         return f"<AuditLog {self.id} - {self.user_id}: {self.action} on {self.resource_type}/{self.resource_id}>"
 
-    def to_dict(self):
-        """Convert the model to a dictionary."""
-        result = {}
-        for column in inspect(self.__class__).columns:
-            value = getattr(self, column.name)
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            result[column.name] = value
 
-        # Parse JSON details if present
-        if self.details:
-            try:
-                result["details"] = json.loads(self.details)
-            except json.JSONDecodeError:
-                result["details"] = self.details
+# Catch-all partitions so inserts never fail for a month without a partition
+for _table in (ErrorLog.__table__, ApiLog.__table__, AuditLog.__table__):
+    event.listen(
+        _table,
+        "after_create",
+        DDL(f"CREATE TABLE {_table.name}_default PARTITION OF {_table.name} DEFAULT"),
+    )
+del _table
 
-        return result
+# Log kinds accepted by enqueue_log
+_LOG_MODELS = {"error": ErrorLog, "api": ApiLog, "audit": AuditLog}
+
+
+def enqueue_log(kind, **fields):
+    """
+    Queue a log row for the background writer instead of inserting inline
+
+    When the queue is full the caller blocks for at most
+    LOG_QUEUE_PUT_TIMEOUT, after which the row is dropped.
+
+    Args:
+        kind (str): "error", "api" or "audit"
+        **fields: Column values for the row
+
+    Returns:
+        bool: True if the row was queued
+    """
+    if kind not in _LOG_MODELS:
+        raise ValueError(f"Unknown log kind: {kind}")
+    fields.setdefault("occurred_at", naive_utcnow())
+    try:
+        _log_queue.put((kind, fields), timeout=LOG_QUEUE_PUT_TIMEOUT)
+    except queue.Full:
+        logger.warning(f"Log queue full, dropped {kind} log")
+        return False
+    return True
+
+
+def flush_log_queue(max_rows=500, timeout=0.05):
+    """
+    Drain queued log rows and write them with bulk_log
+
+    Waits up to timeout for the first row, then takes whatever else is
+    queued, up to max_rows. Requires an application context.
+
+    Args:
+        max_rows (int): Maximum rows to write in this call
+        timeout (float): Seconds to wait for the first row; 0 returns at
+            once if the queue is empty, None waits until a row arrives
+
+    Returns:
+        int: Number of rows written
+    """
+    try:
+        kind, row = _log_queue.get_nowait() if timeout == 0 else _log_queue.get(timeout=timeout)
+    except queue.Empty:
+        return 0
+
+    batches = defaultdict(list)
+    batches[kind].append(row)
+    count = 1
+    while count < max_rows:
+        try:
+            kind, row = _log_queue.get_nowait()
+        except queue.Empty:
+            break
+        batches[kind].append(row)
+        count += 1
+
+    for kind, rows in batches.items():
+        _LOG_MODELS[kind].bulk_log(rows)
+    return count
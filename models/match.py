@@ -1,193 +1,147 @@
 """
 Match Models for AI Recruiter Pro
 
-This module defines models for tracking job-candidate matches,
-match history, and score calculations.
+This module defines match history and the scoring helpers shared by
+CandidateJobMatch (models.matching). JobCandidateMatch, which duplicated
+CandidateJobMatch on its own table, is kept as an alias of it.
 """
 
-from datetime import datetime
+import os
+import threading
+from functools import lru_cache
 
 import numpy as np
-from sqlalchemy.dialects.postgresql import JSONB
+from cachetools import LRUCache
 
-from .base import db
+from .base import db, utc_now
 
 
-class JobCandidateMatch(db.Model):
+def _has_vector(vector):
+    """Check that an embedding (list or numpy array) is present and non-empty"""
+    return vector is not None and len(vector) > 0
+
+
+def _unit(vector):
     """
-    Model for storing matches between jobs and candidates
+    L2-normalize an embedding into a contiguous float32 array
 
-    Attributes:
-        id (int): Primary key
-        job_id (int): Foreign key to job
-        candidate_id (int): Foreign key to candidate
-        score (float): Match score between 0 and 1
-        match_data (dict): Detailed match data (skill matches, etc.)
-        created_at (datetime): When the match was created
-        updated_at (datetime): When the match was last updated
-        status (str): Current status of the match (new, viewed, shortlisted, etc.)
-        user_id (int): User who created/updated this match
+    Args:
+        vector: Embedding as a list or numpy array
+
+    Returns:
+        numpy.ndarray: Unit-length vector, or None for a zero vector
     """
+    vector = np.ascontiguousarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return vector / norm
 
-    __tablename__ = "job_candidate_matches"
 
-    id = db.Column(db.Integer, primary_key=True)
-    job_id = db.Column(db.Integer, db.ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
-    candidate_id = db.Column(
-        db.Integer, db.ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False
-    )
-    score = db.Column(db.Float, default=0.0)
-    match_data = db.Column(JSONB)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    status = db.Column(db.String(20), default="new")
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+def _unit_cosine(unit_a, unit_b):
+    """Cosine similarity of two unit vectors, clipped to [0, 1]"""
+    if unit_a is None or unit_b is None:
+        return 0.0
+    return float(np.clip(np.dot(unit_a, unit_b), 0.0, 1.0))
 
-    # These relationships will be uncommented once all models are fully created
-    # job = db.relationship('Job', backref=db.backref('candidate_matches', lazy='dynamic', cascade='all, delete-orphan'))
-    # candidate = db.relationship('Candidate', backref=db.backref('job_matches', lazy='dynamic', cascade='all, delete-orphan'))
-    # user = db.relationship('User', backref=db.backref('created_matches', lazy='dynamic'))
-
-    def calculate_score(self, job_embedding=None, candidate_embedding=None):
-        """
-        Calculate match score between job and candidate
-
-        Uses a combination of:
-        - Cosine similarity between embeddings (60%)
-        - Skill overlap (40%)
-
-        Args:
-            job_embedding (list, optional): Job embedding (if not stored on job)
-            candidate_embedding (list, optional): Candidate embedding (if not stored on candidate)
-
-        Returns:
-            float: Match score between 0 and 1
-        """
-        from models import Candidate, Job
-
-        # Get embeddings
-        if not job_embedding:
-            job = Job.query.get(self.job_id)
-            job_embedding = job.embedding if job else None
-
-        if not candidate_embedding:
-            candidate = Candidate.query.get(self.candidate_id)
-            candidate_embedding = candidate.embedding if candidate else None
-
-        # If embeddings are missing, fall back to skill matching only
-        if not job_embedding or not candidate_embedding:
-            return self._calculate_skill_match_score()
-
-        # Calculate embedding similarity (60% of score)
-        embedding_similarity = self._cosine_similarity(job_embedding, candidate_embedding)
-        embedding_score = embedding_similarity * 0.6
-
-        # Calculate skill match (40% of score)
-        skill_score = self._calculate_skill_match_score() * 0.4
-
-        # Combine scores
-        total_score = embedding_score + skill_score
-
-        # Update score
-        self.score = total_score
-        self.match_data = self.match_data or {}
-        self.match_data.update(
-            {
-                "embedding_similarity": float(embedding_similarity),
-                "skill_match_score": float(skill_score),
-                "total_score": float(total_score),
-                "last_calculated_at": datetime.utcnow().isoformat(),
-            }
-        )
-
-        return total_score
-
-    def _cosine_similarity(self, vector_a, vector_b):
-        """
-        Calculate cosine similarity between two vectors
-
-        Args:
-            vector_a: First vector
-            vector_b: Second vector
-
-        Returns:
-            float: Similarity between 0 and 1
-        """
-        if not vector_a or not vector_b:
-            return 0.0
-
-        # Convert to numpy arrays
-        if isinstance(vector_a, list):
-            vector_a = np.array(vector_a)
-        if isinstance(vector_b, list):
-            vector_b = np.array(vector_b)
-
-        # Calculate cosine similarity
-        dot_product = np.dot(vector_a, vector_b)
-        norm_a = np.linalg.norm(vector_a)
-        norm_b = np.linalg.norm(vector_b)
-
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-
-        similarity = dot_product / (norm_a * norm_b)
-
-        # Ensure result is within bounds
-        return max(0.0, min(1.0, similarity))
-
-    def _calculate_skill_match_score(self):
-        """
-        Calculate skill match score based on skill overlap
-
-        Returns:
-            float: Score between 0 and 1
-        """
-        from models import Candidate, Job
-
-        # Get job and candidate
-        job = Job.query.get(self.job_id)
-        candidate = Candidate.query.get(self.candidate_id)
-
-        if not job or not candidate:
-            return 0.0
-
-        # Get skills
-        job_skills = {s.lower() for s in (job.skills_array or [])}
-        candidate_skills = {s.lower() for s in (candidate.skills_array or [])}
-
-        # If either set is empty, return 0
-        if not job_skills or not candidate_skills:
-            return 0.0
-
-        # Calculate Jaccard similarity: intersection / union
-        intersection = len(job_skills.intersection(candidate_skills))
-        union = len(job_skills.union(candidate_skills))
-
-        if union == 0:
-            return 0.0
-
-        return intersection / union
-
-    def to_dict(self):
-        """
-        Convert match to dictionary for API responses
-
-        Returns:
-            dict: Dictionary representation of match
-        """
-        return {
-            "id": self.id,
-            "job_id": self.job_id,
-            "candidate_id": self.candidate_id,
-            "score": self.score,
-            "match_data": self.match_data,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "status": self.status,
-        }
 
-    def __repr__(self):
-        return f"<JobCandidateMatch Job:{self.job_id} Candidate:{self.candidate_id} Score:{self.score:.2f}>"
+# Embedding similarities keyed on (job id, job updated_at, candidate id,
+# candidate updated_at), so rescoring an unchanged pair skips the dot product
+SIMILARITY_CACHE_SIZE = int(os.environ.get("MATCH_SIMILARITY_CACHE_SIZE", "100000"))
+_similarity_cache = LRUCache(maxsize=SIMILARITY_CACHE_SIZE)
+_similarity_cache_lock = threading.Lock()
+_similarity_cache_generation = 0
+
+
+def _similarity_key(job, candidate):
+    """Cache key for a job/candidate pair, or None if either is unsaved"""
+    key = (job.id, job.updated_at, candidate.id, candidate.updated_at)
+    return None if any(part is None for part in key) else key
+
+
+def _cached_similarity(key, candidate_embedding, job_embedding):
+    """
+    Cosine similarity of two embeddings, memoized under a _similarity_key
+
+    Args:
+        key (tuple): _similarity_key of the pair the embeddings belong to
+        candidate_embedding: Candidate embedding vector
+        job_embedding: Job embedding vector
+
+    Returns:
+        float: Similarity between 0 and 1
+    """
+    with _similarity_cache_lock:
+        similarity = _similarity_cache.get(key)
+        generation = _similarity_cache_generation
+    if similarity is None:
+        similarity = _unit_cosine(_unit(candidate_embedding), _unit(job_embedding))
+        with _similarity_cache_lock:
+            if generation == _similarity_cache_generation:
+                _similarity_cache[key] = similarity
+    return similarity
+
+
+def _invalidate_similarity_cache():
+    """
+    Drop every cached similarity
+
+    Job.updated_at does not move when a job is re-embedded, so job embedding
+    changes clear the cache instead of changing the key.
+    """
+    global _similarity_cache_generation
+    with _similarity_cache_lock:
+        _similarity_cache_generation += 1
+        _similarity_cache.clear()
+
+
+# Process-wide skill -> bit position vocabulary for skill bitsets
+_SKILL_BITS = {}
+_skill_bits_lock = threading.Lock()
+
+
+def _skill_bit(skill):
+    """Get the bit position of a lowercase skill, assigning the next free one"""
+    bit = _SKILL_BITS.get(skill)
+    if bit is None:
+        with _skill_bits_lock:
+            bit = _SKILL_BITS.setdefault(skill, len(_SKILL_BITS))
+    return bit
+
+
+@lru_cache(maxsize=65536)
+def _skill_mask(skills):
+    """
+    Encode a tuple of skills as an int bitset (case-insensitive)
+
+    Args:
+        skills (tuple): Skill names
+
+    Returns:
+        int: Bitset with one bit set per distinct skill
+    """
+    mask = 0
+    for skill in skills:
+        mask |= 1 << _skill_bit(skill.lower())
+    return mask
+
+
+def _skill_jaccard(skills_a, skills_b):
+    """
+    Jaccard similarity of two skill lists using bitset popcounts
+
+    Args:
+        skills_a: First iterable of skill names
+        skills_b: Second iterable of skill names
+
+    Returns:
+        float: Similarity between 0 and 1 (0 if either is empty)
+    """
+    mask_a = _skill_mask(tuple(skills_a or ()))
+    mask_b = _skill_mask(tuple(skills_b or ()))
+    if not mask_a or not mask_b:
+        return 0.0
+    return (mask_a & mask_b).bit_count() / (mask_a | mask_b).bit_count()
 
 
 class MatchHistory(db.Model):
@@ -196,7 +150,7 @@ class MatchHistory(db.Model):
 
     Attributes:
         id (int): Primary key
-        match_id (int): Foreign key to job-candidate match
+        match_id (int): Foreign key to candidate-job match
         old_score (float): Previous match score
         new_score (float): New match score
         old_status (str): Previous match status
@@ -210,7 +164,7 @@ class MatchHistory(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     match_id = db.Column(
-        db.Integer, db.ForeignKey("job_candidate_matches.id", ondelete="CASCADE"), nullable=False
+        db.Integer, db.ForeignKey("candidate_job_matches.id", ondelete="CASCADE"), nullable=False
     )
     old_score = db.Column(db.Float)
     new_score = db.Column(db.Float)
@@ -218,7 +172,16 @@ class MatchHistory(db.Model):
     new_status = db.Column(db.String(20))
     note = db.Column(db.Text)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, server_default=utc_now())
 
     def __repr__(self):
         return f"<MatchHistory {self.match_id} {self.old_status or 'No status'} -> {self.new_status or 'No status'}>"
+
+
+def __getattr__(name):
+    """Resolve the removed JobCandidateMatch model to CandidateJobMatch"""
+    if name == "JobCandidateMatch":
+        from .matching import CandidateJobMatch
+
+        return CandidateJobMatch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
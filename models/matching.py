@@ -5,26 +5,43 @@ This module defines models for tracking job-candidate matches
 and related matching data.
 """
 
-from datetime import datetime
-
 import numpy as np
+from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import synonym, undefer
+
+from .base import as_halfvec, db, naive_utcnow, utc_now
+from .embedding_store import get_embedding_store, match_topk
+from .match import (
+    _cached_similarity,
+    _has_vector,
+    _similarity_key,
+    _skill_jaccard,
+    _unit,
+    _unit_cosine,
+)
 
-from .base import db
+# Rows per multi-row INSERT ... ON CONFLICT in score_batch
+_UPSERT_BATCH = 1000
 
 
 class CandidateJobMatch(db.Model):
     """
     Model for storing matches between candidates and jobs
 
+    This is the only match table; JobCandidateMatch is an alias of it.
+
     Attributes:
         id (int): Primary key
         candidate_id (int): Foreign key to candidate
         job_id (int): Foreign key to job
         match_score (float): Overall match score between 0 and 1
+        score (float): Alias of match_score
         skills_match_score (float): Skills-based match score
         embedding_match_score (float): Embedding similarity score
         match_data (dict): Additional match details
+        status (str): Current status of the match (new, viewed, shortlisted, etc.)
         user_id (int): User who created this match
         created_at (datetime): When the match was created
         updated_at (datetime): When the match was last updated
@@ -41,13 +58,22 @@ class CandidateJobMatch(db.Model):
     skills_match_score = db.Column(db.Float, default=0.0)
     embedding_match_score = db.Column(db.Float, default=0.0)
     match_data = db.Column(JSONB)
+    status = db.Column(db.String(20), default="new")
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
+    updated_at = db.Column(db.DateTime, server_default=utc_now(), onupdate=utc_now())
 
     # Define a unique constraint so there's only one match per candidate-job pair
     __table_args__ = (db.UniqueConstraint("candidate_id", "job_id", name="uq_candidate_job"),)
 
+    # Name used by the former JobCandidateMatch model
+    score = synonym("match_score")
+
+    # Plain lazy="select" relationships so callers can batch them with
+    # selectinload(CandidateJobMatch.job) / selectinload(CandidateJobMatch.candidate)
+    job = db.relationship("Job", lazy="select")
+    candidate = db.relationship("Candidate", lazy="select")
+
     def calculate_match_score(self, candidate=None, job=None):
         """
         Calculate match score between candidate and job
@@ -64,55 +90,276 @@ class CandidateJobMatch(db.Model):
 
         # Get objects if not provided
         if not candidate:
-            candidate = Candidate.query.get(self.candidate_id)
+            candidate = Candidate.query.options(undefer(Candidate.embedding)).get(
+                self.candidate_id
+            )
         if not job:
             job = Job.query.get(self.job_id)
 
         if not candidate or not job:
             return 0.0
 
-        # Calculate skills match score (40%)
-        self.skills_match_score = self._calculate_skills_match(candidate, job)
-
-        # Calculate embedding match score (60%) if embeddings exist
-        if (
-            hasattr(candidate, "embedding")
-            and candidate.embedding
-            and hasattr(job, "embedding")
-            and job.embedding
-        ):
-            self.embedding_match_score = self._calculate_embedding_match(
-                candidate.embedding, job.embedding
+        # Calculate embedding match score if embeddings exist
+        candidate_embedding = getattr(candidate, "embedding", None)
+        job_embedding = getattr(job, "embedding", None)
+        embedding_score = None
+        if _has_vector(candidate_embedding) and _has_vector(job_embedding):
+            embedding_score = self._calculate_embedding_match(
+                candidate_embedding, job_embedding, _similarity_key(job, candidate)
+            )
+
+        return self._set_scores(self._calculate_skills_match(candidate, job), embedding_score)
+
+    def calculate_score(self, *, job, candidate, job_embedding=None, candidate_embedding=None):
+        """
+        Calculate match score between job and candidate
+
+        The job and candidate must be passed in so scoring never queries for
+        them. Candidate.embedding is deferred, so load candidates for many
+        matches at once with it undeferred, e.g.
+        selectinload(CandidateJobMatch.candidate).undefer(Candidate.embedding).
+
+        Args:
+            job: The match's Job
+            candidate: The match's Candidate
+            job_embedding (list, optional): Job embedding (if not stored on job)
+            candidate_embedding (list, optional): Candidate embedding (if not stored on candidate)
+
+        Returns:
+            float: Match score between 0 and 1
+        """
+        if job is None or candidate is None:
+            raise ValueError("calculate_score requires both job and candidate")
+
+        # Only the stored embeddings are covered by the similarity cache key
+        cache_key = None
+        if job_embedding is None and candidate_embedding is None:
+            cache_key = _similarity_key(job, candidate)
+        if job_embedding is None:
+            job_embedding = job.embedding
+        if candidate_embedding is None:
+            candidate_embedding = candidate.embedding
+        embedding_score = None
+        if _has_vector(job_embedding) and _has_vector(candidate_embedding):
+            embedding_score = self._calculate_embedding_match(
+                candidate_embedding, job_embedding, cache_key
             )
-        else:
-            # If embeddings don't exist, just use skills match with 100% weight
+
+        return self._set_scores(self._calculate_skills_match(candidate, job), embedding_score)
+
+    def _set_scores(self, skills_score, embedding_score):
+        """
+        Combine the component scores and store them on the match
+
+        Skills count 40% and embedding similarity 60%; without an embedding
+        score the skills match carries 100% of the weight.
+
+        Args:
+            skills_score (float): Skills match score
+            embedding_score (float): Embedding similarity, or None if unavailable
+
+        Returns:
+            float: Match score between 0 and 1
+        """
+        self.skills_match_score = float(skills_score)
+        if embedding_score is None:
             self.embedding_match_score = 0.0
             self.match_score = self.skills_match_score
             return self.match_score
 
-        # Combine scores with weights - convert numpy arrays to scalars
-        skills_score = (
-            float(self.skills_match_score)
-            if hasattr(self.skills_match_score, "tolist")
-            else self.skills_match_score
-        )
-        embedding_score = (
-            float(self.embedding_match_score)
-            if hasattr(self.embedding_match_score, "tolist")
-            else self.embedding_match_score
-        )
-        self.match_score = (skills_score * 0.4) + (embedding_score * 0.6)
-
-        # Update match data
+        self.embedding_match_score = float(embedding_score)
+        self.match_score = (self.skills_match_score * 0.4) + (self.embedding_match_score * 0.6)
         self.match_data = {
-            "skills_match_score": float(skills_score),
-            "embedding_match_score": float(embedding_score),
-            "total_score": float(self.match_score),
-            "calculation_timestamp": datetime.utcnow().isoformat(),
+            "skills_match_score": self.skills_match_score,
+            "embedding_match_score": self.embedding_match_score,
+            "total_score": self.match_score,
+            "calculation_timestamp": naive_utcnow().isoformat(),
         }
-
         return self.match_score
 
+    @classmethod
+    def top_k(cls, job_id, k=20):
+        """
+        Find the candidates most similar to a job using the pgvector index
+
+        Args:
+            job_id (int): Job to match against
+            k (int): Number of candidates to return
+
+        Returns:
+            list: (candidate_id, similarity) tuples, most similar first
+        """
+        from .candidate import Candidate
+        from .job import Job
+
+        job_embedding = select(Job.embedding).where(Job.id == job_id).scalar_subquery()
+        distance = as_halfvec(Candidate.embedding).cosine_distance(as_halfvec(job_embedding))
+        rows = db.session.execute(
+            select(Candidate.id, 1 - distance)
+            .where(Candidate.embedding.is_not(None))
+            .order_by(distance)
+            .limit(k)
+        )
+        return [(candidate_id, float(similarity)) for candidate_id, similarity in rows]
+
+    @classmethod
+    def score_batch(cls, job_id, candidate_ids):
+        """
+        Score many candidates against one job in a single vectorized pass
+
+        Loads the job and all candidates in two queries, stacks the candidate
+        embeddings into one float32 matrix and scores them with a single
+        matrix-vector product. Rows come from the memory-mapped embedding
+        store when it is enabled; only candidates missing from it load their
+        embedding column. Results are written back with INSERT ... ON
+        CONFLICT (candidate_id, job_id) DO UPDATE, so new and existing
+        matches go out in the same statement without reading them first.
+        The caller commits.
+
+        Args:
+            job_id (int): Job to score against
+            candidate_ids (list): IDs of the candidates to score
+
+        Returns:
+            dict: Mapping of candidate_id to match score
+        """
+        from .candidate import Candidate
+        from .job import Job
+
+        job = db.session.get(Job, job_id)
+        if job is None or not candidate_ids:
+            return {}
+
+        store = get_embedding_store()
+        query = Candidate.query.filter(Candidate.id.in_(candidate_ids))
+        if store is None:
+            query = query.options(undefer(Candidate.embedding))
+        candidates = query.all()
+        if not candidates:
+            return {}
+
+        # Embedding similarity for every candidate with an embedding, via C @ j
+        embedding_scores = {}
+        job_unit = _unit(job.embedding) if _has_vector(job.embedding) else None
+        if job_unit is not None:
+            embeddings = {}
+            if store is None:
+                embeddings = {c.id: c.embedding for c in candidates}
+            else:
+                # Store rows are already unit length, so C @ j is the cosine
+                stored_ids, stored = store.rows(c.id for c in candidates)
+                similarities = np.clip(stored @ job_unit, 0.0, 1.0)
+                embedding_scores = dict(zip(stored_ids, similarities.tolist()))
+                missing = [c.id for c in candidates if c.id not in embedding_scores]
+                if missing:
+                    # Added since the last build: one query for the stragglers
+                    embeddings = dict(
+                        db.session.execute(
+                            db.select(Candidate.id, Candidate.embedding).where(
+                                Candidate.id.in_(missing)
+                            )
+                        ).all()
+                    )
+
+            embedded = [
+                (candidate_id, embedding)
+                for candidate_id, embedding in embeddings.items()
+                if _has_vector(embedding)
+            ]
+            if embedded:
+                matrix = np.vstack([embedding for _, embedding in embedded]).astype(np.float32)
+                norms = np.linalg.norm(matrix, axis=1)
+                norms[norms == 0] = np.inf  # zero vectors score 0
+                similarities = np.clip((matrix @ job_unit) / norms, 0.0, 1.0)
+                embedding_scores.update(
+                    (candidate_id, float(similarity))
+                    for (candidate_id, _), similarity in zip(embedded, similarities)
+                )
+
+        job_skills = job.skills_array
+        now = naive_utcnow()
+        # A multi-row VALUES needs the same keys in every row
+        by_keys, scores = {}, {}
+        for candidate in candidates:
+            skills_score = _skill_jaccard(job_skills, candidate.skills_array)
+            embedding_score = embedding_scores.get(candidate.id)
+            if embedding_score is None:
+                # No embeddings: skills match carries 100% of the weight
+                row = {
+                    "match_score": skills_score,
+                    "skills_match_score": skills_score,
+                    "embedding_match_score": 0.0,
+                }
+            else:
+                match_score = (skills_score * 0.4) + (embedding_score * 0.6)
+                row = {
+                    "match_score": match_score,
+                    "skills_match_score": skills_score,
+                    "embedding_match_score": embedding_score,
+                    "match_data": {
+                        "skills_match_score": skills_score,
+                        "embedding_match_score": embedding_score,
+                        "total_score": match_score,
+                        "calculation_timestamp": now.isoformat(),
+                    },
+                }
+            scores[candidate.id] = row["match_score"]
+            by_keys.setdefault(tuple(row), []).append(
+                {"candidate_id": candidate.id, "job_id": job_id, **row}
+            )
+
+        for keys, rows in by_keys.items():
+            for start in range(0, len(rows), _UPSERT_BATCH):
+                stmt = pg_insert(cls).values(rows[start : start + _UPSERT_BATCH])
+                db.session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["candidate_id", "job_id"],
+                        set_={
+                            **{key: stmt.excluded[key] for key in keys},
+                            "updated_at": utc_now(),
+                        },
+                    )
+                )
+        return scores
+
+    @classmethod
+    def rematch_open_jobs(cls, k=20):
+        """
+        Rescore every active job against its k nearest candidates
+
+        Takes the top k per job from one blocked matrix product of all job
+        embeddings against the embedding store, then scores and writes those
+        pairs with score_batch. Commits once per job.
+
+        Args:
+            k (int): Candidates to rescore per job
+
+        Returns:
+            int: Number of jobs rematched
+        """
+        from .job import Job
+
+        store = get_embedding_store()
+        if store is None or not len(store.ids):
+            return 0
+
+        jobs = db.session.execute(
+            db.select(Job.id, Job.embedding).where(
+                Job.status == "active", Job.embedding.is_not(None)
+            )
+        ).all()
+        units = [(job_id, _unit(embedding)) for job_id, embedding in jobs]
+        units = [(job_id, unit) for job_id, unit in units if unit is not None]
+        if not units:
+            return 0
+
+        job_matrix = np.vstack([unit for _, unit in units])
+        indices, _ = match_topk(job_matrix, store.matrix, k)
+        for (job_id, _), rows in zip(units, indices):
+            cls.score_batch(job_id, store.ids[rows].tolist())
+            db.session.commit()
+        return len(units)
+
     def _calculate_skills_match(self, candidate, job):
         """
         Calculate skill match score based on skill overlap
@@ -124,55 +371,28 @@ class CandidateJobMatch(db.Model):
         Returns:
             float: Skill match score between 0 and 1
         """
-        # Get candidate skills
-        candidate_skills = set()
-        if hasattr(candidate, "skills_array") and candidate.skills_array:
-            candidate_skills = {s.lower() for s in candidate.skills_array}
-
-        # Get job skills
-        job_skills = set()
-        if hasattr(job, "skills_array") and job.skills_array:
-            job_skills = {s.lower() for s in job.skills_array}
-
-        # If either set is empty, return 0
-        if not candidate_skills or not job_skills:
-            return 0.0
-
-        # Calculate Jaccard similarity
-        intersection = len(candidate_skills.intersection(job_skills))
-        union = len(candidate_skills.union(job_skills))
-
-        return intersection / union if union > 0 else 0.0
+        # Jaccard similarity of the skill bitsets: popcount(and) / popcount(or)
+        return _skill_jaccard(
+            getattr(candidate, "skills_array", None), getattr(job, "skills_array", None)
+        )
 
-    def _calculate_embedding_match(self, candidate_embedding, job_embedding):
+    def _calculate_embedding_match(self, candidate_embedding, job_embedding, cache_key=None):
         """
         Calculate cosine similarity between embeddings
 
         Args:
             candidate_embedding: Candidate embedding vector
             job_embedding: Job embedding vector
+            cache_key (tuple, optional): _similarity_key of the pair the embeddings
+                were loaded from; when given, the result is memoized across calls
 
         Returns:
             float: Similarity score between 0 and 1
         """
-        # Handle potential input types
-        if isinstance(candidate_embedding, list):
-            candidate_embedding = np.array(candidate_embedding)
-        if isinstance(job_embedding, list):
-            job_embedding = np.array(job_embedding)
-
-        # Calculate cosine similarity
-        dot_product = np.dot(candidate_embedding, job_embedding)
-        norm_candidate = np.linalg.norm(candidate_embedding)
-        norm_job = np.linalg.norm(job_embedding)
-
-        if norm_candidate == 0 or norm_job == 0:
-            return 0.0
-
-        similarity = dot_product / (norm_candidate * norm_job)
-
-        # Ensure result is within bounds
-        return max(0.0, min(1.0, similarity))
+        if cache_key is not None:
+            return _cached_similarity(cache_key, candidate_embedding, job_embedding)
+        # Normalize once, then a single dot product gives the cosine
+        return _unit_cosine(_unit(candidate_embedding), _unit(job_embedding))
 
     def to_dict(self):
         """
@@ -189,6 +409,7 @@ class CandidateJobMatch(db.Model):
             "skills_match_score": self.skills_match_score,
             "embedding_match_score": self.embedding_match_score,
             "match_data": self.match_data,
+            "status": self.status,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -5,10 +5,12 @@ This module defines notification-related models for storing
 notification data and notification types.
 """
 
-from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
 
 from app import db
 
+from .base import utc_now
+
 
 class NotificationType(db.Model):
     """
@@ -33,7 +35,7 @@ class NotificationType(db.Model):
     description = db.Column(db.String(255))
     icon = db.Column(db.String(50))
     color = db.Column(db.String(20))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
 
     # Relationships
     notifications = db.relationship("Notification", backref="type", lazy=True)
@@ -54,7 +56,7 @@ class Notification(db.Model):
         type_id (int): Foreign key to notification type
         title (str): Title of the notification
         message (str): Message content
-        data (str): Additional JSON data for the notification
+        data (dict): Additional JSON data for the notification
         is_read (bool): Whether the notification has been read
         created_at (datetime): When the notification was created
         expires_at (datetime): When the notification expires
@@ -67,17 +69,24 @@ class Notification(db.Model):
     type_id = db.Column(db.Integer, db.ForeignKey("notification_types.id"), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    data = db.Column(db.Text)  # JSON data
+    data = db.Column(JSONB)
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
     expires_at = db.Column(db.DateTime)
 
     # Define indexes for better query performance
     __table_args__ = (
         db.Index("idx_notification_user_id", "user_id"),
-        db.Index("idx_notification_is_read", "is_read"),
+        # Partial indexes: only unread rows and rows that can expire are queried
+        db.Index(
+            "idx_notification_is_read", "is_read", postgresql_where=db.text("is_read = false")
+        ),
         db.Index("idx_notification_created_at", "created_at"),
-        db.Index("idx_notification_expires_at", "expires_at"),
+        db.Index(
+            "idx_notification_expires_at",
+            "expires_at",
+            postgresql_where=db.text("expires_at IS NOT NULL"),
+        ),
     )
 
     # Relationship to User model
@@ -7,17 +7,34 @@ This module contains all rating-related models including:
 - RatingScale: For defining rating scales
 - PromptTemplate: For versioned prompt templates
 - PromptAudit: For auditing AI prompt usage
+- PromptAuditBody: For the prompt and response text of an audit
 - FlaggedPrompt: For tracking problematic prompts
 """
 
 import logging
-from datetime import datetime
+import os
+import threading
 
-from .base import db
+from cachetools import TTLCache
+from sqlalchemy import event, insert
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import joinedload, object_session
+
+from .base import attach_cached, call_after_commit, db, detached_copy, utc_now
+from .batching import BatchedInsertMixin
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Active prompt templates by name, looked up on every AI call
+TEMPLATE_CACHE_TTL = int(os.environ.get("PROMPT_TEMPLATE_CACHE_TTL", "60"))
+
+_template_cache = TTLCache(maxsize=128, ttl=TEMPLATE_CACHE_TTL)
+_template_cache_lock = threading.Lock()
+_template_cache_generation = 0
+_NO_TEMPLATE = object()
+
 
 class CandidateRating(db.Model):
     """
@@ -29,17 +46,34 @@ class CandidateRating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     candidate_id = db.Column(db.Integer, db.ForeignKey("candidates.id"), nullable=False)
     recruiter_id = db.Column(db.Integer, db.ForeignKey("recruiters.id"), nullable=False)
-    score = db.Column(db.Float, nullable=False)  # 0-1 rating scale (aligned with OpenAI scores)
+    # 0-1 rating scale (aligned with OpenAI scores) stored as fixed-point
+    # thousandths in a 2-byte SMALLINT; read and write it through score
+    score_milli = db.Column("score", db.SmallInteger, nullable=False)
     notes = db.Column(db.Text)
     active = db.Column(db.Boolean, default=True)  # Whether this rating is active
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
+    updated_at = db.Column(db.DateTime, server_default=utc_now(), onupdate=utc_now())
 
     # Relationships
     candidate = db.relationship("Candidate", backref=db.backref("ratings", lazy=True))
     # Define a one-way relationship to Recruiter with overlaps parameter
     recruiter = db.relationship("Recruiter", foreign_keys=[recruiter_id], overlaps="ratings")
 
+    @hybrid_property
+    def score(self):
+        """Rating on the 0-1 scale"""
+        if self.score_milli is None:
+            return None
+        return self.score_milli / 1000
+
+    @score.setter
+    def score(self, value):
+        self.score_milli = None if value is None else round(value * 1000)
+
+    @score.expression
+    def score(cls):
+        return cls.score_milli / 1000.0
+
     def __repr__(self):
         return f"<CandidateRating {self.candidate_id} by {self.recruiter_id}: {self.score}>"
 
@@ -59,7 +93,7 @@ class RatingCriterion(db.Model):
     job_id = db.Column(
         db.Integer, db.ForeignKey("jobs.id"), nullable=True
     )  # Only set if job_specific is True
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
 
     def __repr__(self):
         return f"<RatingCriterion {self.name}>"
@@ -78,7 +112,7 @@ class RatingScale(db.Model):
     max_value = db.Column(db.Float, nullable=False, default=1.0)
     step = db.Column(db.Float, nullable=False, default=0.1)  # Increment step
     labels = db.Column(db.JSON)  # Optional value-to-label mapping
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
 
     def __repr__(self):
         return f"<RatingScale {self.name} ({self.min_value}-{self.max_value})>"
@@ -99,9 +133,9 @@ class PromptTemplate(db.Model):
     description = db.Column(db.Text)
     parameters = db.Column(db.JSON)  # Parameter definitions and defaults
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
     created_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"))
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, server_default=utc_now(), onupdate=utc_now())
     bias_evaluation = db.Column(db.Text, nullable=True)
     bias_categories = db.Column(db.Text, nullable=True)
 
@@ -115,30 +149,86 @@ class PromptTemplate(db.Model):
 
     @classmethod
     def get_active_template(cls, name):
-        """Get the currently active template for a given name"""
-        return cls.query.filter_by(name=name, is_active=True).order_by(cls.version.desc()).first()
+        """
+        Get the currently active template for a given name
+
+        Results are cached per process for TEMPLATE_CACHE_TTL seconds and
+        dropped once a template write commits (see _invalidate_template_cache). The cached
+        copy is detached, so each call attaches it to the current session
+        without a query.
+
+        Args:
+            name (str): Template name, e.g. 'resume_parse'
+
+        Returns:
+            PromptTemplate: Active template or None
+        """
+        with _template_cache_lock:
+            cached = _template_cache.get(name)
+            generation = _template_cache_generation
+        if cached is None:
+            template = (
+                cls.query.filter_by(name=name, is_active=True).order_by(cls.version.desc()).first()
+            )
+            cached = _NO_TEMPLATE if template is None else detached_copy(template)
+            with _template_cache_lock:
+                if generation == _template_cache_generation:
+                    _template_cache[name] = cached
+            return template
+        if cached is _NO_TEMPLATE:
+            return None
+        return attach_cached(cached)
 
     def __repr__(self):
         return f"<PromptTemplate {self.name} {self.version}>"
 
 
-class PromptAudit(db.Model):
+@event.listens_for(PromptTemplate, "after_insert")
+@event.listens_for(PromptTemplate, "after_update")
+@event.listens_for(PromptTemplate, "after_delete")
+def _invalidate_template_cache(mapper, connection, target):
+    """Drop cached active templates once a template write commits"""
+
+    def evict():
+        global _template_cache_generation
+        with _template_cache_lock:
+            _template_cache_generation += 1
+            _template_cache.clear()
+
+    call_after_commit(object_session(target), evict)
+
+
+class PromptAudit(BatchedInsertMixin, db.Model):
     """
     Stores anonymized prompt audit logs for review by administrators
     This model provides oversight of AI prompt usage and results
+
+    Record one per AI call with PromptAudit.queue(...); queued rows are
+    written together when the request ends.
+
+    The prompt, input and response live in PromptAuditBody so list and
+    filter scans stay on narrow rows. prompt_text, input_data and
+    ai_response_snippet still read and write through to the body; load it
+    with detail_loader_options() when rendering a single audit.
     """
 
     __tablename__ = "prompt_audits"
+    # Admin review lists filter by prompt type and show newest first
+    __table_args__ = (
+        db.Index("ix_promptaudit_type_ts", "prompt_type", db.text("timestamp DESC")),
+        # Append-only, so a BRIN index serves plain time-range scans
+        db.Index(
+            "ix_promptaudit_ts_brin",
+            "timestamp",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 128},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    prompt_type = db.Column(
-        db.String(50), nullable=False, index=True
-    )  # e.g., 'resume_parse', 'persona', etc.
+    timestamp = db.Column(db.DateTime, server_default=utc_now())
+    prompt_type = db.Column(db.String(50), nullable=False)  # e.g., 'resume_parse', 'persona', etc.
     prompt_version = db.Column(db.String(10), nullable=False)  # e.g., 'v1', 'v2'
-    prompt_text = db.Column(db.Text)  # Redacted prompt text
-    input_data = db.Column(db.JSON)  # Anonymized input data
-    ai_response_snippet = db.Column(db.Text)  # Snippet/summary of AI response
     user_id = db.Column(db.String(50))  # Obfuscated user ID
     candidate_id = db.Column(db.String(50))  # Obfuscated candidate ID
     has_been_reviewed = db.Column(db.Boolean, default=False)
@@ -147,11 +237,100 @@ class PromptAudit(db.Model):
 
     # Relationships
     reviewer = db.relationship("Recruiter", foreign_keys=[reviewed_by])
+    body = db.relationship(
+        "PromptAuditBody",
+        uselist=False,
+        back_populates="audit",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    prompt_text = association_proxy(
+        "body", "prompt_text", creator=lambda value: PromptAuditBody(prompt_text=value)
+    )
+    input_data = association_proxy(
+        "body", "input_data", creator=lambda value: PromptAuditBody(input_data=value)
+    )
+    ai_response_snippet = association_proxy(
+        "body",
+        "ai_response_snippet",
+        creator=lambda value: PromptAuditBody(ai_response_snippet=value),
+    )
+
+    BODY_FIELDS = ("prompt_text", "input_data", "ai_response_snippet")
+
+    @classmethod
+    def detail_loader_options(cls):
+        """
+        Loader options for showing a single audit with its body
+
+        Returns:
+            list: Options for Query.options()
+        """
+        return [joinedload(cls.body)]
+
+    @classmethod
+    def bulk_log(cls, rows):
+        """
+        Insert many audits with batched executemany INSERTs
+
+        Body fields in the rows are split off and written to
+        prompt_audit_bodies against the returned audit IDs, in the same
+        transaction.
+
+        Args:
+            rows (list): Dicts keyed by column name or body field
+
+        Returns:
+            int: Number of audits inserted
+        """
+        if not rows:
+            return 0
+        # executemany needs the same keys in every row of a statement
+        by_keys = {}
+        for row in rows:
+            by_keys.setdefault(frozenset(row), []).append(row)
+        with db.engine.begin() as connection:
+            for keys, group in by_keys.items():
+                body_keys = keys.intersection(cls.BODY_FIELDS)
+                if not body_keys:
+                    connection.execute(insert(cls), group)
+                    continue
+                audits = [{k: v for k, v in row.items() if k not in body_keys} for row in group]
+                ids = connection.execute(
+                    insert(cls).returning(cls.id, sort_by_parameter_order=True), audits
+                ).scalars()
+                bodies = [
+                    {"prompt_audit_id": audit_id, **{k: row[k] for k in body_keys}}
+                    for audit_id, row in zip(ids, group)
+                ]
+                connection.execute(insert(PromptAuditBody), bodies)
+        return len(rows)
 
     def __repr__(self):
         return f"<PromptAudit {self.id} {self.prompt_type}>"
 
 
+class PromptAuditBody(db.Model):
+    """
+    Prompt and response text of a PromptAudit, stored one-to-one beside it
+    """
+
+    __tablename__ = "prompt_audit_bodies"
+
+    prompt_audit_id = db.Column(
+        db.Integer, db.ForeignKey("prompt_audits.id", ondelete="CASCADE"), primary_key=True
+    )
+    prompt_text = db.Column(db.Text)  # Redacted prompt text
+    input_data = db.Column(db.JSON)  # Anonymized input data
+    ai_response_snippet = db.Column(db.Text)  # Snippet/summary of AI response
+
+    audit = db.relationship("PromptAudit", back_populates="body")
+
+    def __repr__(self):
+        return f"<PromptAuditBody {self.prompt_audit_id}>"
+
+
 class FlaggedPrompt(db.Model):
     """
     Stores prompts that have been flagged for potential bias or issues
@@ -165,7 +344,7 @@ class FlaggedPrompt(db.Model):
     reason = db.Column(db.Text, nullable=False)
     resolution = db.Column(db.Text)
     status = db.Column(db.String(20), default="pending")  # 'pending', 'resolved', 'dismissed'
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
     resolved_at = db.Column(db.DateTime)
     resolved_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"))
 
@@ -4,12 +4,23 @@ Recruiter Model for AI Recruiter Pro
 This module defines the Recruiter model used by the application.
 """
 
-from datetime import datetime
+from functools import cached_property
 
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload, synonym, validates
+from werkzeug.security import check_password_hash
 
-from .base import db
+from .base import db, utc_now
+
+# Argon2id with the library's recommended parameters (C implementation)
+_password_hasher = PasswordHasher()
+
+# Prefixes of hashes written by werkzeug before the switch to Argon2
+_LEGACY_HASH_PREFIXES = ("pbkdf2:", "scrypt:")
 
 
 class Recruiter(UserMixin, db.Model):
@@ -24,8 +35,9 @@ class Recruiter(UserMixin, db.Model):
         name (str): Recruiter's full name
         email (str): Unique email address for login
         password_hash (str): Hashed password for authentication
-        role (str): Role string ('recruiter', 'admin', etc.)
-        role_id (str): Foreign key to roles table
+        role_id (str): Foreign key to roles table ('recruiter', 'admin', etc.)
+        role (str): Alias of role_id
+        is_admin_flag (bool): Denormalized is_admin, maintained on flush
         created_at (datetime): Account creation timestamp
     """
 
@@ -36,16 +48,17 @@ class Recruiter(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     # Role fields
-    role = db.Column(
-        db.String(20), default="recruiter"
-    )  # Legacy field, kept for backward compatibility
     role_id = db.Column(
         db.String(50),
         db.ForeignKey("roles.role_id", name="fk_recruiter_role_id"),
         nullable=True,
         default="recruiter",
     )
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # The legacy role column was folded into role_id
+    role = synonym("role_id")
+    # Kept in sync with assigned_role/roles by _sync_admin_flags
+    is_admin_flag = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
     last_login = db.Column(db.DateTime, nullable=True)
 
     # Define relationships
@@ -64,8 +77,11 @@ class Recruiter(UserMixin, db.Model):
         backref="uploaded_by_recruiter",
         lazy=True,
     )
-    # Relationship to Role model
-    assigned_role = db.relationship("Role", foreign_keys=[role_id], backref="recruiters", lazy=True)
+    # Relationship to Role model; loaded with the recruiter since every
+    # permission check needs it
+    assigned_role = db.relationship(
+        "Role", foreign_keys=[role_id], backref="recruiters", lazy="joined"
+    )
 
     # Many-to-many relationship with roles (for future multi-role support)
     roles = db.relationship(
@@ -74,9 +90,23 @@ class Recruiter(UserMixin, db.Model):
         primaryjoin="Recruiter.id == user_roles.c.user_id",
         secondaryjoin="Role.id == user_roles.c.role_id",
         overlaps="recruiters_with_role,roles,users",
-        lazy="dynamic",
+        lazy="selectin",
     )
 
+    @classmethod
+    def list_loader_options(cls):
+        """
+        Loader options for queries that list many recruiters
+
+        Loads the roles needed for permission checks up front and makes any
+        other relationship access raise instead of lazy loading per row:
+        Recruiter.query.options(*Recruiter.list_loader_options()).all()
+
+        Returns:
+            list: Options for Query.options()
+        """
+        return [joinedload(cls.assigned_role), selectinload(cls.roles), raiseload("*")]
+
     def set_password(self, password):
         """
         Set the password hash from a plain text password
@@ -84,24 +114,70 @@ class Recruiter(UserMixin, db.Model):
         Args:
             password (str): Plain text password
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = _password_hasher.hash(password)
 
     def check_password(self, password):
         """
         Check if a plain text password matches the stored hash
 
+        Legacy werkzeug hashes and Argon2 hashes with outdated parameters
+        are upgraded in place on a successful check; the caller's commit
+        (e.g. of last_login) persists the new hash.
+
         Args:
             password (str): Plain text password to check
 
         Returns:
             bool: True if password matches, False otherwise
         """
-        return check_password_hash(self.password_hash, password)
+        if self.password_hash.startswith(_LEGACY_HASH_PREFIXES):
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        try:
+            _password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if _password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def __repr__(self):
         """String representation of the recruiter"""
         return f"<Recruiter {self.name} ({self.email})>"
 
+    def _all_roles(self):
+        """The assigned role followed by the many-to-many roles"""
+        if self.assigned_role:
+            return [self.assigned_role, *self.roles]
+        return list(self.roles)
+
+    @cached_property
+    def _role_names(self):
+        """Names of all roles, computed once per instance"""
+        return frozenset(role.name for role in self._all_roles())
+
+    @cached_property
+    def _permission_set(self):
+        """Permissions merged across all roles, computed once per instance"""
+        permissions = set()
+        for role in self._all_roles():
+            permissions.update(role.permissions or ())
+        return frozenset(permissions)
+
+    @validates("role_id", "assigned_role", "roles", include_removes=True)
+    def _invalidate_permission_cache(self, key, value, is_remove):
+        """Drop the cached role names and permissions whenever roles are set, added or removed"""
+        self._drop_role_caches()
+        return value
+
+    def _drop_role_caches(self):
+        """Forget the cached role names and permissions"""
+        self.__dict__.pop("_role_names", None)
+        self.__dict__.pop("_permission_set", None)
+
     def is_admin(self):
         """
         Check if this recruiter has admin privileges
@@ -109,16 +185,12 @@ class Recruiter(UserMixin, db.Model):
         Returns:
             bool: True if admin, False otherwise
         """
-        # First check the string role (backward compatibility)
-        if self.role == "admin":
-            return True
-
-        # Then check if role_id points to admin role via assigned_role
-        if self.assigned_role and self.assigned_role.name == "admin":
+        if self.is_admin_flag:
             return True
-
-        # Finally check if any role in the many-to-many relationship is admin
-        return any(role.name == "admin" for role in self.roles.all())
+        # is_admin_flag is only maintained on ORM flushes, so check the roles
+        # too: renamed roles, Core writes to user_roles and rows not yet
+        # backfilled. The string role is checked first for backward compatibility.
+        return self.role == "admin" or "admin" in self._role_names
 
     def has_permission(self, permission):
         """
@@ -131,21 +203,7 @@ class Recruiter(UserMixin, db.Model):
             bool: True if the recruiter has the permission, False otherwise
         """
         # Admins have all permissions
-        if self.is_admin():
-            return True
-
-        # Check assigned role permissions
-        if self.assigned_role and self.assigned_role.permissions:
-            permissions_list = self.assigned_role.permissions.split(",")
-            if permission in permissions_list:
-                return True
-
-        # Check permissions from many-to-many roles
-        for role in self.roles.all():
-            if role.permissions and permission in role.permissions.split(","):
-                return True
-
-        return False
+        return self.is_admin() or permission in self._permission_set
 
     def get_permissions(self):
         """
@@ -154,15 +212,46 @@ class Recruiter(UserMixin, db.Model):
         Returns:
             set: Set of all permission strings
         """
-        all_permissions = set()
-
-        # Get permissions from assigned role
-        if self.assigned_role and self.assigned_role.permissions:
-            all_permissions.update(self.assigned_role.permissions.split(","))
-
-        # Get permissions from many-to-many roles
-        for role in self.roles.all():
-            if role.permissions:
-                all_permissions.update(role.permissions.split(","))
-
-        return all_permissions
+        return set(self._permission_set)
+
+
+# Attributes whose changes can change Recruiter.is_admin_flag
+_ADMIN_ATTRIBUTES = ("role_id", "assigned_role", "roles")
+
+
+@event.listens_for(Recruiter, "refresh")
+@event.listens_for(Recruiter, "expire")
+def _drop_role_caches_on_reload(target, *args):
+    """Drop cached role names and permissions when role attributes are expired or reloaded"""
+    attrs = args[-1]
+    if attrs is None or any(name in attrs for name in _ADMIN_ATTRIBUTES):
+        target._drop_role_caches()
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _sync_admin_flags(session, flush_context, instances):
+    """Recompute is_admin_flag for new recruiters and those whose roles changed"""
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, Recruiter):
+            continue
+        state = inspect(obj)
+        if not state.pending and not any(
+            state.attrs[name].history.has_changes() for name in _ADMIN_ATTRIBUTES
+        ):
+            continue
+
+        assigned_role = obj.assigned_role
+        if (
+            state.attrs.role_id.history.has_changes()
+            and not state.attrs.assigned_role.history.has_changes()
+        ):
+            # Only the foreign key was set, so the relationship is stale
+            from .role import Role
+
+            assigned_role = (
+                session.query(Role).filter_by(role_id=obj.role_id).one_or_none()
+                if obj.role_id
+                else None
+            )
+        roles = [assigned_role, *obj.roles] if assigned_role else obj.roles
+        obj.is_admin_flag = any(role.name == "admin" for role in roles)
@@ -4,9 +4,7 @@ Role Models for AI Recruiter Pro
 This module defines role and permission models for the application.
 """
 
-from datetime import datetime
-
-from .base import db
+from .base import ARRAY, db, utc_now
 
 
 class Role(db.Model):
@@ -17,29 +15,44 @@ class Role(db.Model):
         id (int): Primary key
         role_id (str): Role identifier (admin, recruiter, etc.)
         name (str): Display name for the role
-        permissions (str): Comma-separated list of permissions
+        permissions (list): Permission names
         inherits (str): Parent role if any
         created_at (datetime): When the role was created
     """
 
     __tablename__ = "roles"
+    __table_args__ = (db.Index("ix_roles_permissions_gin", "permissions", postgresql_using="gin"),)
 
     id = db.Column(db.Integer, primary_key=True)
     role_id = db.Column(db.String(50), unique=True, nullable=False)
     name = db.Column(db.String(64), unique=True, nullable=False)
-    permissions = db.Column(db.JSON, default=list)
+    permissions = db.Column(ARRAY(db.String(64)), default=list)
     inherits = db.Column(db.String(50), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
 
-    # Relationship with Recruiters (reverse side of the many-to-many)
+    # Relationship with Recruiters (reverse side of the many-to-many); plain
+    # lazy="select" so role listings can batch it with selectinload()
     recruiters_with_role = db.relationship(
         "Recruiter",
         secondary="user_roles",
         primaryjoin="Role.id == user_roles.c.role_id",
         secondaryjoin="Recruiter.id == user_roles.c.user_id",
-        lazy="dynamic",
+        lazy="select",
     )
 
+    @classmethod
+    def with_permission(cls, permission):
+        """
+        Query roles granting a permission (permissions @> ARRAY[permission])
+
+        Args:
+            permission (str): Permission name
+
+        Returns:
+            Query: Roles whose permissions contain it
+        """
+        return cls.query.filter(cls.permissions.contains([permission]))
+
     def __repr__(self):
         return f"<Role {self.name}>"
 
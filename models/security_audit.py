@@ -5,27 +5,92 @@ This module defines models for tracking security-relevant events and managing IP
 """
 
 import ipaddress
-from datetime import datetime
+import os
+import threading
+import time
 
-from .base import db
+from sqlalchemy import event, literal
+from sqlalchemy.dialects.postgresql import CIDR, INET
+from sqlalchemy.orm import object_session, validates
 
+from .base import call_after_commit, db, naive_utcnow, utc_now
+from .batching import BatchedInsertMixin
 
-class SecurityAuditLog(db.Model):
+# Seconds the compiled blacklist is reused before it is reloaded
+BLACKLIST_CACHE_TTL = float(os.environ.get("IP_BLACKLIST_CACHE_TTL", "60"))
+
+# (expires_monotonic, {ip version: [(host bits, {network prefix ints})]})
+_blacklist = None
+_blacklist_lock = threading.Lock()
+_blacklist_generation = 0
+
+
+def _compile_blacklist(entries):
+    """
+    Index blacklist entries by IP version and prefix length
+
+    Each network is stored as its address shifted right by the host bits, so
+    matching an IP is one shift and one set lookup per distinct prefix length.
+
+    Args:
+        entries: Iterable of IP or CIDR strings
+
+    Returns:
+        dict: {ip version: [(host bits, set of network prefixes)]}, longest prefix first
+    """
+    by_version = {4: {}, 6: {}}
+    for entry in entries:
+        try:
+            network = ipaddress.ip_network(entry, strict=False)
+        except ValueError:
+            continue
+        host_bits = network.max_prefixlen - network.prefixlen
+        by_version[network.version].setdefault(host_bits, set()).add(
+            int(network.network_address) >> host_bits
+        )
+    return {version: sorted(prefixes.items()) for version, prefixes in by_version.items()}
+
+
+def invalidate_blacklist_cache():
+    """Force the next blacklist check to reload entries from the database"""
+    global _blacklist, _blacklist_generation
+    with _blacklist_lock:
+        _blacklist_generation += 1
+        _blacklist = None
+
+
+class SecurityAuditLog(BatchedInsertMixin, db.Model):
     """
     Security Audit Log Model
 
     Used to track security-relevant events for compliance and security monitoring.
+    Bursts of events (e.g. auth storms) can be recorded with
+    SecurityAuditLog.queue(...) and are written together when the request ends.
     """
 
     __tablename__ = "security_audit_logs"
+    # Dashboards filter by event or resource and list newest first
+    __table_args__ = (
+        db.Index("ix_seclog_event_ts_user", "event_type", db.text("timestamp DESC"), "user_id"),
+        db.Index(
+            "ix_seclog_resource_ts", "resource_type", "resource_id", db.text("timestamp DESC")
+        ),
+        # Append-only, so a BRIN index serves plain time-range scans
+        db.Index(
+            "ix_seclog_ts_brin",
+            "timestamp",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 128},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    event_type = db.Column(db.String(50), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, server_default=utc_now())
+    event_type = db.Column(db.String(50), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("recruiters.id"), nullable=True)
     ip_address = db.Column(db.String(45), nullable=True)  # IPv6 can be up to 45 chars
     user_agent = db.Column(db.String(255), nullable=True)
-    resource_type = db.Column(db.String(50), nullable=True, index=True)
+    resource_type = db.Column(db.String(50), nullable=True)
     resource_id = db.Column(db.String(50), nullable=True, index=True)
     status = db.Column(db.String(20), nullable=False, default="success", index=True)
     details = db.Column(db.JSON, nullable=True)
@@ -65,11 +130,21 @@ class IPBlacklist(db.Model):
     """
 
     __tablename__ = "ip_blacklist"
+    # GiST over inet_ops serves the >>= containment probe in is_blocked
+    __table_args__ = (
+        db.Index(
+            "ix_blacklist_cidr_gist",
+            "ip_address",
+            postgresql_using="gist",
+            postgresql_ops={"ip_address": "inet_ops"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    ip_address = db.Column(db.String(45), nullable=False, unique=True)  # Single IP or CIDR notation
+    # Network in CIDR notation; single IPs are stored as /32 or /128
+    ip_address = db.Column(CIDR, nullable=False, unique=True)
     reason = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
     created_by = db.Column(db.Integer, db.ForeignKey("recruiters.id"), nullable=True)
     expires_at = db.Column(db.DateTime, nullable=True)  # NULL means never expires
 
@@ -89,7 +164,95 @@ class IPBlacklist(db.Model):
         if self.expires_at is None:
             return False
 
-        return datetime.utcnow() > self.expires_at
+        return naive_utcnow() > self.expires_at
+
+    @classmethod
+    def load_active(cls):
+        """
+        Compile all non-expired entries for is_blacklisted
+
+        Returns:
+            dict: The compiled index (see _compile_blacklist)
+        """
+        global _blacklist
+        generation = _blacklist_generation
+        now = naive_utcnow()
+        rows = (
+            db.session.query(cls.ip_address, cls.expires_at)
+            .filter(db.or_(cls.expires_at.is_(None), cls.expires_at > now))
+            .all()
+        )
+        index = _compile_blacklist(ip for ip, _ in rows)
+
+        # Reload at the TTL, or sooner if an entry expires before then
+        ttl = BLACKLIST_CACHE_TTL
+        expiries = [expires_at for _, expires_at in rows if expires_at is not None]
+        if expiries:
+            ttl = min(ttl, (min(expiries) - now).total_seconds())
+        # Skip caching if the blacklist was invalidated while loading
+        if generation == _blacklist_generation:
+            _blacklist = (time.monotonic() + ttl, index)
+        return index
+
+    @classmethod
+    def is_blacklisted(cls, ip_to_check: str) -> bool:
+        """
+        Check an IP against every active entry using the compiled index
+
+        Args:
+            ip_to_check: IP address to check
+
+        Returns:
+            True if any active entry matches, False otherwise
+        """
+        try:
+            ip = ipaddress.ip_address(ip_to_check)
+        except ValueError:
+            return False
+
+        cached = _blacklist
+        if cached is None or time.monotonic() >= cached[0]:
+            with _blacklist_lock:
+                cached = _blacklist
+                if cached is None or time.monotonic() >= cached[0]:
+                    cached = (None, cls.load_active())
+
+        address = int(ip)
+        return any(
+            address >> host_bits in prefixes for host_bits, prefixes in cached[1][ip.version]
+        )
+
+    @validates("ip_address")
+    def _normalize_network(self, key, value):
+        """Store the network with host bits cleared, as the cidr type requires"""
+        return str(ipaddress.ip_network(value, strict=False))
+
+    @classmethod
+    def is_blocked(cls, ip_to_check: str) -> bool:
+        """
+        Check an IP against active entries with one indexed database probe
+
+        Args:
+            ip_to_check: IP address to check
+
+        Returns:
+            True if any active entry contains the IP, False otherwise
+        """
+        try:
+            ipaddress.ip_address(ip_to_check)
+        except ValueError:
+            return False
+
+        return (
+            db.session.query(literal(1))
+            .filter(
+                cls.ip_address.op(">>=")(db.cast(ip_to_check, INET)),
+                db.or_(cls.expires_at.is_(None), cls.expires_at > naive_utcnow()),
+            )
+            .limit(1)
+            .scalar()
+            is not None
+        )
 
     def matches_ip(self, ip_to_check: str) -> bool:
         """
@@ -101,17 +264,11 @@ class IPBlacklist(db.Model):
         Returns:
             True if the IP matches, False otherwise
         """
-        # Handle CIDR notation
-        if "/" in self.ip_address:
-            try:
-                network = ipaddress.ip_network(self.ip_address, strict=False)
-                ip = ipaddress.ip_address(ip_to_check)
-                return ip in network
-            except ValueError:
-                return False
-
-        # Simple exact match
-        return self.ip_address == ip_to_check
+        try:
+            network = ipaddress.ip_network(self.ip_address, strict=False)
+            return ipaddress.ip_address(ip_to_check) in network
+        except ValueError:
+            return False
 
     def to_dict(self):
         """
@@ -129,3 +286,11 @@ class IPBlacklist(db.Model):
             "expires_at": self.expires_at.isoformat() if self.expires_at else None,
             "is_expired": self.is_expired(),
         }
+
+
+@event.listens_for(IPBlacklist, "after_insert")
+@event.listens_for(IPBlacklist, "after_update")
+@event.listens_for(IPBlacklist, "after_delete")
+def _invalidate_blacklist(mapper, connection, target):
+    """Recompile the blacklist once an entry change commits in this process"""
+    call_after_commit(object_session(target), invalidate_blacklist_cache)
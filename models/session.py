@@ -7,11 +7,24 @@ import hashlib
 import hmac
 import os
 import uuid
-from datetime import datetime
+from functools import lru_cache
 
 from flask import current_app
+from sqlalchemy.orm import raiseload, selectinload
 
-from .base import db
+from .base import db, naive_utcnow, utc_now
+
+# Also look up sessions by their pre-BLAKE2b HMAC-SHA256 token hash
+LEGACY_TOKEN_HASH = os.environ.get("SESSION_LEGACY_TOKEN_HASH", "1") == "1"
+
+
+@lru_cache(maxsize=4)
+def _mac_key(secret_key):
+    """Encode a secret once into a BLAKE2b key (at most 64 bytes)"""
+    key = secret_key.encode()
+    if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    return key
 
 
 class Session(db.Model):
@@ -29,16 +42,31 @@ class Session(db.Model):
     """
 
     __tablename__ = "sessions"
-
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # find_by_token runs on every authenticated request: an index-only scan
+    # over active sessions answers it without touching the heap
+    __table_args__ = (
+        db.Index(
+            "ix_session_token_active",
+            "token_hash",
+            postgresql_where=db.text("is_active"),
+            postgresql_include=["expires_at", "recruiter_id"],
+        ),
+    )
+
+    # Sequential key keeps the PK index small and inserts on its right edge;
+    # public_id is the identifier to expose outside the database
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    public_id = db.Column(
+        db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4())
+    )
     recruiter_id = db.Column(db.Integer, db.ForeignKey("recruiters.id"), nullable=False)
     expires_at = db.Column(db.DateTime, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
     ip_address = db.Column(db.String(50), nullable=True)
     user_agent = db.Column(db.String(255), nullable=True)
 
     # Enhanced security fields (added via migration)
-    token_hash = db.Column(db.String(100), nullable=True, index=True)  # Keyed hash of the token
+    token_hash = db.Column(db.String(100), nullable=True)  # Keyed hash of the token
     is_active = db.Column(db.Boolean, default=True)  # For session tracking/revocation
     last_activity = db.Column(db.DateTime, nullable=True)  # For tracking user activity
     device_info = db.Column(db.String(255), nullable=True)  # For device fingerprinting
@@ -46,18 +74,23 @@ class Session(db.Model):
     # Relationships
     recruiter = db.relationship("Recruiter", backref=db.backref("sessions", lazy=True))
 
-    @staticmethod
-    def hash_token(token, secret_key=None):
+    @classmethod
+    def list_loader_options(cls):
         """
-        Create a keyed hash of a JWT token for secure storage.
+        Loader options for queries that list many sessions
 
-        Args:
-            token: The JWT token to hash
-            secret_key: Secret key for HMAC (defaults to app's secret_key)
+        Batch-loads the recruiters and makes any other relationship access
+        raise instead of lazy loading per row:
+        Session.query.options(*Session.list_loader_options()).all()
 
         Returns:
-            str: The HMAC-SHA256 hexdigest of the token
+            list: Options for Query.options()
         """
+        return [selectinload(cls.recruiter), raiseload("*")]
+
+    @staticmethod
+    def _token_secret(secret_key=None):
+        """Resolve the secret used to key token hashes"""
         # Get secret key from app if not provided
         if not secret_key:
             try:
@@ -75,7 +108,36 @@ class Session(db.Model):
             # Last resort fallback
             secret_key = "airecruiter_default_session_key"
 
-        # Create HMAC with SHA-256
+        return secret_key
+
+    @classmethod
+    def hash_token(cls, token, secret_key=None):
+        """
+        Create a keyed hash of a JWT token for secure storage.
+
+        Args:
+            token: The JWT token to hash
+            secret_key: Secret key for the MAC (defaults to app's secret_key)
+
+        Returns:
+            str: The keyed BLAKE2b-256 hexdigest of the token
+        """
+        key = _mac_key(cls._token_secret(secret_key))
+        return hashlib.blake2b(token.encode(), key=key, digest_size=32).hexdigest()
+
+    @classmethod
+    def legacy_hash_token(cls, token, secret_key=None):
+        """
+        Hash a token the way sessions created before BLAKE2b were stored
+
+        Args:
+            token: The JWT token to hash
+            secret_key: Secret key for HMAC (defaults to app's secret_key)
+
+        Returns:
+            str: The HMAC-SHA256 hexdigest of the token
+        """
+        secret_key = cls._token_secret(secret_key)
         return hmac.new(secret_key.encode(), token.encode(), hashlib.sha256).hexdigest()
 
     @classmethod
@@ -93,7 +155,15 @@ class Session(db.Model):
             return None
 
         token_hash = cls.hash_token(token)
-        return cls.query.filter_by(token_hash=token_hash, is_active=True).first()
+        session = cls.query.filter_by(token_hash=token_hash, is_active=True).first()
+        if session is None and LEGACY_TOKEN_HASH:
+            session = cls.query.filter_by(
+                token_hash=cls.legacy_hash_token(token), is_active=True
+            ).first()
+            if session is not None:
+                # Upgrade in place; persisted with the caller's next commit
+                session.token_hash = token_hash
+        return session
 
     @classmethod
     def create_session(cls, recruiter_id, expires_at, request=None, token=None):
@@ -135,7 +205,7 @@ class Session(db.Model):
             ip_address=ip,
             user_agent=agent,
             device_info=device_info,
-            last_activity=datetime.utcnow(),
+            last_activity=naive_utcnow(),
             is_active=True,
         )
 
@@ -149,7 +219,7 @@ class Session(db.Model):
         """
         Update the last_activity timestamp to now.
         """
-        self.last_activity = datetime.utcnow()
+        self.last_activity = naive_utcnow()
         return self
 
     def deactivate(self):
@@ -164,7 +234,7 @@ class Session(db.Model):
         Check if this session is still valid (not expired, not revoked).
         """
         # Check if expired
-        if datetime.utcnow() > self.expires_at:
+        if naive_utcnow() > self.expires_at:
             return False
 
         # Check if explicitly deactivated
@@ -176,23 +246,23 @@ class Session(db.Model):
         """
         if self.device_info:
             return self.device_info
-        elif self.user_agent:
-            # Try to extract useful info from user agent
-            if "iPhone" in self.user_agent or "iPad" in self.user_agent:
+        user_agent = self.user_agent
+        if user_agent:
+            # Plain substring tests, checked in priority order (Android UAs
+            # also contain "Linux")
+            if "iPhone" in user_agent or "iPad" in user_agent:
                 return "iOS Device"
-            elif "Android" in self.user_agent:
+            elif "Android" in user_agent:
                 return "Android Device"
-            elif "Windows" in self.user_agent:
+            elif "Windows" in user_agent:
                 return "Windows Computer"
-            elif "Macintosh" in self.user_agent:
+            elif "Macintosh" in user_agent:
                 return "Mac Computer"
-            elif "Linux" in self.user_agent:
+            elif "Linux" in user_agent:
                 return "Linux Computer"
-            else:
-                return "Unknown Device"
-        else:
-            return "Unknown Device"
+        return "Unknown Device"
 
     def __repr__(self):
         status = "Active" if getattr(self, "is_active", True) else "Inactive"
-        return f"<Session {self.id[:8]}... ({status}, Recruiter {self.recruiter_id})>"
+        public_id = (self.public_id or "")[:8]
+        return f"<Session {public_id}... ({status}, Recruiter {self.recruiter_id})>"
@@ -5,9 +5,19 @@ This module defines shared models used across multiple areas of the application.
 These include skill-related models and other common entities.
 """
 
-from datetime import datetime
+import unicodedata
 
-from .base import db
+from sqlalchemy import DDL, event, select
+from sqlalchemy.dialects.postgresql import CITEXT
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import validates
+
+from .base import db, utc_now
+
+
+def normalize_skill_name(name):
+    """Fold a skill name for matching: NFKD, then lowercase"""
+    return unicodedata.normalize("NFKD", name).lower()
 
 
 class Skill(db.Model):
@@ -16,7 +26,8 @@ class Skill(db.Model):
 
     Attributes:
         id (int): Primary key
-        name (str): Skill name
+        name (str): Skill name (case-insensitive, citext)
+        normalized_name (str): NFKD-lowercased name for joins during skill extraction
         category (str): Skill category (programming, soft skills, etc.)
         created_at (datetime): When the skill was created
     """
@@ -24,9 +35,55 @@ class Skill(db.Model):
     __tablename__ = "skills"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
+    # citext makes the unique index itself case-insensitive ("Python" == "python")
+    name = db.Column(CITEXT, nullable=False, unique=True, index=True)
+    normalized_name = db.Column(db.String(100), index=True)
     category = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=utc_now())
+
+    @classmethod
+    def bulk_upsert(cls, names):
+        """
+        Get IDs for skill names, creating the missing skills in one statement
+
+        Uses INSERT ... ON CONFLICT (name) DO NOTHING RETURNING, then one
+        SELECT for the names that already existed. Names match
+        case-insensitively, so "Python" and "python" share one skill. The
+        caller commits.
+
+        Args:
+            names: Iterable of skill names
+
+        Returns:
+            dict: Mapping of each given skill name to its skill ID
+        """
+        names = [name.strip() for name in names if name and name.strip()]
+        # One spelling per case-insensitive name, the first one seen
+        unique = list({name.lower(): name for name in reversed(names)}.values())
+        if not unique:
+            return {}
+
+        stmt = (
+            pg_insert(cls)
+            .values(
+                [{"name": name, "normalized_name": normalize_skill_name(name)} for name in unique]
+            )
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(cls.name, cls.id)
+        )
+        ids = {name.lower(): skill_id for name, skill_id in db.session.execute(stmt)}
+
+        existing = [name for name in unique if name.lower() not in ids]
+        if existing:
+            rows = db.session.execute(select(cls.name, cls.id).where(cls.name.in_(existing)))
+            ids.update((name.lower(), skill_id) for name, skill_id in rows)
+        return {name: ids[name.lower()] for name in names if name.lower() in ids}
+
+    @validates("name")
+    def _set_normalized_name(self, key, value):
+        """Keep normalized_name in sync with name"""
+        self.normalized_name = normalize_skill_name(value) if value else None
+        return value
 
     def __repr__(self):
         return f"<Skill {self.name}>"
@@ -65,6 +122,36 @@ class CandidateSkill(db.Model):
         backref=db.backref("candidate_skills", lazy="dynamic", cascade="all, delete-orphan"),
     )
 
+    @classmethod
+    def bulk_link(cls, candidate_id, skill_names):
+        """
+        Attach skills to a candidate, creating skills as needed
+
+        Duplicate links are skipped by ON CONFLICT DO NOTHING on
+        uq_candidate_skill. The caller commits.
+
+        Args:
+            candidate_id (int): Candidate to attach the skills to
+            skill_names: Iterable of skill names
+
+        Returns:
+            dict: Mapping of skill name to skill ID
+        """
+        skill_ids = Skill.bulk_upsert(skill_names)
+        if skill_ids:
+            # Different spellings of one skill map to the same ID
+            db.session.execute(
+                pg_insert(cls)
+                .values(
+                    [
+                        {"candidate_id": candidate_id, "skill_id": skill_id}
+                        for skill_id in set(skill_ids.values())
+                    ]
+                )
+                .on_conflict_do_nothing(constraint="uq_candidate_skill")
+            )
+        return skill_ids
+
     def __repr__(self):
         return f"<CandidateSkill {self.candidate_id}:{self.skill_id}>"
 
@@ -101,3 +188,7 @@ class JobSkill(db.Model):
 
     def __repr__(self):
         return f"<JobSkill {self.job_id}:{self.skill_id} ({'Required' if self.is_required else 'Preferred'})>"
+
+
+# citext ships as an extension; make sure it exists before the skills table
+event.listen(Skill.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS citext"))
@@ -2,80 +2,451 @@
 Sharing models for job and candidate collaboration.
 
 This module contains models for tracking sharing relationships between
-recruiters for jobs and candidates.
+recruiters for jobs and candidates. All shares live in one
+recruiter_sharing table; JobSharing and CandidateSharing are single-table
+subclasses of RecruiterSharing selected by resource_type.
 """
 
-from datetime import datetime
+from functools import cached_property
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    DDL,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    event,
+    func,
+    insert,
+    lambda_stmt,
+    select,
+    text,
+)
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Bundle, backref, relationship, selectinload, synonym, validates
 
 from extensions import db
 
+from .base import utc_now
 
-class JobSharing(db.Model):
+# Every permission a share can grant
+ALLOWED_PERMISSIONS = frozenset({"view", "edit", "share", "delete"})
+
+
+def check_permissions(names):
     """
-    Job Sharing model.
+    Validate permission names against ALLOWED_PERMISSIONS
 
-    Represents a sharing relationship between recruiters for a job.
+    Args:
+        names: Iterable of permission names
+
+    Returns:
+        set: The names
+
+    Raises:
+        ValueError: If any name is not an allowed permission
     """
+    names = set(names)
+    unknown = names - ALLOWED_PERMISSIONS
+    if unknown:
+        raise ValueError(f"Unknown sharing permissions: {', '.join(sorted(unknown))}")
+    return names
 
-    __tablename__ = "job_sharing"
 
-    id = Column(Integer, primary_key=True)
-    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    recipient_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    permissions = Column(
-        String(255), nullable=False, default="view"
-    )  # Comma-separated list of permissions
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-    # Relationships
-    job = relationship("Job", foreign_keys=[job_id], backref="shared_with")
-    owner = relationship("User", foreign_keys=[owner_id], backref="job_shares_given")
-    recipient = relationship("User", foreign_keys=[recipient_id], backref="job_shares_received")
+def parse_permissions(value):
+    """
+    Split a comma-separated permissions string into a set
+
+    Args:
+        value (str): e.g. 'view,edit'
+
+    Returns:
+        set: Permission names, blanks dropped
+
+    Raises:
+        ValueError: If any name is not an allowed permission
+    """
+    return check_permissions(p.strip() for p in (value or "").split(",") if p.strip())
 
-    def __repr__(self):
-        return f"<JobSharing job_id={self.job_id} recipient_id={self.recipient_id}>"
+
+class SharingPermissionsMixin:
+    """
+    Permission checks over a sharing model's permission rows
+
+    Subclasses map permissions as a set of permission_model rows. Their
+    names are collected into a frozenset once per instance and recollected
+    only after the collection changes, so has_permission is a set lookup.
+    permissions_csv reads and writes the old comma-separated form.
+    """
+
+    permission_model = None
+
+    def __init__(self, **kwargs):
+        if "permissions" not in kwargs and "permissions_csv" not in kwargs:
+            kwargs["permissions_csv"] = "view"
+        super().__init__(**kwargs)
+
+    @cached_property
+    def _permission_set(self):
+        """Permission names, computed once per instance"""
+        return frozenset(row.permission for row in self.permissions)
+
+    @validates("permissions", include_removes=True)
+    def _invalidate_permission_set(self, key, value, is_remove):
+        """Drop the collected names whenever a permission row is added or removed"""
+        self.__dict__.pop("_permission_set", None)
+        return value
+
+    @hybrid_property
+    def permissions_csv(self):
+        """Permissions as a sorted comma-separated string"""
+        return ",".join(sorted(self._permission_set))
+
+    @permissions_csv.setter
+    def permissions_csv(self, value):
+        wanted = parse_permissions(value)
+        # Keep rows that stay so the flush only deletes and inserts the difference
+        kept = {row for row in self.permissions if row.permission in wanted}
+        kept_names = {row.permission for row in kept}
+        self.permissions = kept | {
+            self.permission_model(permission=name) for name in wanted - kept_names
+        }
+
+    @permissions_csv.expression
+    def permissions_csv(cls):
+        model = cls.permission_model
+        return (
+            select(func.string_agg(model.permission, db.literal_column("','")))
+            .where(model.sharing_id == cls.id)
+            .scalar_subquery()
+        )
 
     @property
     def permission_list(self):
         """Get permissions as a list."""
-        if not self.permissions:
-            return []
-        return self.permissions.split(",")
+        return sorted(self._permission_set)
 
     def has_permission(self, permission):
         """Check if the sharing relationship has a specific permission."""
-        return permission in self.permission_list
+        # Unknown names are never granted, since writes reject them
+        return permission in self._permission_set
+
+    @classmethod
+    def with_permission(cls, permission):
+        """
+        Query shares granting a permission (index seek on the permission rows)
 
+        Args:
+            permission (str): Permission name
 
-class CandidateSharing(db.Model):
+        Returns:
+            Query: Shares that have it
+        """
+        return cls.query.filter(cls.permissions.any(permission=permission))
+
+
+class RecruiterSharingPermission(db.Model):
+    """
+    One permission granted by a RecruiterSharing
     """
-    Candidate Sharing model.
 
-    Represents a sharing relationship between recruiters for a candidate.
+    __tablename__ = "recruiter_sharing_permissions"
+    __table_args__ = (
+        # The primary key serves per-share lookups; this serves "who can X"
+        Index("ix_rsp_perm_sid", "permission", "sharing_id"),
+        CheckConstraint(
+            "permission IN ({})".format(", ".join(f"'{p}'" for p in sorted(ALLOWED_PERMISSIONS))),
+            name="ck_rsp_permission_allowed",
+        ),
+    )
+
+    sharing_id = Column(
+        Integer, ForeignKey("recruiter_sharing.id", ondelete="CASCADE"), primary_key=True
+    )
+    permission = Column(String(32), primary_key=True)
+
+    @validates("permission")
+    def _validate_permission(self, key, value):
+        """Reject permission names outside ALLOWED_PERMISSIONS"""
+        check_permissions([value])
+        return value
+
+    def __repr__(self):
+        return f"<RecruiterSharingPermission {self.sharing_id}:{self.permission}>"
+
+
+# Job and candidate shares now share the recruiter_sharing permission rows
+JobSharingPermission = RecruiterSharingPermission
+CandidateSharingPermission = RecruiterSharingPermission
+
+
+class RecruiterSharing(SharingPermissionsMixin, db.Model):
+    """
+    Model for sharing resources between recruiters
+
+    Query this class for everything shared with a user in one scan; rows
+    load as JobSharing or CandidateSharing according to resource_type.
+
+    Attributes:
+        id (int): Primary key
+        owner_id (int): ID of the recruiter who owns the resource
+        shared_with_id (int): ID of the recruiter with whom the resource is shared
+        resource_type (str): Type of resource being shared ('job' or 'candidate')
+        resource_id (int): ID of the shared resource
+        permissions (set): RecruiterSharingPermission rows (view, edit, etc.)
+        created_at (datetime): When the sharing relationship was created
+        updated_at (datetime): When the sharing relationship was last updated
     """
 
-    __tablename__ = "candidate_sharing"
+    __tablename__ = "recruiter_sharing"
+    permission_model = RecruiterSharingPermission
+    # Old column names accepted by bulk_create
+    _bulk_aliases = {}
 
     id = Column(Integer, primary_key=True)
-    candidate_id = Column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    recipient_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    permissions = Column(
-        String(255), nullable=False, default="view"
-    )  # Comma-separated list of permissions
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-    # Relationships
-    candidate = relationship("Candidate", foreign_keys=[candidate_id], backref="shared_with")
-    owner = relationship("User", foreign_keys=[owner_id], backref="candidate_shares_given")
-    recipient = relationship(
-        "User", foreign_keys=[recipient_id], backref="candidate_shares_received"
+    shared_with_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    resource_type = Column(String(20), nullable=False)  # 'job' or 'candidate'
+    resource_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=utc_now())
+    updated_at = Column(DateTime, nullable=False, server_default=utc_now(), onupdate=utc_now())
+
+    __mapper_args__ = {"polymorphic_on": resource_type, "polymorphic_identity": "base"}
+    # One partial index per resource type keeps each type's lookups small;
+    # unique, so a resource can't be shared with the same recruiter twice
+    __table_args__ = (
+        Index(
+            "ix_rs_job_recipient",
+            "shared_with_id",
+            "resource_id",
+            unique=True,
+            postgresql_where=text("resource_type = 'job'"),
+        ),
+        Index(
+            "ix_rs_candidate_recipient",
+            "shared_with_id",
+            "resource_id",
+            unique=True,
+            postgresql_where=text("resource_type = 'candidate'"),
+        ),
+        # "Shares I own", most recently changed first
+        Index("ix_rs_owner_updated", "owner_id", text("updated_at DESC")),
+    )
+
+    # Define foreign key relationships
+    permissions = relationship(
+        RecruiterSharingPermission,
+        lazy="selectin",
+        collection_class=set,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    # Lazy loads raise so per-row N+1 queries fail loudly; batch-load these
+    # with list_loader_options()
+    owner = relationship("User", foreign_keys=[owner_id], backref="shared_resources", lazy="raise")
+    shared_with = relationship(
+        "User", foreign_keys=[shared_with_id], backref="accessible_resources", lazy="raise"
+    )
+
+    def __repr__(self):
+        return f"<RecruiterSharing {self.resource_type}:{self.resource_id} from {self.owner_id} to {self.shared_with_id}>"
+
+    @classmethod
+    def list_loader_options(cls, with_roles=False):
+        """
+        Loader options for queries that list many shares
+
+        The owner and shared_with relationships raise when lazily loaded,
+        so list queries must batch-load them:
+        RecruiterSharing.query.options(*RecruiterSharing.list_loader_options()).all()
+
+        Args:
+            with_roles (bool): Also batch-load the owners' roles, for views
+                that show "shared by {user} ({roles})"
+
+        Returns:
+            list: Options for Query.options()
+        """
+        owner = selectinload(cls.owner)
+        if with_roles:
+            from .user import User
+
+            owner = owner.selectinload(User.roles)
+        return [owner, selectinload(cls.shared_with)]
+
+    @classmethod
+    def for_recipient(cls, user_id):
+        """
+        Shares visible to a recruiter, with list relationships batch-loaded
+
+        The statement comes from _RECIPIENT_STATEMENTS, so it is built and
+        compiled once per class and later calls only bind user_id.
+
+        Args:
+            user_id (int): Recipient's user ID
+
+        Returns:
+            list: Shares of this class (all types on RecruiterSharing)
+        """
+        return db.session.execute(_RECIPIENT_STATEMENTS[cls](user_id)).scalars().all()
+
+    @classmethod
+    def list_for_recipient(cls, user_id):
+        """
+        Shares visible to a recruiter as lightweight rows, not ORM instances
+
+        Selects only the columns list views show (permissions aggregated
+        in SQL), so no identity map, instance state or relationship loads.
+
+        Args:
+            user_id (int): Recipient's user ID
+
+        Returns:
+            list: Rows with id, resource_type, resource_id, owner_id,
+                permissions (CSV) and updated_at attributes
+        """
+        share = Bundle(
+            "share",
+            cls.id,
+            cls.resource_type,
+            cls.resource_id,
+            cls.owner_id,
+            cls.permissions_csv.label("permissions"),
+            cls.updated_at,
+        )
+        query = select(share).where(cls.shared_with_id == user_id)
+        identity = cls.__mapper__.polymorphic_identity
+        if identity != "base":
+            query = query.where(cls.resource_type == identity)
+        return db.session.execute(query).scalars().all()
+
+    @classmethod
+    def bulk_create(cls, session, rows):
+        """
+        Create many shares with batched INSERT ... RETURNING statements
+
+        SQLAlchemy's insertmanyvalues packs each batch into multi-VALUES
+        statements, so N shares cost a few round trips instead of N. The
+        permission rows follow in one more batch.
+
+        Args:
+            session: Session to execute in (the caller commits)
+            rows (list): Dicts keyed by column name; subclasses also accept
+                their old names (e.g. job_id). permissions may be a CSV
+                string or an iterable and defaults to 'view'.
+
+        Returns:
+            list: New share IDs, in the order of rows
+        """
+        identity = cls.__mapper__.polymorphic_identity
+        shares, granted = [], []
+        for row in rows:
+            share = {cls._bulk_aliases.get(key, key): value for key, value in row.items()}
+            permissions = share.pop("permissions", "view")
+            if identity != "base":
+                share["resource_type"] = identity
+            shares.append(share)
+            granted.append(
+                parse_permissions(permissions)
+                if isinstance(permissions, str)
+                else check_permissions(permissions)
+            )
+
+        # executemany needs the same keys in every row of a statement
+        by_keys = {}
+        for position, share in enumerate(shares):
+            by_keys.setdefault(frozenset(share), []).append(position)
+        ids = [None] * len(shares)
+        for positions in by_keys.values():
+            new_ids = session.execute(
+                insert(cls).returning(cls.id, sort_by_parameter_order=True),
+                [shares[position] for position in positions],
+            ).scalars()
+            for position, share_id in zip(positions, new_ids):
+                ids[position] = share_id
+
+        permission_rows = [
+            {"sharing_id": share_id, "permission": permission}
+            for share_id, permissions in zip(ids, granted)
+            for permission in permissions
+        ]
+        if permission_rows:
+            session.execute(insert(RecruiterSharingPermission), permission_rows)
+        return ids
+
+
+class JobSharing(RecruiterSharing):
+    """
+    Job Sharing model.
+
+    Represents a sharing relationship between recruiters for a job.
+    """
+
+    __mapper_args__ = {"polymorphic_identity": "job"}
+    _bulk_aliases = {"job_id": "resource_id", "recipient_id": "shared_with_id"}
+
+    # Names from the former job_sharing table
+    job_id = synonym("resource_id")
+    recipient_id = synonym("shared_with_id")
+    recipient = synonym("shared_with")
+
+    # There is no foreign key on the polymorphic resource_id; the
+    # trg_jobs_delete_shares trigger deletes a job's shares, so the ORM only
+    # deletes shares that are already loaded
+    job = relationship(
+        "Job",
+        primaryjoin="foreign(JobSharing.resource_id) == Job.id",
+        backref=backref("shared_with", cascade="all, delete-orphan", passive_deletes=True),
+        lazy="raise",
+    )
+
+    def __repr__(self):
+        return f"<JobSharing job_id={self.job_id} recipient_id={self.recipient_id}>"
+
+    @classmethod
+    def list_loader_options(cls, with_roles=False):
+        """
+        Loader options for queries that list many shares
+
+        The job, owner and recipient relationships raise when lazily
+        loaded, so list queries must batch-load them:
+        JobSharing.query.options(*JobSharing.list_loader_options()).all()
+
+        Args:
+            with_roles (bool): Also batch-load the owners' roles
+
+        Returns:
+            list: Options for Query.options()
+        """
+        return [selectinload(cls.job), *super().list_loader_options(with_roles)]
+
+
+class CandidateSharing(RecruiterSharing):
+    """
+    Candidate Sharing model.
+
+    Represents a sharing relationship between recruiters for a candidate.
+    """
+
+    __mapper_args__ = {"polymorphic_identity": "candidate"}
+    _bulk_aliases = {"candidate_id": "resource_id", "recipient_id": "shared_with_id"}
+
+    # Names from the former candidate_sharing table
+    candidate_id = synonym("resource_id")
+    recipient_id = synonym("shared_with_id")
+    recipient = synonym("shared_with")
+
+    # There is no foreign key on the polymorphic resource_id; the
+    # trg_candidates_delete_shares trigger deletes a candidate's shares, so
+    # the ORM only deletes shares that are already loaded
+    candidate = relationship(
+        "Candidate",
+        primaryjoin="foreign(CandidateSharing.resource_id) == Candidate.id",
+        backref=backref("shared_with", cascade="all, delete-orphan", passive_deletes=True),
+        lazy="raise",
     )
 
     def __repr__(self):
@@ -83,13 +454,69 @@ class CandidateSharing(db.Model):
             f"<CandidateSharing candidate_id={self.candidate_id} recipient_id={self.recipient_id}>"
         )
 
-    @property
-    def permission_list(self):
-        """Get permissions as a list."""
-        if not self.permissions:
-            return []
-        return self.permissions.split(",")
+    @classmethod
+    def list_loader_options(cls, with_roles=False):
+        """
+        Loader options for queries that list many shares
 
-    def has_permission(self, permission):
-        """Check if the sharing relationship has a specific permission."""
-        return permission in self.permission_list
+        The candidate, owner and recipient relationships raise when lazily
+        loaded, so list queries must batch-load them:
+        CandidateSharing.query.options(*CandidateSharing.list_loader_options()).all()
+
+        Args:
+            with_roles (bool): Also batch-load the owners' roles
+
+        Returns:
+            list: Options for Query.options()
+        """
+        return [selectinload(cls.candidate), *super().list_loader_options(with_roles)]
+
+
+# Statements for for_recipient, one lambda per class so lambda_stmt caches
+# each by code location; only user_id is bound per call
+_RECIPIENT_STATEMENTS = {
+    RecruiterSharing: lambda user_id: lambda_stmt(
+        lambda: select(RecruiterSharing)
+        .where(RecruiterSharing.shared_with_id == user_id)
+        .options(*RecruiterSharing.list_loader_options())
+    ),
+    JobSharing: lambda user_id: lambda_stmt(
+        lambda: select(JobSharing)
+        .where(JobSharing.shared_with_id == user_id)
+        .options(*JobSharing.list_loader_options())
+    ),
+    CandidateSharing: lambda user_id: lambda_stmt(
+        lambda: select(CandidateSharing)
+        .where(CandidateSharing.shared_with_id == user_id)
+        .options(*CandidateSharing.list_loader_options())
+    ),
+}
+
+
+# Shares of a deleted job or candidate are removed in the database, so Core
+# and bulk DELETEs leave no orphans. Statement-level triggers handle a bulk
+# delete with one join. Run after create_all so both tables exist; the DDL is
+# idempotent because create_all runs on every startup.
+_SHARE_CLEANUP_DDL = """
+CREATE OR REPLACE FUNCTION delete_resource_shares() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM recruiter_sharing s
+    USING deleted_rows d
+    WHERE s.resource_type = TG_ARGV[0] AND s.resource_id = d.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS trg_jobs_delete_shares ON jobs;
+CREATE TRIGGER trg_jobs_delete_shares AFTER DELETE ON jobs
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION delete_resource_shares('job');
+DROP TRIGGER IF EXISTS trg_candidates_delete_shares ON candidates;
+CREATE TRIGGER trg_candidates_delete_shares AFTER DELETE ON candidates
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION delete_resource_shares('candidate');
+"""
+event.listen(
+    db.metadata,
+    "after_create",
+    DDL(_SHARE_CLEANUP_DDL).execute_if(dialect="postgresql"),
+)
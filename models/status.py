@@ -6,11 +6,14 @@ This module defines enum classes for various status values used across the appli
 
 import enum
 
+from sqlalchemy import Enum
 
-class CandidateStatus(enum.Enum):
+
+class CandidateStatus(str, enum.Enum):
     """
     Enum for candidate status options.
     Used for type safety and consistent status values across the application.
+    Members compare equal to their string values ('new', 'hired', ...).
     """
 
     NEW = "new"
@@ -22,3 +25,14 @@ class CandidateStatus(enum.Enum):
     HIRED = "hired"
     REJECTED = "rejected"
     WITHDREW = "withdrew"
+
+
+# PostgreSQL enum type for candidate status columns; stores the lowercase
+# values and rejects unknown strings before they reach the database
+candidate_status_type = Enum(
+    CandidateStatus,
+    name="candidate_status",
+    native_enum=True,
+    validate_strings=True,
+    values_callable=lambda statuses: [status.value for status in statuses],
+)
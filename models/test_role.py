@@ -5,11 +5,9 @@ This module provides a TestRole model that matches the actual database schema,
 ensuring compatibility in test environments.
 """
 
-from datetime import datetime
-
 from sqlalchemy import Column, DateTime, Integer, String, Text
 
-from .base import db
+from .base import db, utc_now
 
 
 class TestRole(db.Model):
@@ -24,7 +22,7 @@ class TestRole(db.Model):
     id = Column(Integer, primary_key=True)
     name = Column(String(64), unique=True, nullable=False)
     role_id = Column(String(50), unique=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utc_now())
     inherits = Column(String(50), nullable=True)
     permissions = Column(Text)
 
@@ -4,53 +4,53 @@ User Models for AI Recruiter Pro
 This module defines the user-related models for the application.
 """
 
-import uuid
-from datetime import datetime
+import os
+import secrets
+import threading
+from functools import lru_cache
 
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import event, exists, lambda_stmt, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Bundle, object_session, selectinload
+from werkzeug.security import check_password_hash
 
-from .base import db
+from .base import attach_cached, call_after_commit, db, detached_copy, naive_utcnow, utc_now
 
+# Users and recruiters hash with the same Argon2id parameters
+from .recruiter import _LEGACY_HASH_PREFIXES, _password_hasher
+# RecruiterSharing moved to models.sharing; kept importable from here
+from .sharing import RecruiterSharing, RecruiterSharingPermission
 
-class RecruiterSharing(db.Model):
-    """
-    Model for sharing resources between recruiters
+# Users looked up by username/email, several times per request. Only
+# this process evicts on commit, so other workers may serve a changed user for
+# up to USER_CACHE_TTL seconds; authentication lookups bypass the cache.
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "30"))
+USER_CACHE_MAX_ITEMS = int(os.environ.get("USER_CACHE_MAX_ITEMS", "10000"))
 
-    Attributes:
-        id (int): Primary key
-        owner_id (int): ID of the recruiter who owns the resource
-        shared_with_id (int): ID of the recruiter with whom the resource is shared
-        resource_type (str): Type of resource being shared ('job' or 'candidate')
-        resource_id (int): ID of the shared resource
-        permissions (str): Comma-separated list of permissions (view, edit, etc.)
-        created_at (datetime): When the sharing relationship was created
-        updated_at (datetime): When the sharing relationship was last updated
-    """
+# (field, value) -> detached User copy
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_ITEMS, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
 
-    __tablename__ = "recruiter_sharing"
+# Bumped on every eviction; a lookup only stores its result if no eviction
+# ran while it was reading, so a row read before a commit can't be re-cached
+_user_cache_generation = 0
 
-    id = db.Column(db.Integer, primary_key=True)
-    owner_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    shared_with_id = db.Column(
-        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
-    )
-    resource_type = db.Column(db.String(20), nullable=False)  # 'job' or 'candidate'
-    resource_id = db.Column(db.Integer, nullable=False)
-    permissions = db.Column(
-        db.String(255), default="view"
-    )  # Comma-separated list: view, edit, etc.
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
-
-    # Define foreign key relationships
-    owner = db.relationship("User", foreign_keys=[owner_id], backref="shared_resources")
-    shared_with = db.relationship(
-        "User", foreign_keys=[shared_with_id], backref="accessible_resources"
-    )
 
-    def __repr__(self):
-        return f"<RecruiterSharing {self.resource_type}:{self.resource_id} from {self.owner_id} to {self.shared_with_id}>"
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    """Argon2 hash verified against when there is nothing real to check"""
+    return _password_hasher.hash(secrets.token_urlsafe(16))
+
+
+def _spend_verify():
+    """Run one failing verify so rejected logins cost as much as real ones"""
+    try:
+        _password_hasher.verify(_dummy_hash(), "")
+    except VerificationError:
+        pass
 
 
 class User(UserMixin, db.Model):
@@ -68,29 +68,56 @@ class User(UserMixin, db.Model):
         last_name (str): User's last name
         created_at (datetime): Account creation timestamp
         last_login (datetime): Last login timestamp
-        is_admin (bool): Whether the user is an admin
+        is_admin (bool): Whether the user is an admin; also kept in step with
+            the admin role by the roles append/remove listeners
         is_active (bool): Whether the user account is active
         is_demo (bool): Whether this is a demo user account
     """
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Admin listings scan only the few admin rows
+        db.Index("ix_users_admin", "id", postgresql_where=db.text("is_admin")),
+        # Serves ORDER BY / filters on lower(User.full_name)
+        db.Index(
+            "ix_users_full_name",
+            db.text("lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(256), nullable=False)
+    # Argon2id hashes are ~97 chars, legacy werkzeug 2.3 pbkdf2 hashes ~102
+    password_hash = db.Column(db.String(128), nullable=False)
     first_name = db.Column(db.String(64))
     last_name = db.Column(db.String(64))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=utc_now())
     last_login = db.Column(db.DateTime)
     is_admin = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
     is_demo = db.Column(db.Boolean, default=False)
     api_key = db.Column(db.String(255), unique=True)
 
-    # Relationships
+    # Relationships; is_admin_user() reads the is_admin column, so roles are
+    # only loaded when touched (batch them with with_roles()). Role.users is
+    # a plain collection so it can be selectin-loaded too.
     roles = db.relationship(
-        "Role", secondary="user_roles", backref=db.backref("users", lazy="dynamic")
+        "Role", secondary="user_roles", backref=db.backref("users", lazy="select")
+    )
+    # Per-type views over recruiter_sharing (owner/shared_with backrefs
+    # are shared_resources/accessible_resources)
+    job_shares_given = db.relationship(
+        "JobSharing", foreign_keys="JobSharing.owner_id", viewonly=True
+    )
+    job_shares_received = db.relationship(
+        "JobSharing", foreign_keys="JobSharing.shared_with_id", viewonly=True
+    )
+    candidate_shares_given = db.relationship(
+        "CandidateSharing", foreign_keys="CandidateSharing.owner_id", viewonly=True
+    )
+    candidate_shares_received = db.relationship(
+        "CandidateSharing", foreign_keys="CandidateSharing.shared_with_id", viewonly=True
     )
 
     def __init__(self, username=None, email=None, password=None, **kwargs):
@@ -118,6 +145,98 @@ class User(UserMixin, db.Model):
         if not kwargs.get("api_key") and not getattr(self, "api_key", None):
             self.generate_api_key()
 
+    @classmethod
+    def _lookup(cls, field, value):
+        """Load a user by a unique field, bypassing the cache"""
+        if value is None:
+            return None
+        return db.session.execute(_LOOKUP_STATEMENTS[field](value)).scalar_one_or_none()
+
+    @classmethod
+    def _cached_lookup(cls, field, value):
+        """
+        Load a user by a unique field through the process-wide cache
+
+        Hits skip the SELECT; misses are not cached, so new users are found
+        immediately. Committed ORM writes evict the user in this process (see
+        _evict_user_cache); other processes see changes within USER_CACHE_TTL.
+
+        Args:
+            field (str): Unique column, a key of _LOOKUP_STATEMENTS
+            value: Value to look up
+
+        Returns:
+            User: Session-bound user or None
+        """
+        if value is None:
+            return None
+        with _user_cache_lock:
+            cached = _user_cache.get((field, value))
+            generation = _user_cache_generation
+        if cached is not None:
+            return attach_cached(cached)
+        user = cls._lookup(field, value)
+        if user is not None:
+            copy = detached_copy(user)
+            with _user_cache_lock:
+                if generation == _user_cache_generation:
+                    _user_cache[(field, value)] = copy
+        return user
+
+    @classmethod
+    def by_id(cls, user_id):
+        """Get a user by primary key (uncached, safe for session loading)"""
+        return cls._lookup("id", int(user_id))
+
+    @classmethod
+    def by_username(cls, username):
+        """Get a user by username (cached)"""
+        return cls._cached_lookup("username", username)
+
+    @classmethod
+    def by_api_key(cls, api_key):
+        """Get a user by API key (uncached, so revoked keys stop working at once)"""
+        return cls._lookup("api_key", api_key)
+
+    @classmethod
+    def by_email(cls, email):
+        """Get a user by email address (cached)"""
+        return cls._cached_lookup("email", email)
+
+    @classmethod
+    def with_roles(cls):
+        """
+        Select users with their roles batch-loaded in one extra IN query
+
+        Returns:
+            Select: select(User) with selectinload(User.roles)
+        """
+        return select(cls).options(selectinload(cls.roles))
+
+    @classmethod
+    def list_summaries(cls):
+        """
+        All users as lightweight rows for the admin users list
+
+        Returns:
+            list: Rows with id, username, email, full_name, is_admin,
+                is_active, created_at and last_login attributes, ordered by
+                name (served by ix_users_full_name)
+        """
+        user = Bundle(
+            "user",
+            cls.id,
+            cls.username,
+            cls.email,
+            cls.full_name.label("full_name"),
+            cls.is_admin,
+            cls.is_active,
+            cls.created_at,
+            cls.last_login,
+        )
+        query = select(user).order_by(db.func.lower(cls.full_name), cls.id)
+        return db.session.execute(query).scalars().all()
+
     def set_password(self, password):
         """
         Set password hash from plain text password
@@ -125,27 +244,58 @@ class User(UserMixin, db.Model):
         Args:
             password (str): Plain text password
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = _password_hasher.hash(password)
 
     def check_password(self, password):
         """
         Verify password against stored hash
 
+        Legacy werkzeug hashes and Argon2 hashes with outdated parameters
+        are upgraded in place on a successful check; the caller's commit
+        (e.g. of last_login) persists the new hash. Empty passwords and
+        missing hashes are rejected after a dummy verify, so they take as
+        long as a real mismatch.
+
         Args:
             password (str): Plain text password to check
 
         Returns:
             bool: True if password matches, False otherwise
         """
-        return check_password_hash(self.password_hash, password)
+        if not password or not self.password_hash:
+            _spend_verify()
+            return False
+
+        if self.password_hash.startswith(_LEGACY_HASH_PREFIXES):
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        try:
+            _password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if _password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def generate_api_key(self):
-        """Generate a unique API key for this user"""
-        self.api_key = str(uuid.uuid4())
+        """Generate a unique API key for this user (22 URL-safe characters)"""
+        self.api_key = secrets.token_urlsafe(16)
 
     def update_last_login(self):
         """Update last login timestamp to now"""
-        self.last_login = datetime.utcnow()
+        self.last_login = naive_utcnow()
+
+    @hybrid_property
+    def full_name(self):
+        """First and last name joined by a space, computed in SQL in queries"""
+        return f"{self.first_name or ''} {self.last_name or ''}"
+
+    @full_name.expression
+    def full_name(cls):
+        return db.func.coalesce(cls.first_name, "") + " " + db.func.coalesce(cls.last_name, "")
 
     def get_full_name(self):
         """
@@ -154,9 +304,7 @@ class User(UserMixin, db.Model):
         Returns:
             str: Full name or username if name not set
         """
-        if self.first_name and self.last_name:
-            return f"{self.first_name} {self.last_name}"
-        return self.username
+        return self.full_name.strip() or self.username
 
     def is_admin_user(self):
         """
@@ -165,16 +313,77 @@ class User(UserMixin, db.Model):
         Returns:
             bool: True if user is an admin, False otherwise
         """
-        # Check the is_admin field
-        if hasattr(self, "is_admin") and self.is_admin:
+        if self.is_admin:
             return True
+        # is_admin only follows ORM role changes (see _grant_admin_role), so
+        # confirm in the database: Core writes to user_roles, renamed roles
+        return self.id is not None and self.has_admin_role()
 
-        # Also check roles for an admin role
-        if hasattr(self, "roles"):
-            for role in self.roles:
-                if role.name == "admin":
-                    return True
-        return False
+    def has_admin_role(self):
+        """
+        Check the database for admin role membership
+
+        One EXISTS query returning a boolean, without loading Role rows.
+
+        Returns:
+            bool: True if the user holds a role named 'admin'
+        """
+        from .role import Role, user_roles
+
+        return db.session.query(
+            exists()
+            .where(user_roles.c.user_id == self.id)
+            .where(user_roles.c.role_id == Role.id)
+            .where(Role.name == "admin")
+        ).scalar()
 
     def __repr__(self):
         return f"<User {self.username}>"
+
+
+# Lookup statements by unique field. lambda_stmt caches each compiled SELECT
+# by the lambda's code location, so per call only the value is bound.
+_LOOKUP_STATEMENTS = {
+    "id": lambda value: lambda_stmt(lambda: select(User).where(User.id == value)),
+    "username": lambda value: lambda_stmt(lambda: select(User).where(User.username == value)),
+    "email": lambda value: lambda_stmt(lambda: select(User).where(User.email == value)),
+    "api_key": lambda value: lambda_stmt(lambda: select(User).where(User.api_key == value)),
+}
+
+
+@event.listens_for(User.roles, "append")
+def _grant_admin_role(target, value, initiator):
+    """Set is_admin when the admin role is added"""
+    if value.name == "admin":
+        target.is_admin = True
+
+
+@event.listens_for(User.roles, "remove")
+def _revoke_admin_role(target, value, initiator):
+    """Clear is_admin when the last admin role is removed"""
+    if value.name == "admin":
+        target.is_admin = any(role.name == "admin" for role in target.roles if role is not value)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_user_cache(mapper, connection, target):
+    """Drop every cached lookup of a user once the write commits"""
+    user_id = target.id
+
+    def evict():
+        global _user_cache_generation
+        with _user_cache_lock:
+            _user_cache_generation += 1
+            stale = [
+                key
+                for key, cached in list(_user_cache.items())
+                if getattr(cached, "id", None) == user_id
+            ]
+            for key in stale:
+                _user_cache.pop(key, None)
+
+    call_after_commit(object_session(target), evict)
+
+
+__all__ = ["RecruiterSharing", "RecruiterSharingPermission", "User"]
@@ -0,0 +1,82 @@
+"""
+Shared pytest fixtures for AI Recruiter Pro
+
+The models use PostgreSQL-only types (JSONB, pgvector, CIDR), so tests that
+need a database run against TEST_DATABASE_URL and are skipped without it.
+"""
+
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(bind):
+    """
+    Record every SQL statement executed inside the block
+
+    Args:
+        bind: Engine or Connection to watch
+
+    Yields:
+        list: Statements in execution order, appended as they run
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Application configured for testing, with its context pushed"""
+    if not os.environ.get("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from app_factory import create_app
+
+    app = create_app("testing", skip_role_init=True)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def db_session(app):
+    """Database session whose changes are rolled back after each test"""
+    from extensions import db
+
+    yield db.session
+    db.session.rollback()
+    db.session.remove()
+
+
+@pytest.fixture
+def assert_max_queries(db_session):
+    """
+    Context manager failing the test if a block runs more than n statements
+
+    Pins the query count of list views and lookups so N+1 patterns fail
+    here instead of showing up as a slowdown:
+
+        with assert_max_queries(2):
+            JobSharing.for_recipient(user_id)
+    """
+    engine = db_session.get_bind()
+
+    @contextmanager
+    def check(limit):
+        with count_queries(engine) as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f"Expected at most {limit} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+
+    return check
@@ -0,0 +1,68 @@
+"""
+Query-count bounds for sharing listings and admin checks
+
+These fail when a change reintroduces per-row lazy loads (N+1 queries).
+"""
+
+import pytest
+
+from models import JobSharing, RecruiterSharing, User
+
+
+@pytest.fixture
+def shared_jobs(db_session):
+    """Two jobs shared from one user to another; returns the recipient's ID"""
+    owner = User(username="qc_owner", email="qc_owner@example.com", password="secret")
+    recipient = User(username="qc_recipient", email="qc_recipient@example.com", password="secret")
+    db_session.add_all([owner, recipient])
+    db_session.flush()
+    for resource_id in (101, 102):
+        share = JobSharing(owner_id=owner.id, shared_with_id=recipient.id, resource_id=resource_id)
+        share.permissions_csv = "view,edit"
+        db_session.add(share)
+    db_session.flush()
+    recipient_id = recipient.id
+    db_session.expunge_all()
+    return recipient_id
+
+
+def test_for_recipient_batch_loads_relationships(shared_jobs, assert_max_queries):
+    # Shares, then one selectin each for permissions, owners and recipients
+    with assert_max_queries(4):
+        shares = RecruiterSharing.for_recipient(shared_jobs)
+        for share in shares:
+            assert share.owner.username == "qc_owner"
+            assert share.shared_with.username == "qc_recipient"
+            assert share.permission_list
+
+    assert len(shares) == 2
+
+
+def test_list_for_recipient_is_one_query(shared_jobs, assert_max_queries):
+    with assert_max_queries(1):
+        rows = RecruiterSharing.list_for_recipient(shared_jobs)
+
+    assert len(rows) == 2
+
+
+def test_is_admin_user_reads_flag_without_queries(db_session, assert_max_queries):
+    admin = User(username="qc_admin", email="qc_admin@example.com", password="secret")
+    admin.is_admin = True
+    db_session.add(admin)
+    db_session.flush()
+    db_session.expunge_all()
+    admin = db_session.get(User, admin.id)
+
+    with assert_max_queries(0):
+        assert admin.is_admin_user()
+
+
+def test_is_admin_user_falls_back_to_one_exists_query(db_session, assert_max_queries):
+    user = User(username="qc_user", email="qc_user@example.com", password="secret")
+    db_session.add(user)
+    db_session.flush()
+    db_session.expunge_all()
+    user = db_session.get(User, user.id)
+
+    with assert_max_queries(1):
+        assert not user.is_admin_user()